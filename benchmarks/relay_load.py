@@ -0,0 +1,285 @@
+"""Load test of own_relay.py: how many subscribers and what publish rate before alerts are delayed.
+
+Starts the relay on localhost (memory-only unless --data-dir is given),
+publishes `--history` FROST-signed alerts, then connects `--subscribers`
+WebSocket clients (spread over `--client-procs` processes) with a mix of
+REQ filters: all alerts by kind, one author's alerts, or a fixed set of ids.
+Each subscriber times its history replay up to EOSE. Then `--publishers`
+connections send `--rate` alerts per second for `--duration` seconds.
+Latency is measured from each alert's scheduled send time to its arrival at
+a subscriber, so a publisher that falls behind shows up as delay too.
+
+Reports one JSON object: publish rate achieved and rejected alerts,
+delivery latency percentiles and missed frames, EOSE time percentiles,
+dropped subscriber connections, the relay's dropped-frame counter and its
+memory before and after the run. Save it and diff it against a run on a
+changed relay.
+
+    python benchmarks/relay_load.py --subscribers 500 --rate 200 --duration 20
+    python benchmarks/relay_load.py --verify-frost --relay-args "--workers 2" > after.json
+"""
+import os
+import sys
+import json
+import time
+import shlex
+import random
+import socket
+import asyncio
+import argparse
+import subprocess
+import urllib.request
+import multiprocessing
+
+import websockets
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import frostpy
+import frost_keyring
+import relay_verify
+
+RELAY = os.path.join(ROOT, "own_relay.py")
+FILTER_KINDS = ("kinds", "authors", "ids")
+LIVE_BASE = 10 ** 12  # live alert k has id LIVE_BASE + k; history ids are below it
+
+def wait_for_port(port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("localhost", port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"relay did not open port {port}")
+
+def percentiles(values):
+    ordered = sorted(values)
+    if not ordered:
+        return {"count": 0}
+
+    def pct(p):
+        return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 3)
+
+    return {"count": len(ordered), "p50_ms": pct(0.50), "p95_ms": pct(0.95), "p99_ms": pct(0.99),
+            "max_ms": round(ordered[-1] * 1000, 3)}
+
+# -- alerts -------------------------------------------------------------------
+
+def signing_group():
+    shares, public_key_package, verifying_key = frostpy.generate_keys_bin_py(3, 2)
+    key_packages = [frostpy.KeyPackage.from_bytes(data) for _, data in shares[:2]]
+    verifying_key_b64 = frostpy.VerifyingKey.from_bytes(verifying_key).to_b64()
+    return key_packages, frostpy.PublicKeyPackage.from_bytes(public_key_package), verifying_key_b64
+
+def make_alerts(first_id, count, authors, group):
+    key_packages, public_key_package, verifying_key_b64 = group
+    fingerprint = frost_keyring.fingerprint(verifying_key_b64)
+    messages = [f"load test alert {first_id + i}" for i in range(count)]
+    signatures = frostpy.sign_messages_batch_py(messages, key_packages, 2, public_key_package) if messages else []
+    now = int(time.time())
+    return [{"id": f"{first_id + i:064x}", "pubkey": authors[i % len(authors)], "kind": 1, "created_at": now, "tags": [],
+             "content": message + relay_verify.KEY_MARKER + fingerprint + relay_verify.SIGNATURE_MARKER + signature,
+             "sig": "0" * 128}
+            for i, (message, signature) in enumerate(zip(messages, signatures))]
+
+def subscriptions(count, live, authors, ids_per_sub, seed):
+    """(sub_id, filter, live alerts it should receive) per subscriber, cycling through FILTER_KINDS."""
+    rng = random.Random(seed)
+    subs = []
+    for i in range(count):
+        kind = FILTER_KINDS[i % len(FILTER_KINDS)]
+        if kind == "kinds":
+            subs.append((f"k{i}", {"kinds": [1]}, len(live)))
+        elif kind == "authors":
+            author = authors[i % len(authors)]
+            subs.append((f"a{i}", {"authors": [author]}, sum(event["pubkey"] == author for event in live)))
+        else:
+            picked = rng.sample(live, min(ids_per_sub, len(live)))
+            subs.append((f"i{i}", {"ids": [event["id"] for event in picked]}, len(picked)))
+    return subs
+
+# -- subscribers (client processes) -------------------------------------------
+
+async def subscribe(port, subs, rate, window, start, ready, go):
+    async def connect(sub_id, filters):
+        ws = await websockets.connect(f"ws://localhost:{port}", max_queue=None)
+        requested = time.perf_counter()
+        await ws.send(json.dumps(["REQ", sub_id, filters]))
+        while json.loads(await ws.recv())[0] != "EOSE":
+            pass
+        return ws, time.perf_counter() - requested
+
+    connected = await asyncio.gather(*(connect(sub_id, filters) for sub_id, filters, _ in subs), return_exceptions=True)
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, ready.wait)
+    await loop.run_in_executor(None, go.wait)  # the parent sets `start` in between
+    started = start.value
+    end = started + window
+
+    async def drain(ws, expected):
+        latencies = []
+        try:
+            while len(latencies) < expected:
+                frame = json.loads(await asyncio.wait_for(ws.recv(), max(0.0, end - time.time())))
+                if frame[0] == "EVENT":
+                    k = int(frame[2]["id"], 16) - LIVE_BASE
+                    latencies.append(time.time() - (started + k / rate))
+        except asyncio.TimeoutError:
+            pass
+        except websockets.ConnectionClosed:
+            return latencies, True
+        await ws.close()
+        return latencies, False
+
+    live = [(result, expected) for result, (_, _, expected) in zip(connected, subs) if not isinstance(result, BaseException)]
+    drained = await asyncio.gather(*(drain(ws, expected) for (ws, _), expected in live))
+    return {"eose_s": [eose for (_, eose), _ in live],
+            "latencies": [latency for latencies, _ in drained for latency in latencies],
+            "expected": sum(expected for _, expected in live),
+            "failed_connects": len(connected) - len(live),
+            "dropped": sum(dropped for _, dropped in drained)}
+
+def client_process(port, subs, rate, window, start, ready, go, results):
+    results.put(asyncio.run(subscribe(port, subs, rate, window, start, ready, go)))
+
+# -- publishers ---------------------------------------------------------------
+
+async def send_all(port, events, connections, rate=None, start=None):
+    """Send events over `connections` sockets, paced at `rate` per second from `start` when given.
+    Returns (accepted, rejected, time of the last send)."""
+    async def one(j):
+        mine = events[j::connections]
+        async with websockets.connect(f"ws://localhost:{port}", max_queue=None) as ws:
+            async def read_oks():
+                accepted = rejected = 0
+                while accepted + rejected < len(mine):
+                    frame = json.loads(await ws.recv())
+                    if frame[0] == "OK":
+                        accepted += bool(frame[2])
+                        rejected += not frame[2]
+                return accepted, rejected
+
+            reader = asyncio.create_task(read_oks())
+            for i, event in enumerate(mine):
+                if rate is not None:
+                    delay = start + (j + i * connections) / rate - time.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                await ws.send(json.dumps(["EVENT", event]))
+            last_send = time.time()
+            return (*await reader, last_send)
+
+    results = await asyncio.gather(*(one(j) for j in range(connections)))
+    return sum(r[0] for r in results), sum(r[1] for r in results), max(r[2] for r in results)
+
+# -- relay process ------------------------------------------------------------
+
+def rss_bytes(pid):
+    """Resident memory of a process and its children (relay workers), or None without /proc."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            rss = next(int(line.split()[1]) * 1024 for line in f if line.startswith("VmRSS:"))
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            children = [int(child) for child in f.read().split()]
+    except (OSError, StopIteration):
+        return None
+    return rss + sum(rss_bytes(child) or 0 for child in children)
+
+def relay_gauges(web_port):
+    # With --workers the request reaches one worker, so these are that worker's numbers.
+    try:
+        with urllib.request.urlopen(f"http://localhost:{web_port}/metrics", timeout=5) as response:
+            text = response.read().decode()
+    except OSError:
+        return {}
+    gauges = {}
+    for line in text.splitlines():
+        name, _, value = line.partition(" ")
+        if name in ("relay_dropped_frames", "relay_connections", "relay_events_stored", "relay_frost_invalid_total"):
+            gauges[name] = float(value)
+    return gauges
+
+def run(args):
+    authors = [f"{i + 1:064x}" for i in range(args.authors)]
+    group = signing_group()
+    history = make_alerts(1, args.history, authors, group)
+    live = make_alerts(LIVE_BASE, int(args.rate * args.duration), authors, group)
+    subs = subscriptions(args.subscribers, live, authors, args.ids_per_sub, args.seed)
+
+    relay_args = ["--data-dir", args.data_dir, "--port", str(args.port), "--web-port", str(args.web_port),
+                  "--max-events", str(len(history) + len(live) + 10)]
+    if args.verify_frost:
+        relay_args += ["--verify-frost", "--frost-key", group[2]]
+    relay = subprocess.Popen([sys.executable, RELAY, *relay_args, *shlex.split(args.relay_args)],
+                             cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(args.port)
+        wait_for_port(args.web_port)
+        asyncio.run(send_all(args.port, history, args.publishers))
+        rss_before = rss_bytes(relay.pid)
+
+        procs = min(args.client_procs, max(1, len(subs)))
+        ready = multiprocessing.Barrier(procs + 1)
+        go = multiprocessing.Barrier(procs + 1)
+        start = multiprocessing.Value("d", 0.0)
+        results = multiprocessing.Queue()
+        window = args.duration + args.grace
+        clients = [multiprocessing.Process(target=client_process, args=(args.port, subs[i::procs], args.rate, window, start, ready, go, results))
+                   for i in range(procs)]
+        for c in clients:
+            c.start()
+        # Every subscriber has its EOSE once `ready` opens; the send schedule starts just after `go`.
+        ready.wait()
+        start.value = time.time() + 0.2
+        go.wait()
+        accepted, rejected, last_send = asyncio.run(send_all(args.port, live, args.publishers, args.rate, start.value))
+        collected = [results.get(timeout=window + 60) for _ in clients]
+        for c in clients:
+            c.join()
+        rss_after = rss_bytes(relay.pid)
+        gauges = relay_gauges(args.web_port)
+    finally:
+        relay.terminate()
+        relay.wait()
+
+    latencies = [latency for c in collected for latency in c["latencies"]]
+    expected = sum(c["expected"] for c in collected)
+    sending_s = max(last_send - start.value, 1e-9)
+    return {"config": {"subscribers": args.subscribers, "client_procs": procs, "filters": list(FILTER_KINDS),
+                       "history": len(history), "rate": args.rate, "duration_s": args.duration,
+                       "publishers": args.publishers, "verify_frost": args.verify_frost, "relay_args": args.relay_args},
+            "publish": {"alerts": len(live), "achieved_rate": round(len(live) / sending_s, 1),
+                        "accepted": accepted, "rejected": rejected},
+            "delivery": {"frames_expected": expected, "frames_received": len(latencies),
+                         "missed": expected - len(latencies), **percentiles(latencies)},
+            "eose": percentiles([eose for c in collected for eose in c["eose_s"]]),
+            "connections": {"failed_connects": sum(c["failed_connects"] for c in collected),
+                            "dropped": sum(c["dropped"] for c in collected)},
+            "relay": {"rss_before_mb": round(rss_before / 2 ** 20, 1) if rss_before else None,
+                      "rss_after_mb": round(rss_after / 2 ** 20, 1) if rss_after else None,
+                      "rss_growth_mb": round((rss_after - rss_before) / 2 ** 20, 1) if rss_before and rss_after else None,
+                      "events_stored": gauges.get("relay_events_stored"),
+                      "dropped_frames": gauges.get("relay_dropped_frames"),
+                      "frost_invalid": gauges.get("relay_frost_invalid_total")}}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subscribers", type=int, default=200)
+    parser.add_argument("--client-procs", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--rate", type=float, default=100.0, help="Alerts published per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of publishing")
+    parser.add_argument("--grace", type=float, default=5.0, help="Seconds subscribers keep waiting after the last scheduled alert")
+    parser.add_argument("--history", type=int, default=1000, help="Alerts stored before subscribers connect (replayed up to EOSE)")
+    parser.add_argument("--publishers", type=int, default=2)
+    parser.add_argument("--authors", type=int, default=10, help="Distinct event pubkeys; 'authors' subscribers follow one each")
+    parser.add_argument("--ids-per-sub", type=int, default=20, help="Live alert ids in each 'ids' subscriber's filter")
+    parser.add_argument("--verify-frost", action="store_true", help="Run the relay with --verify-frost against the test group's key")
+    parser.add_argument("--relay-args", type=str, default="", help='Extra own_relay.py arguments, e.g. "--workers 2 --queue-size 256"')
+    parser.add_argument("--data-dir", type=str, default="", help="Relay event log directory (default: memory only)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--port", type=int, default=20765)
+    parser.add_argument("--web-port", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args), indent=2))
@@ -0,0 +1,74 @@
+"""Restart time of own_relay.py's event log versus the number of stored events.
+
+For each count, writes that many synthetic events through EventLog, then times
+a cold `EventLog.open` (index-only replay) against reparsing every record's
+JSON, which is what a log without an index would have to do.
+
+    python benchmarks/relay_restart.py --counts 10000 100000
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from relay_store import EventStore
+from relay_log import EventLog, RECORD_HEADER
+
+def make_event(i):
+    return {"id": f"{i:064x}", "pubkey": f"{i % 50:064x}", "kind": 1, "created_at": 1_700_000_000 + i,
+            "tags": [], "content": f"FROST alert {i}", "sig": "0" * 128}
+
+def write_events(directory, count):
+    store = EventStore(max_events=count)
+    log = EventLog(directory, fsync_batch=4096)
+    log.open(store)
+    for i in range(count):
+        event = make_event(i)
+        entry = store.add(event)
+        entry.received_at = time.time()
+        log.append(entry, json.dumps(event).encode())
+    log.close()
+
+def time_open(directory, count):
+    store = EventStore(max_events=count)
+    log = EventLog(directory)
+    start = time.perf_counter()
+    log.open(store)
+    elapsed = time.perf_counter() - start
+    log.close()
+    assert len(store) == count
+    return elapsed
+
+def time_reparse(directory, count):
+    store = EventStore(max_events=count)
+    start = time.perf_counter()
+    for name in sorted(n for n in os.listdir(directory) if n.endswith(".log")):
+        with open(os.path.join(directory, name), "rb") as f:
+            while header := f.read(RECORD_HEADER.size):
+                length, _ = RECORD_HEADER.unpack(header)
+                store.add(json.loads(f.read(length)))
+    elapsed = time.perf_counter() - start
+    assert len(store) == count
+    return elapsed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    args = parser.parse_args()
+
+    results = []
+    for count in args.counts:
+        directory = tempfile.mkdtemp(prefix="relay_restart_")
+        try:
+            write_events(directory, count)
+            results.append({"events": count,
+                            "log_bytes": sum(os.path.getsize(os.path.join(directory, n)) for n in os.listdir(directory)),
+                            "open_s": round(time_open(directory, count), 4),
+                            "reparse_s": round(time_reparse(directory, count), 4)})
+        finally:
+            shutil.rmtree(directory)
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,148 @@
+"""Ingest throughput and alert latency of own_relay.py under a flood of forged alerts.
+
+Runs the relay in memory-only mode once without --verify-frost and once per
+--verify-batch size with it. Each round, `--flooders` connections pipeline `--forged` alerts whose FROST
+signature is well-formed but belongs to another message (so every one costs
+a full verification), while a probe connection sends `--genuine` correctly
+signed alerts one at a time and times each OK. Reports flood OKs per second,
+probe latency percentiles and how many alerts were stored and rejected.
+
+    python benchmarks/relay_verify_flood.py --forged 20000 --flooders 8 --verify-batch 64 256
+"""
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import statistics
+import subprocess
+
+import websockets
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import frostpy
+import frost_keyring
+import relay_verify
+
+RELAY = os.path.join(ROOT, "own_relay.py")
+
+def wait_for_port(port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("localhost", port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"relay did not open port {port}")
+
+def group():
+    keys = json.loads(frostpy.generate_keys_py(3, 2))
+    shares = json.dumps([share["share"] for share in keys["shares"][:2]])
+    return shares, keys["group_public_key"], keys["group_verifying_key"]
+
+def alert_event(i, message, signature_b64, fingerprint):
+    content = message + relay_verify.KEY_MARKER + fingerprint + relay_verify.SIGNATURE_MARKER + signature_b64
+    return {"id": f"{i:064x}", "pubkey": "ab" * 32, "kind": 1, "created_at": int(time.time()),
+            "tags": [], "content": content, "sig": "0" * 128}
+
+def make_alerts(count, first_id, shares, public_key_package, fingerprint, forged):
+    # Forged alerts reuse one real signature over a different message.
+    forged_signature = frostpy.sign_message_py("another message", shares, 2, public_key_package)[0] if forged else None
+    alerts = []
+    for i in range(count):
+        message = f"alert {first_id + i}"
+        signature = forged_signature or frostpy.sign_message_py(message, shares, 2, public_key_package)[0]
+        alerts.append(alert_event(first_id + i, message, signature, fingerprint))
+    return alerts
+
+async def flood(port, events, connections):
+    async def one(batch):
+        async with websockets.connect(f"ws://localhost:{port}", max_queue=None) as ws:
+            async def send():
+                for event in batch:
+                    await ws.send(json.dumps(["EVENT", event]))
+
+            sender = asyncio.create_task(send())
+            rejected = 0
+            for _ in batch:
+                rejected += not json.loads(await ws.recv())[2]
+            await sender
+            return rejected
+
+    return sum(await asyncio.gather(*(one(events[i::connections]) for i in range(connections))))
+
+async def probe(port, events, delay):
+    latencies = []
+    async with websockets.connect(f"ws://localhost:{port}") as ws:
+        for event in events:
+            await asyncio.sleep(delay)
+            start = time.perf_counter()
+            await ws.send(json.dumps(["EVENT", event]))
+            ok = json.loads(await ws.recv())
+            latencies.append(time.perf_counter() - start)
+            if not ok[2]:
+                raise RuntimeError(f"genuine alert rejected: {ok[3]}")
+    return latencies
+
+async def verified_count(port):
+    async with websockets.connect(f"ws://localhost:{port}", max_queue=None) as ws:
+        await ws.send(json.dumps(["REQ", "v", {"frost_verified": True}]))
+        count = 0
+        while json.loads(await ws.recv())[0] != "EOSE":
+            count += 1
+        return count
+
+async def flood_with_probe(port, forged, genuine, args):
+    probe_task = asyncio.create_task(probe(port, genuine, args.probe_interval))
+    start = time.perf_counter()
+    rejected = await flood(port, forged, args.flooders)
+    flood_s = time.perf_counter() - start
+    latencies = await probe_task
+    return rejected, flood_s, latencies
+
+def run(label, extra, round_number, forged, genuine, args):
+    port, web_port = args.port + round_number, args.web_port + round_number
+    relay = subprocess.Popen([sys.executable, RELAY, "--data-dir", "", "--port", str(port), "--web-port", str(web_port),
+                              "--max-events", str(len(forged) + len(genuine) + 10), *extra],
+                             cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(port)
+        rejected, flood_s, latencies = asyncio.run(flood_with_probe(port, forged, genuine, args))
+        ordered = sorted(latencies)
+        return {"mode": label, "forged": len(forged), "flooders": args.flooders,
+                "flood_oks_per_s": round(len(forged) / flood_s), "flood_s": round(flood_s, 3),
+                "forged_rejected": rejected, "verified_stored": asyncio.run(verified_count(port)),
+                "probe_p50_ms": round(statistics.median(ordered) * 1000, 3),
+                "probe_p95_ms": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1000, 3),
+                "probe_max_ms": round(ordered[-1] * 1000, 3)}
+    finally:
+        relay.terminate()
+        relay.wait()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--forged", type=int, default=10_000)
+    parser.add_argument("--genuine", type=int, default=100)
+    parser.add_argument("--flooders", type=int, default=4)
+    parser.add_argument("--probe-interval", type=float, default=0.01, help="Seconds between genuine alerts")
+    parser.add_argument("--verify-batch", type=int, nargs="+", default=[256], help="Batch sizes to try with verification on")
+    parser.add_argument("--verify-workers", type=int, default=2)
+    parser.add_argument("--port", type=int, default=19765)
+    parser.add_argument("--web-port", type=int, default=19000)
+    args = parser.parse_args()
+
+    shares, public_key_package, verifying_key = group()
+    fingerprint = frost_keyring.fingerprint(verifying_key)
+    genuine = make_alerts(args.genuine, 1, shares, public_key_package, fingerprint, forged=False)
+    forged = make_alerts(args.forged, 10_000_000, shares, public_key_package, fingerprint, forged=True)
+
+    rounds = [("off", [])]
+    rounds += [(f"verify/batch={batch}", ["--verify-frost", "--frost-key", verifying_key, "--verify-batch", str(batch),
+                                          "--verify-workers", str(args.verify_workers)])
+               for batch in args.verify_batch]
+    results = [run(label, extra, i, forged, genuine, args) for i, (label, extra) in enumerate(rounds)]
+    print(json.dumps(results, indent=2))
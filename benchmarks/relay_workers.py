@@ -0,0 +1,119 @@
+"""Fan-out throughput of own_relay.py with 1..N worker processes.
+
+For each worker count, starts the relay in memory-only mode, connects
+`--subscribers` WebSocket subscribers (spread over `--client-procs` client
+processes so the load generator is not the bottleneck), publishes `--events`
+events over `--publishers` connections, and reports how many EVENT frames per
+second reached the subscribers.
+
+    python benchmarks/relay_workers.py --workers 1 2 4 --subscribers 400 --events 500
+"""
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import subprocess
+import multiprocessing
+
+import websockets
+
+RELAY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "own_relay.py")
+
+def make_event(i):
+    return {"id": f"{i:064x}", "pubkey": "ab" * 32, "kind": 1, "created_at": int(time.time()),
+            "tags": [], "content": f"FROST alert {i}", "sig": "0" * 128}
+
+def wait_for_port(port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("localhost", port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"relay did not open port {port}")
+
+async def subscribe(port, count, expected, barrier):
+    async def one(sub_id):
+        ws = await websockets.connect(f"ws://localhost:{port}", max_queue=None)
+        await ws.send(json.dumps(["REQ", sub_id, {"kinds": [1]}]))
+        while json.loads(await ws.recv())[0] != "EOSE":
+            pass
+        return ws
+
+    sockets = await asyncio.gather(*(one(f"s{i}") for i in range(count)))
+    await asyncio.get_running_loop().run_in_executor(None, barrier.wait)
+
+    async def drain(ws):
+        received = 0
+        while received < expected:
+            if json.loads(await ws.recv())[0] == "EVENT":
+                received += 1
+        await ws.close()
+        return time.time()
+
+    return max(await asyncio.gather(*(drain(ws) for ws in sockets)))
+
+def client_process(port, count, expected, barrier, results):
+    results.put(asyncio.run(subscribe(port, count, expected, barrier)))
+
+async def publish(port, events, connections):
+    sockets = await asyncio.gather(*(websockets.connect(f"ws://localhost:{port}") for _ in range(connections)))
+
+    async def send(ws, batch):
+        for event in batch:
+            await ws.send(json.dumps(["EVENT", event]))
+            await ws.recv()  # OK
+
+    await asyncio.gather(*(send(ws, events[i::connections]) for i, ws in enumerate(sockets)))
+    for ws in sockets:
+        await ws.close()
+
+def run(workers, args, round_number):
+    port, web_port = args.port + round_number, args.web_port + round_number
+    relay = subprocess.Popen([sys.executable, RELAY, "--workers", str(workers), "--data-dir", "",
+                              "--port", str(port), "--web-port", str(web_port), "--queue-size", str(args.events + 10)],
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(port)
+        wait_for_port(web_port)
+        barrier = multiprocessing.Barrier(args.client_procs + 1)
+        results = multiprocessing.Queue()
+        per_proc = [args.subscribers // args.client_procs + (i < args.subscribers % args.client_procs) for i in range(args.client_procs)]
+        clients = [multiprocessing.Process(target=client_process, args=(port, n, args.events, barrier, results)) for n in per_proc]
+        for c in clients:
+            c.start()
+        barrier.wait()
+        start = time.time()
+        asyncio.run(publish(port, [make_event(round_number * 10_000_000 + i) for i in range(args.events)], args.publishers))
+        published = time.time()
+        finished = max(results.get(timeout=300) for _ in clients)
+        for c in clients:
+            c.join()
+        frames = args.subscribers * args.events
+        return {"workers": workers, "events": args.events, "subscribers": args.subscribers,
+                "publish_s": round(published - start, 3), "fanout_s": round(finished - start, 3),
+                "frames_per_s": round(frames / (finished - start))}
+    finally:
+        relay.terminate()
+        relay.wait()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--subscribers", type=int, default=200)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--publishers", type=int, default=4)
+    parser.add_argument("--client-procs", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--port", type=int, default=18765)
+    parser.add_argument("--web-port", type=int, default=18000)
+    args = parser.parse_args()
+
+    results = [run(workers, args, i) for i, workers in enumerate(args.workers)]
+    base = results[0]["frames_per_s"]
+    for r in results:
+        r["speedup"] = round(r["frames_per_s"] / base, 2)
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,250 @@
+"""Offline micro-benchmarks for frostpy and the on-disk stores.
+
+Covers key generation, signing, verification, the signature ledger, the
+message store (submit / sign-partial) as history grows, share file I/O, and
+the text versus binary key formats, and payload digest hashing.
+Every case runs in a throwaway working directory. Inputs (messages, sizes,
+history contents) come from a seeded RNG, so two runs time the same work;
+FROST's own randomness is not seeded.
+
+    python benchmarks/suite.py --output bench.json
+    python benchmarks/suite.py --only sign verify --compare bench.json
+
+Results are keyed by case name (e.g. "sign/signers=5/size=1024") so runs can
+be compared; --compare prints the median ratio per case and flags changes
+beyond --tolerance.
+"""
+import io
+import os
+import sys
+import json
+import time
+import base64
+import random
+import shutil
+import itertools
+import argparse
+import platform
+import statistics
+import tempfile
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import frostpy
+import cli
+import keygen
+import message_store
+import payload_digest
+import signature_ledger
+from sign_message import save_signature
+from verify_signature import read_signature
+
+DEFAULT_SEED = 204
+
+def measure(fn, repeat=5, number=1, setup=None):
+    """Run `fn` `number` times per round for `repeat` rounds; times are per call."""
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter() - start) / number)
+    return {"median_s": statistics.median(times), "min_s": min(times), "mean_s": statistics.fmean(times),
+            "repeat": repeat, "number": number}
+
+@contextlib.contextmanager
+def workdir():
+    """A fresh directory to run in, since the stores use paths relative to the CWD."""
+    previous = os.getcwd()
+    path = tempfile.mkdtemp(prefix="frost_bench_")
+    os.chdir(path)
+    try:
+        yield path
+    finally:
+        message_store.close()
+        os.chdir(previous)
+        shutil.rmtree(path)
+
+def quiet(fn):
+    # The CLI and store helpers print progress; keep the benchmark output clean.
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return fn()
+    return run
+
+def message_of(rng, size):
+    return "".join(rng.choice("abcdefghijklmnopqrstuvwxyz ") for _ in range(size))
+
+def key_material(n, t):
+    keys = json.loads(frostpy.generate_keys_py(n, t))
+    shares = [share["share"] for share in keys["shares"]]
+    return shares, keys["group_public_key"], keys["group_verifying_key"]
+
+# -- cases -----------------------------------------------------------------
+
+def bench_keygen(rng, quick):
+    sizes = [3, 16] if quick else [3, 16, 64, 128, 255]
+    for n in sizes:
+        for t in sorted({2, n // 2 + 1, n}):
+            yield f"keygen/n={n}/t={t}", measure(lambda: frostpy.generate_keys_py(n, t), repeat=3 if n > 64 else 5)
+
+def bench_sign(rng, quick):
+    for signers in ([2, 5] if quick else [2, 5, 10, 20]):
+        shares, pubkey_package, _ = key_material(signers, signers)
+        shares_json = json.dumps(shares)
+        for size in [32, 1024] if quick else [32, 1024, 65536]:
+            message = message_of(rng, size)
+            yield (f"sign/signers={signers}/size={size}",
+                   measure(lambda: frostpy.sign_message_py(message, shares_json, signers, pubkey_package)))
+
+def bench_verify(rng, quick):
+    shares, pubkey_package, verifying_key = key_material(3, 2)
+    message = message_of(rng, 256)
+    signature, _ = frostpy.sign_message_py(message, json.dumps(shares[:2]), 2, pubkey_package)
+    yield "verify/single", measure(lambda: frostpy.verify_signature_py(message, signature, verifying_key), repeat=20)
+    number = 100 if quick else 1000
+    yield f"verify/repeated={number}", measure(lambda: frostpy.verify_signature_py(message, signature, verifying_key), number=number)
+    # The same check through the str and the buffer entry points, on a payload large enough to show the copies.
+    payload = message_of(rng, 1 << 16)
+    signature, _ = frostpy.sign_message_py(payload, json.dumps(shares[:2]), 2, pubkey_package)
+    raw = memoryview(payload.encode())
+    raw_signature, raw_key = base64.b64decode(signature), base64.b64decode(verifying_key)
+    yield "verify/str/size=65536", measure(lambda: frostpy.verify_signature_py(payload, signature, verifying_key), repeat=20)
+    yield "verify/bytes/size=65536", measure(lambda: frostpy.verify_bytes_py(raw, raw_signature, raw_key), repeat=20)
+
+def history_sizes(quick):
+    return [10**2, 10**3] if quick else [10**2, 10**3, 10**4, 10**5]
+
+def bench_ledger(rng, quick):
+    for history in history_sizes(quick):
+        with workdir():
+            entries = [{"message": f"alert {i} {message_of(rng, 16)}", "signature": f"{rng.getrandbits(512):0128x}"}
+                       for i in range(history)]
+            signature_ledger.append_entries(entries)
+            probes = itertools.cycle([e["message"] for e in rng.sample(entries, min(100, history))])
+            counter = iter(range(10**9))
+            yield (f"ledger/save_signature/history={history}",
+                   measure(quiet(lambda: save_signature(f"{next(counter):0128x}", f"new alert {next(counter)}")), number=20))
+            yield (f"ledger/read_signature/history={history}",
+                   measure(quiet(lambda: read_signature(next(probes))), number=100))
+
+def bench_messages(rng, quick):
+    shares, pubkey_package, verifying_key = key_material(3, 3)
+    for history in history_sizes(quick):
+        with workdir():
+            for pid, share in enumerate(shares, start=1):
+                os.makedirs(os.path.join("keys", str(pid)))
+                with open(os.path.join("keys", str(pid), "secret_share.txt"), "w") as f:
+                    json.dump(share, f)
+            with message_store.transaction() as conn:
+                conn.executemany("INSERT INTO messages (message) VALUES (?)",
+                                 [(message_of(rng, 64),) for _ in range(history)])
+            yield (f"messages/submit/history={history}",
+                   measure(quiet(lambda: cli.submit_message(message_of(rng, 64))), number=20))
+            pending = iter(range(1, history + 1))
+            share_path = os.path.join("keys", "1", "secret_share.txt")
+            yield (f"messages/sign_partial/history={history}",
+                   measure(quiet(lambda: cli.sign_partial(next(pending), share_path)), number=10))
+
+def directory_bytes(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+def bench_keygen_files(rng, quick):
+    for n in ([3, 16] if quick else [3, 16, 64, 255]):
+        t = n // 2 + 1
+        for fmt in ("binary", "text", "stream"):
+            with workdir():
+                os.makedirs(keygen.KEYS_DIR)
+                result = measure(quiet(lambda: keygen.generate_and_store_shares(n, t, binary=fmt != "text", stream=fmt == "stream")),
+                                 repeat=3)
+                result["bytes"] = directory_bytes(keygen.KEYS_DIR)
+                yield f"keygen_files/format={fmt}/n={n}/t={t}", result
+
+def bench_formats(rng, quick):
+    """Parsing cost of each key file format, as paid on every cold load."""
+    for n in ([3, 64] if quick else [3, 64, 255]):
+        t = n // 2 + 1
+        shares, public_key_package_b64, verifying_key_b64 = key_material(n, t)
+        share_json = json.dumps(shares[0])
+        key_package = frostpy.KeyPackage.from_json(share_json)
+        public_key_package = frostpy.PublicKeyPackage.from_b64(public_key_package_b64)
+        share_bytes, package_bytes = key_package.to_bytes(), public_key_package.to_bytes()
+        yield f"formats/key_package/text/n={n}", measure(lambda: frostpy.KeyPackage.from_json(share_json), number=1000)
+        yield f"formats/key_package/binary/n={n}", measure(lambda: frostpy.KeyPackage.from_bytes(share_bytes), number=1000)
+        yield (f"formats/public_key_package/text/n={n}",
+               measure(lambda: frostpy.PublicKeyPackage.from_b64(public_key_package_b64), number=100))
+        yield (f"formats/public_key_package/binary/n={n}",
+               measure(lambda: frostpy.PublicKeyPackage.from_bytes(package_bytes), number=100))
+        yield f"formats/keygen/text/n={n}/t={t}", measure(lambda: frostpy.generate_keys_py(n, t), repeat=3)
+        yield f"formats/keygen/binary/n={n}/t={t}", measure(lambda: frostpy.generate_keys_bin_py(n, t), repeat=3)
+
+def bench_digest(rng, quick):
+    """Hashing a payload for sign --file / verify --file, by payload size."""
+    for mib in ([1, 16] if quick else [1, 16, 256]):
+        with workdir():
+            with open("payload.bin", "wb") as f:
+                block = rng.randbytes(1024 * 1024)
+                for _ in range(mib):
+                    f.write(block)
+            result = measure(lambda: payload_digest.file_digest("payload.bin"), repeat=3)
+            result["mib_per_s"] = mib / result["median_s"]
+            yield f"digest/file/size={mib}MiB", result
+
+BENCHMARKS = {
+    "keygen": bench_keygen,
+    "sign": bench_sign,
+    "verify": bench_verify,
+    "ledger": bench_ledger,
+    "messages": bench_messages,
+    "keygen_files": bench_keygen_files,
+    "formats": bench_formats,
+    "digest": bench_digest,
+}
+
+def compare(results, baseline, tolerance):
+    """Print median ratios against a previous run. Returns the names of regressed cases."""
+    regressed = []
+    for name, result in results.items():
+        old = baseline.get(name)
+        if old is None:
+            print(f"{name:55s} {'new':>10s}")
+            continue
+        ratio = result["median_s"] / old["median_s"] if old["median_s"] else float("inf")
+        verdict = "REGRESSION" if ratio > 1 + tolerance else "faster" if ratio < 1 - tolerance else ""
+        if verdict == "REGRESSION":
+            regressed.append(name)
+        print(f"{name:55s} {old['median_s'] * 1000:10.3f}ms -> {result['median_s'] * 1000:10.3f}ms  x{ratio:5.2f} {verdict}")
+    return regressed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, help="Run only these groups")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--quick", action="store_true", help="Smaller sizes, for a fast smoke run")
+    parser.add_argument("--output", help="Write results JSON to this file (default: stdout)")
+    parser.add_argument("--compare", help="Results JSON of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Relative median change reported as a regression")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    results = {}
+    for group in args.only or BENCHMARKS:
+        for name, result in BENCHMARKS[group](rng, args.quick):
+            results[name] = result
+            print(f"{name:55s} {result['median_s'] * 1000:10.3f}ms", file=sys.stderr)
+
+    report = {"meta": {"seed": args.seed, "quick": args.quick, "python": platform.python_version(),
+                       "platform": platform.platform(), "cpus": os.cpu_count(), "timestamp": time.time()},
+              "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)["results"]
+        sys.exit(1 if compare(results, baseline, args.tolerance) else 0)
@@ -1,48 +1,80 @@
 import argparse
 import sys
 import os
+import io
 import json
-from keygen import generate_and_store_shares
-from sign_message import sign_message, save_signature
-from verify_signature import verify_signature, read_signature, read_public_key
-
-KEYS_DIR = "keys"
-MESSAGES_FILE = "messages.txt"
-SIGNATURES_FILE = os.path.join(KEYS_DIR, "signatures.txt")
-LATEST_SIGNATURE_FILE = os.path.join(KEYS_DIR, "latest_signature.txt")
-
-def ensure_messages_file():
-    if not os.path.exists(MESSAGES_FILE):
-        with open(MESSAGES_FILE, "w") as f:
-            f.write("")
-
-def submit_message(message):
-    ensure_messages_file()
-    with open(MESSAGES_FILE, "r+") as f:
-        messages = [json.loads(line) for line in f if line.strip()]
-        new_id = max([m["id"] for m in messages], default=0) + 1
-        new_message = {"id": new_id, "message": message, "status": "pending", "signatures": []}
-        f.write(json.dumps(new_message) + "\n")
+import time
+import contextlib
+import subprocess
+import message_store
+import publisher
+import signature_ledger
+import metrics
+import payload_digest
+import frost_keyring
+from keygen import generate_and_store_shares, recover_staged_keys, DEFAULT_WRITE_WORKERS
+# sign_message and verify_signature load frostpy; they are imported by the commands that
+# need them, so list, submit and stats start without it.
+
+BATCH_OPS = ("submit", "sign-partial", "broadcast", "verify")
+DEFAULT_COMMIT_EVERY = 100
+
+def reject_statement(message):
+    # Keeps plain alerts and file digest signatures apart; see payload_digest.
+    if payload_digest.is_statement(message):
+        print(f" Messages may not start with '{payload_digest.STATEMENT_PREFIX.strip()}'; use --file to sign a file.")
+        return True
+    return False
+
+def install_staged_keys():
+    # A streamed generate that stopped after committing its key set is finished before any command loads keys.
+    if recover_staged_keys():
+        print(f" Installed the keys of an interrupted key generation for group '{frost_keyring.active()}'.")
+
+def submit_message(message, signers=None):
+    if reject_statement(message):
+        return
+    new_id = message_store.add_message(message)
     print(f" Message submitted: ID {new_id} - '{message}'")
+    # With preprocessed commitments the signing package is fixed now, so each signer needs one round.
+    # The group key's fingerprint (which may load frostpy for an unindexed group) is only needed to claim from a pool.
+    package = None
+    if message_store.pool_status():
+        fingerprint = frost_keyring.fingerprint_of()
+        package = message_store.claim_signing_package(new_id, signers, fingerprint)
+        if package is None and message_store.pool_status(fingerprint):
+            print(" Not enough preprocessed commitments for this message; signers will commit in sign-partial.")
+    if package is not None:
+        shares = [c["share"] for c in message_store.get_commitments(new_id)]
+        print(f" Signing package ready from preprocessed commitments. Signers: {', '.join(shares)}")
+    return {"id": new_id, "package_ready": package is not None}
+
+def preprocess(share_path, count):
+    from sign_message import preprocess_share, key_fingerprint
+    share_file = share_path.split("/")[-2]  # Participant ID, as in sign-partial
+    start = time.perf_counter()
+    result = preprocess_share(share_path, count)
+    if not result:
+        print(" Failed to preprocess commitments.")
+        return
+    key_package, commitments = result
+    available = message_store.add_pool_commitments(share_file, key_package.identifier, key_package.min_signers, commitments,
+                                                   key_fingerprint(key_package))
+    elapsed = time.perf_counter() - start
+    print(f" Share {share_file} published {len(commitments)} commitments in {elapsed:.3f}s. Unused in pool: {available}")
 
-def list_messages():
-    ensure_messages_file()
-    with open(MESSAGES_FILE, "r") as f:
-        messages = [json.loads(line) for line in f if line.strip()]
+def list_messages(status=None):
+    messages = list(message_store.list_messages(status))
     if not messages:
         print("No messages pending.")
         return
-    print("Pending Messages:")
+    print("Pending Messages:" if status in (None, "pending") else f"Messages ({status}):")
     for m in messages:
-        sig_count = len(m["signatures"])
-        print(f"ID {m['id']}: '{m['message']}' (Signatures: {sig_count})")
+        print(f"ID {m['id']}: '{m['message']}' (Signatures: {m['signature_count']})")
 
 def sign_partial(message_id, share_path):
-    ensure_messages_file()
-    with open(MESSAGES_FILE, "r") as f:
-        lines = f.readlines()
-    messages = [json.loads(line) for line in lines if line.strip()]
-    message = next((m for m in messages if m["id"] == message_id), None)
+    from sign_message import load_key_package, commit_share, sign_share
+    message = message_store.get_message(message_id)
     if not message or message["status"] != "pending":
         print(f" Message ID {message_id} not found or already processed.")
         return
@@ -51,14 +83,81 @@ def sign_partial(message_id, share_path):
     if any(sig["share"] == share_file for sig in message["signatures"]):
         print(f" Share {share_file} already signed this message.")
         return
+    key_package = load_key_package(share_path)
+    if not key_package:
+        return
+
+    # A signer outside a package that has stalled for SIGNING_PACKAGE_TIMEOUT re-plans it.
+    package = message_store.get_signing_package(message_id)
+    if package is not None and key_package.identifier not in package:
+        resign = message_store.release_signing_package(message_id, older_than=message_store.SIGNING_PACKAGE_TIMEOUT)
+        if resign is None:
+            print(f" Share {share_file} is not part of the signing package for message ID {message_id}. "
+                  f"If one of its signers is unavailable, run 'cli.py replan --id {message_id}'.")
+            return
+        report_replan(message_id, resign)
+        package = None
+
+    # Round 1: commit, unless submit already froze the package from preprocessed commitments.
+    # Otherwise the package is frozen once min_signers shares have committed.
+    if package is None and not message_store.has_commitment(message_id, share_file):
+        committed = commit_share(share_path)
+        if not committed:
+            return
+        count = message_store.add_commitment(message_id, share_file, *committed)
+        print(f" Share {share_file} committed to message ID {message_id}. Commitments: {count}/{key_package.min_signers}")
+        if count is not None and count >= key_package.min_signers:
+            package = message_store.freeze_signing_package(message_id, key_package.min_signers)
+    if package is None:
+        print(f" Waiting for {key_package.min_signers} commitments; run sign-partial again for this share once they are in.")
+        return {"id": message_id, "share": share_file, "waiting_for": key_package.min_signers}
+    if key_package.identifier not in package:
+        print(f" Share {share_file} is not part of the signing package for message ID {message_id}.")
+        return
+
+    # Round 2: this participant's signature share over the frozen package.
+    signed = sign_share(message["message"], share_path, package)
+    if not signed:
+        return
+    sig_count = message_store.add_signature(message_id, share_file, *signed)
+    if sig_count is None:
+        print(f" Share {share_file} already signed this message.")
+        return
+    # The nonce behind this signature share is gone; don't leave the share in an uncommitted batch.
+    message_store.checkpoint()
+    print(f" Share {share_file} signed message ID {message_id}. Total signatures: {sig_count}")
+    return {"id": message_id, "share": share_file, "signatures": sig_count}
 
-    message["signatures"].append({"share": share_file})
-    with open(MESSAGES_FILE, "w") as f:
-        for m in messages:
-            f.write(json.dumps(m) + "\n")
-    print(f" Share {share_file} signed message ID {message_id}. Total signatures: {len(message['signatures'])}")
+def report_replan(message_id, resign):
+    print(f" Released the signing package of message ID {message_id}; it is planned again from the participants who sign next.")
+    if resign:
+        print(f" Shares {', '.join(resign)} signed the old package and must run sign-partial again.")
+
+def replan(message_id, signers=None):
+    message = message_store.get_message(message_id)
+    if not message or message["status"] != "pending":
+        print(f" Message ID {message_id} not found or already processed.")
+        return
+    resign = message_store.release_signing_package(message_id)
+    if resign is None:
+        print(f" Message ID {message_id} has no signing package yet.")
+        return
+    report_replan(message_id, resign)
+    package = None
+    if signers:
+        # Straight back to a one-round package, from preprocessed commitments of the given signers.
+        package = message_store.claim_signing_package(message_id, signers, frost_keyring.fingerprint_of())
+        if package is not None:
+            shares = [c["share"] for c in message_store.get_commitments(message_id)]
+            print(f" Signing package ready from preprocessed commitments. Signers: {', '.join(shares)}")
+        else:
+            print(" Not enough preprocessed commitments from those signers; signers will commit in sign-partial.")
+    return {"id": message_id, "resign": resign, "package_ready": package is not None}
 
 def sign(message, threshold, share_paths):
+    from sign_message import sign_message, save_signature
+    if reject_statement(message):
+        return
     signature = sign_message(message, share_paths, threshold)
     if signature:
         print(f" Signature generated: {signature}")
@@ -66,27 +165,161 @@ def sign(message, threshold, share_paths):
     else:
         print(" Failed to sign the message.")
 
+def sign_batch(batch_file, threshold, share_paths):
+    try:
+        with open(batch_file, "r") as f:
+            messages = [json.loads(line)["message"] for line in f if line.strip()]
+    except Exception as e:
+        print(f" Error reading batch file {batch_file}: {e}")
+        return
+    if not messages:
+        print(f" No messages in {batch_file}.")
+        return
+    if any(reject_statement(m) for m in messages):
+        return
+    from sign_message import sign_messages
+
+    start = time.perf_counter()
+    signatures = sign_messages(messages, share_paths, threshold)
+    elapsed = time.perf_counter() - start
+    if signatures:
+        print(f" Signed {len(signatures)} messages in {elapsed:.3f}s.")
+    else:
+        print(" Failed to sign the batch.")
+
+def file_statement(path):
+    try:
+        with metrics.timer("digest.file"):
+            digest_hex, size = payload_digest.file_digest(path)
+    except OSError as e:
+        print(f" Error reading {path}: {e}")
+        return None
+    print(f" {path}: {size} bytes, sha256 {digest_hex}")
+    return payload_digest.statement(digest_hex), payload_digest.ledger_fields(path, digest_hex, size)
+
+def sign_file(path, threshold, share_paths):
+    # Only the short digest statement reaches frostpy and the ledger, never the payload.
+    result = file_statement(path)
+    if result is None:
+        return
+    message, fields = result
+    from sign_message import sign_message
+    signature = sign_message(message, share_paths, threshold, extra=fields)
+    if signature:
+        print(f" Signature generated: {signature}")
+    else:
+        print(" Failed to sign the file.")
+
+def verify_file(path):
+    result = file_statement(path)
+    if result is not None:
+        return verify(result[0])
+
 def verify(message):
-    signature = read_signature(message)  # Pass message to find the correct signature
-    public_key = read_public_key()
+    from verify_signature import verify_signature, read_signature_entry, load_verifying_key
+    entry = read_signature_entry(message)  # Pass message to find the correct signature
+    if not entry:
+        print(" Failed to load the signature or public key.")
+        return
+    signature = entry["signature"]
+    # The entry's key fingerprint picks the group; entries from before the keyring use the active group.
+    public_key = load_verifying_key(entry.get("fingerprint"))
     if signature and public_key:
+        if "group" in entry:
+            print(f" Signed by group '{entry['group']}'")
         is_valid = verify_signature(message, signature, public_key)
         if is_valid is not None:
             if is_valid:
                 print(" The signature is valid!")
             else:
                 print(" The signature is invalid.")
+            return {"message": message, "valid": is_valid}
         else:
             print(" Failed to verify the signature due to an error.")
     else:
         print(" Failed to load the signature or public key.")
 
+def verify_all():
+    from verify_signature import verify_signatures, read_public_key
+    # Each entry is checked under the key its fingerprint names, so one batch call covers every group.
+    public_key = None  # the active group's, for entries without a fingerprint
+    keys = {}  # fingerprint -> base64 verifying key, None when no indexed group has it
+    checks = []  # (message, batch entry), batch entry None for an unknown fingerprint
+    for e in signature_ledger.iter_entries():
+        fp = e.get("fingerprint")
+        if fp is None:
+            if public_key is None:
+                public_key = read_public_key()
+                if not public_key:
+                    print(" Failed to load the public key.")
+                    return
+            checks.append((e["message"], (e["message"], e["signature"])))
+            continue
+        if fp not in keys:
+            _, verifying_key = frost_keyring.verifying_key_for(fp)
+            keys[fp] = verifying_key.to_b64() if verifying_key is not None else None
+        checks.append((e["message"], (e["message"], e["signature"], keys[fp]) if keys[fp] else None))
+    if not checks:
+        print(" No signatures in the ledger.")
+        return
+
+    start = time.perf_counter()
+    batch = [entry for _, entry in checks if entry is not None]
+    results = verify_signatures(batch, public_key) if batch else []
+    elapsed = time.perf_counter() - start
+    if results is None:
+        print(" Failed to verify the signature ledger due to an error.")
+        return
+
+    outcomes = iter(results)
+    valid = unknown = 0
+    for message, entry in checks:
+        if entry is None:
+            unknown += 1
+            print(f" UNKNOWN '{message}' (no group has its key fingerprint)")
+            continue
+        is_valid = next(outcomes)
+        valid += is_valid
+        print(f" {'valid  ' if is_valid else 'INVALID'} '{message}'")
+    invalid = len(checks) - valid - unknown
+    rate = len(checks) / elapsed if elapsed > 0 else float("inf")
+    print(f" Verified {len(checks)} signatures in {elapsed:.3f}s ({rate:.0f}/s): "
+          f"{valid} valid, {invalid} invalid, {unknown} with an unknown key.")
+
+def list_groups():
+    groups = frost_keyring.groups()
+    if not groups:
+        print(" No groups yet. Run 'python cli.py [--group NAME] generate' first.")
+        return
+    for name, entry in sorted(groups.items()):
+        marker = "*" if name == frost_keyring.active() else " "
+        print(f" {marker} {name:20s} {entry['fingerprint']}  {entry['dir']}")
+
+def publish(message, signature):
+    # Prefer a running publisher.py (warm relay connections); fall back to a one-shot nostr.py.
+    fingerprint = frost_keyring.fingerprint_of()
+    with metrics.timer("publish.handoff"):
+        result = publisher.hand_off(message, signature, fingerprint)
+    if result is None:
+        # nostr.py records its own stages; the gap between this and theirs is process startup.
+        env = dict(os.environ, FROST_METRICS_T0=repr(time.time()))
+        with metrics.timer("publish.nostr_subprocess"):
+            # Relayed through print so it lands wherever this command's output goes (batch captures it).
+            completed = subprocess.run([sys.executable, "nostr.py", "--group", frost_keyring.active()], env=env,
+                                       stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        print(completed.stdout, end="")
+    elif result["ok"]:
+        print(f" Nostr Event ID: {result['event_id']}")
+        print(f" Sent to: {result['sent']}")
+        if result["failed"]:
+            print(f" Not sent to: {result['failed']}")
+    else:
+        print(f" Publisher error: {result['error']}")
+
 def broadcast(message_id, threshold):
-    ensure_messages_file()
-    with open(MESSAGES_FILE, "r") as f:
-        lines = f.readlines()
-    messages = [json.loads(line) for line in lines if line.strip()]
-    message = next((m for m in messages if m["id"] == message_id), None)
+    from sign_message import sign_message, save_signature, aggregate_signature
+    with metrics.timer("broadcast.load_message"):
+        message = message_store.get_message(message_id)
     if not message or message["status"] != "pending":
         print(f" Message ID {message_id} not found or already broadcasted.")
         return
@@ -96,64 +329,193 @@ def broadcast(message_id, threshold):
         print(f" Insufficient signatures: {sig_count}/{threshold}.")
         return
 
-    share_paths = [os.path.join(KEYS_DIR, sig["share"], "secret_share.txt") for sig in message["signatures"]]
-    signature = sign_message(message["message"], share_paths, threshold)
+    package = message_store.get_signing_package(message_id)
+    signature_shares = {sig["identifier"]: sig["signature_share"] for sig in message["signatures"] if sig["signature_share"]}
+    if package is not None and set(package) <= set(signature_shares):
+        # Every signer already did its round 2 in sign-partial; only aggregation is left.
+        signature = aggregate_signature(message["message"], package, {i: signature_shares[i] for i in package})
+    else:
+        # Approvals recorded before signature shares existed: sign with the approvers' shares here.
+        share_paths = [frost_keyring.key_path(sig["share"], "secret_share.txt") for sig in message["signatures"]]
+        signature = sign_message(message["message"], share_paths, threshold)
     if signature:
-        message["status"] = "broadcasted"
-        with open(MESSAGES_FILE, "w") as f:
-            for m in messages:
-                f.write(json.dumps(m) + "\n")
+        with metrics.timer("broadcast.set_status"):
+            message_store.set_status(message_id, "broadcasted")
+            message_store.checkpoint()  # committed before the alert leaves this process
         save_signature(signature, message["message"])
         print(f" Message ID {message_id} signed and ready for Nostr broadcast.")
-        os.system("python nostr.py")  # Run nostr.py to broadcast
+        publish(message["message"], signature)
+        return {"id": message_id, "signature": signature}
     else:
         print(" Failed to finalize signature.")
 
+def run_batch_op(op):
+    name = op["op"]
+    if name == "submit":
+        return submit_message(op["message"], op.get("signers"))
+    if name == "sign-partial":
+        return sign_partial(int(op["id"]), op["share"])
+    if name == "broadcast":
+        return broadcast(int(op["id"]), int(op["threshold"]))
+    return verify_file(op["file"]) if "file" in op else verify(op["message"])
+
+def run_batch(source, out, commit_every=DEFAULT_COMMIT_EVERY):
+    """Run JSONL operations in this process, writing one JSONL result per operation to `out`.
+    Keys, the signing library and the store connection are loaded once for the whole stream,
+    and store writes are committed every `commit_every` operations rather than one by one."""
+    done = failed = 0
+    start = time.perf_counter()
+    with message_store.batch():
+        for number, line in enumerate(source, 1):
+            if not line.strip():
+                continue
+            output = io.StringIO()
+            record = {"line": number}
+            try:
+                op = json.loads(line)
+                record["op"] = op.get("op")
+                if record["op"] not in BATCH_OPS:
+                    raise ValueError(f"unknown op {record['op']!r}; expected one of {', '.join(BATCH_OPS)}")
+                with contextlib.redirect_stdout(output), metrics.timer(f"batch.{record['op']}"):
+                    result = run_batch_op(op)
+                record.update(ok=result is not None, result=result)
+            except Exception as e:
+                record.update(ok=False, error=f"{type(e).__name__}: {e}")
+            record["output"] = [text.strip() for text in output.getvalue().splitlines() if text.strip()]
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            done += 1
+            failed += not record["ok"]
+            if done % commit_every == 0:
+                message_store.checkpoint()
+    elapsed = time.perf_counter() - start
+    rate = done / elapsed if elapsed > 0 else float("inf")
+    print(f" Ran {done} operations in {elapsed:.3f}s ({rate:.0f}/s): {done - failed} ok, {failed} failed.", file=sys.stderr)
+
+def stats(last, command=None):
+    runs = metrics.load_runs(last, command)
+    if not runs:
+        print(f" No recorded runs in {metrics.METRICS_FILE}.")
+        return
+    print(f" Per-stage timings over the last {len(runs)} runs{f' of {command}' if command else ''}:")
+    print(f" {'stage':42s} {'runs':>5s} {'mean ms':>10s} {'p50 ms':>10s} {'p95 ms':>10s} {'max ms':>10s}")
+    for stage, s in metrics.summarize(runs).items():
+        print(f" {stage:42s} {s['runs']:5d} {s['mean_ms']:10.3f} {s['p50_ms']:10.3f} {s['p95_ms']:10.3f} {s['max_ms']:10.3f}")
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Emergency Broadcast System CLI using FROST")
+    parser.add_argument("--group", type=str, default=frost_keyring.DEFAULT_GROUP, help="Key group (panel) to use; each has its own keys and message queue")
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
 
     generate_parser = subparsers.add_parser("generate", help="Generate keys and shares")
     generate_parser.add_argument("--n", type=int, required=True, help="Number of participants")
     generate_parser.add_argument("--t", type=int, required=True, help="Signing threshold")
+    generate_parser.add_argument("--format", choices=["binary", "text"], default="binary", help="Key file format (text is the legacy JSON/base64 layout)")
+    generate_parser.add_argument("--stream", action="store_true", help="Stream binary shares to disk as they are generated, with a progress report (for large panels)")
+    generate_parser.add_argument("--write-workers", type=int, default=DEFAULT_WRITE_WORKERS, help="Threads writing share files in --stream mode")
 
     submit_parser = subparsers.add_parser("submit", help="Submit a new emergency message")
     submit_parser.add_argument("--message", type=str, required=True, help="Emergency message")
+    submit_parser.add_argument("--signers", nargs="+", help="Participant IDs to take preprocessed commitments from (default: any)")
+
+    preprocess_parser = subparsers.add_parser("preprocess", help="Publish commitments ahead of time so signing needs one round")
+    preprocess_parser.add_argument("--share", type=str, required=True, help="Path to share file (e.g., keys/1/secret_share.txt, keys/groups/<group>/1/secret_share.txt)")
+    preprocess_parser.add_argument("--count", type=int, default=100, help="Number of nonce/commitment pairs to generate")
 
     list_parser = subparsers.add_parser("list", help="List pending messages")
+    list_parser.add_argument("--status", type=str, help="Only show messages with this status (e.g., pending, broadcasted)")
 
     sign_partial_parser = subparsers.add_parser("sign-partial", help="Sign a message with a share")
     sign_partial_parser.add_argument("--id", type=int, required=True, help="Message ID to sign")
-    sign_partial_parser.add_argument("--share", type=str, required=True, help="Path to share file (e.g., keys/1/secret_share.txt)")
+    sign_partial_parser.add_argument("--share", type=str, required=True, help="Path to share file (e.g., keys/1/secret_share.txt, keys/groups/<group>/1/secret_share.txt)")
+
+    replan_parser = subparsers.add_parser("replan", help="Release a message's signing package when one of its signers is unavailable")
+    replan_parser.add_argument("--id", type=int, required=True, help="Message ID whose signing package to re-plan")
+    replan_parser.add_argument("--signers", nargs="+", help="Participant IDs to claim preprocessed commitments from for the new package")
 
     sign_parser = subparsers.add_parser("sign", help="Sign a message with participant shares")
-    sign_parser.add_argument("--message", type=str, required=True, help="Message to sign")
+    sign_target = sign_parser.add_mutually_exclusive_group(required=True)
+    sign_target.add_argument("--message", type=str, help="Message to sign")
+    sign_target.add_argument("--batch-file", type=str, help='JSONL file with one {"message": ...} object per line')
+    sign_target.add_argument("--file", type=str, help="Sign the SHA-256 digest of a file (for large payloads)")
     sign_parser.add_argument("--threshold", type=int, required=True, help="Threshold for signing")
     sign_parser.add_argument("--shares", nargs="+", required=True, help="Paths to share files")
 
     verify_parser = subparsers.add_parser("verify", help="Verify a signature")
-    verify_parser.add_argument("--message", type=str, required=True, help="Message to verify")
+    verify_target = verify_parser.add_mutually_exclusive_group(required=True)
+    verify_target.add_argument("--message", type=str, help="Message to verify")
+    verify_target.add_argument("--all", action="store_true", help="Re-verify every signature in the ledger")
+    verify_target.add_argument("--file", type=str, help="Verify the digest signature of a file signed with sign --file")
 
     broadcast_parser = subparsers.add_parser("broadcast", help="Finalize and broadcast a message")
     broadcast_parser.add_argument("--id", type=int, required=True, help="Message ID to broadcast")
     broadcast_parser.add_argument("--threshold", type=int, required=True, help="Threshold for signing")
 
+    stats_parser = subparsers.add_parser("stats", help="Show per-stage timings of recent runs")
+    stats_parser.add_argument("--last", type=int, default=50, help="Number of recent runs to summarize")
+    stats_parser.add_argument("--run", type=str, help="Only runs of this command (e.g., broadcast, sign-partial, nostr, publisher)")
+
+    subparsers.add_parser("groups", help="List key groups and their verifying-key fingerprints")
+
+    batch_parser = subparsers.add_parser("batch", help="Run a JSONL stream of submit/sign-partial/broadcast/verify operations in one process")
+    batch_parser.add_argument("--input", type=str, default="-", help='JSONL file of operations, e.g. {"op": "sign-partial", "id": 1, "share": "keys/1/secret_share.txt"} (default: stdin)')
+    batch_parser.add_argument("--output", type=str, default="-", help="Where to write one JSONL result per operation (default: stdout)")
+    batch_parser.add_argument("--commit-every", type=int, default=DEFAULT_COMMIT_EVERY, help="Operations per message store commit")
+
     args = parser.parse_args()
+    started = time.perf_counter()
+    try:
+        frost_keyring.select(args.group)
+    except ValueError as e:
+        parser.error(str(e))
+    install_staged_keys()
 
     if args.command == "generate":
-        generate_and_store_shares(args.n, args.t)
+        if args.stream and args.format != "binary":
+            parser.error("--stream writes binary key files; drop --format text")
+        generate_and_store_shares(args.n, args.t, binary=args.format == "binary",
+                                  stream=args.stream, workers=args.write_workers)
     elif args.command == "submit":
-        submit_message(args.message)
+        submit_message(args.message, args.signers)
+    elif args.command == "preprocess":
+        preprocess(args.share, args.count)
     elif args.command == "list":
-        list_messages()
+        list_messages(args.status)
     elif args.command == "sign-partial":
         sign_partial(args.id, args.share)
+    elif args.command == "replan":
+        replan(args.id, args.signers)
     elif args.command == "sign":
-        sign(args.message, args.threshold, args.shares)
+        if args.batch_file:
+            sign_batch(args.batch_file, args.threshold, args.shares)
+        elif args.file:
+            sign_file(args.file, args.threshold, args.shares)
+        else:
+            sign(args.message, args.threshold, args.shares)
     elif args.command == "verify":
-        verify(args.message)
+        if args.all:
+            verify_all()
+        elif args.file:
+            verify_file(args.file)
+        else:
+            verify(args.message)
     elif args.command == "broadcast":
         broadcast(args.id, args.threshold)
+    elif args.command == "stats":
+        stats(args.last, args.run)
+    elif args.command == "groups":
+        list_groups()
+    elif args.command == "batch":
+        if args.commit_every < 1:
+            parser.error("--commit-every must be at least 1")
+        with contextlib.ExitStack() as files:
+            source = sys.stdin if args.input == "-" else files.enter_context(open(args.input, "r"))
+            out = sys.stdout if args.output == "-" else files.enter_context(open(args.output, "w"))
+            run_batch(source, out, args.commit_every)
     else:
         parser.print_help()
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
+
+    if args.command not in ("stats", "groups"):
+        metrics.observe(f"{args.command}.total", time.perf_counter() - started)
+        metrics.flush(args.command)
\ No newline at end of file
@@ -0,0 +1,40 @@
+"""Advisory inter-process locks on lock files, through fcntl.flock.
+
+A lock belongs to the open file, so it is released when the holder closes it
+or exits, crashed or not: a lock that can be taken has no live owner. Where
+flock is unavailable (Windows) the locks are no-ops and every attempt
+succeeds, which is only safe with a single writer at a time.
+"""
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+@contextmanager
+def locked(path, shared=False, blocking=True):
+    """Hold a lock on `path` (created if missing) for the block; shared locks exclude only
+    exclusive ones. Without `blocking`, yields False instead of waiting for another holder."""
+    with open(path, "a+b") as f:
+        if fcntl is None:
+            yield True
+            return
+        flags = (fcntl.LOCK_SH if shared else fcntl.LOCK_EX) | (0 if blocking else fcntl.LOCK_NB)
+        try:
+            fcntl.flock(f.fileno(), flags)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+def is_held(path):
+    """True while another process holds a lock on `path`."""
+    if not os.path.exists(path):
+        return False
+    with locked(path, blocking=False) as acquired:
+        return not acquired
@@ -0,0 +1,153 @@
+"""Many FROST groups (panels) side by side, with an on-disk index.
+
+The default group keeps the original layout directly in keys/ (shares in
+keys/<id>/, public_key and public_key_package files, messages.db in the
+working directory). Every other group lives in keys/groups/<name>/ with the
+same files, its own messages.db and latest_signature.txt included. The
+signature ledger stays shared in keys/; each entry names the group and its
+verifying-key fingerprint.
+
+keys/keyring.json maps group names to their directory and fingerprint, and
+fingerprints back to group names, so the key for a signature is found with
+one dict lookup. The index is re-read only when the file changes; key
+material itself is loaded (and cached by key_cache) only for the groups a
+command actually touches. Entry points call `select(group)` once, from
+their --group option, before touching any keys.
+"""
+import os
+import re
+import json
+import base64
+import hashlib
+import key_cache
+
+KEYS_DIR = "keys"
+GROUPS_DIR = os.path.join(KEYS_DIR, "groups")
+INDEX_FILE = os.path.join(KEYS_DIR, "keyring.json")
+DEFAULT_GROUP = "default"
+DEFAULT_MESSAGES_DB = "messages.db"
+GROUP_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]*$")
+STAGING_SUFFIX = ".staging"  # keygen's in-progress copy of a group directory
+
+_active = DEFAULT_GROUP
+_index = None  # (stamp, index) of the last INDEX_FILE read
+
+def validate(group):
+    if not GROUP_NAME.match(group):
+        raise ValueError(f"Invalid group name '{group}': use letters, digits, '.', '_' and '-'")
+    return group
+
+def select(group):
+    """Make `group` the one used by every path and key lookup that doesn't name a group."""
+    global _active
+    _active = validate(group or DEFAULT_GROUP)
+
+def active():
+    return _active
+
+def group_dir(group=None):
+    group = group or _active
+    return KEYS_DIR if group == DEFAULT_GROUP else os.path.join(GROUPS_DIR, validate(group))
+
+def key_path(*parts, group=None):
+    """A file in the group's key directory, e.g. key_path("public_key.txt")."""
+    return os.path.join(group_dir(group), *parts)
+
+def messages_db(group=None):
+    group = group or _active
+    return DEFAULT_MESSAGES_DB if group == DEFAULT_GROUP else key_path("messages.db", group=group)
+
+def fingerprint(verifying_key_b64):
+    """Short, stable id of a group verifying key: the first 16 bytes of its SHA-256, in hex."""
+    return hashlib.sha256(base64.b64decode(verifying_key_b64)).hexdigest()[:32]
+
+# -- index -------------------------------------------------------------------
+
+def _empty_index():
+    return {"version": 1, "groups": {}, "fingerprints": {}}
+
+def load_index():
+    global _index
+    try:
+        stat = os.stat(INDEX_FILE)
+    except FileNotFoundError:
+        return rebuild_index()
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    if _index is None or _index[0] != stamp:
+        with open(INDEX_FILE, "r") as f:
+            _index = (stamp, json.load(f))
+    return _index[1]
+
+def _write_index(index):
+    global _index
+    os.makedirs(KEYS_DIR, exist_ok=True)
+    tmp_path = INDEX_FILE + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_path, INDEX_FILE)
+    stat = os.stat(INDEX_FILE)
+    _index = ((stat.st_mtime_ns, stat.st_size), index)
+
+def _add(index, group):
+    verifying_key = key_cache.load_verifying_key(key_path("public_key.txt", group=group))
+    fp = fingerprint(verifying_key.to_b64())
+    old = index["groups"].get(group)
+    if old is not None:
+        index["fingerprints"].pop(old["fingerprint"], None)
+    index["groups"][group] = {"dir": group_dir(group), "fingerprint": fp}
+    index["fingerprints"][fp] = group
+    return fp
+
+def register(group=None):
+    """Index the group's current verifying key (after keygen). Returns its fingerprint."""
+    group = group or _active
+    index = load_index()
+    fp = _add(index, group)
+    _write_index(index)
+    return fp
+
+def rebuild_index():
+    """Scan keys/ and keys/groups/ for groups with a public key and rewrite the index."""
+    index = _empty_index()
+    candidates = [DEFAULT_GROUP]
+    if os.path.isdir(GROUPS_DIR):
+        candidates += sorted(name for name in os.listdir(GROUPS_DIR)
+                             if GROUP_NAME.match(name) and not name.endswith(STAGING_SUFFIX))
+    for group in candidates:
+        if key_cache.key_file_exists(key_path("public_key.txt", group=group)):
+            _add(index, group)
+    _write_index(index)
+    return index
+
+def groups():
+    """{group: {"dir", "fingerprint"}} for every indexed group."""
+    return load_index()["groups"]
+
+def group_for_fingerprint(fp):
+    """The group whose verifying key has this fingerprint, or None."""
+    group = load_index()["fingerprints"].get(fp)
+    if group is None:
+        # Keys generated or copied in without going through keygen: rescan once.
+        group = rebuild_index()["fingerprints"].get(fp)
+    return group
+
+def fingerprint_of(group=None):
+    """Fingerprint of the group's verifying key, indexing the group if needed; None without keys."""
+    group = group or _active
+    entry = load_index()["groups"].get(group)
+    if entry is not None and entry["dir"] == group_dir(group):
+        return entry["fingerprint"]
+    if not key_cache.key_file_exists(key_path("public_key.txt", group=group)):
+        return None
+    return register(group)
+
+def verifying_key(group=None):
+    """The group's frostpy.VerifyingKey, loaded on first use."""
+    return key_cache.load_verifying_key(key_path("public_key.txt", group=group))
+
+def verifying_key_for(fp):
+    """(group, VerifyingKey) for a fingerprint, or (None, None) if no indexed group has it."""
+    group = group_for_fingerprint(fp)
+    if group is None:
+        return None, None
+    return group, verifying_key(group)
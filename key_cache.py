@@ -0,0 +1,54 @@
+import os
+from collections import OrderedDict
+
+# Parsed key handles keyed by (path, kind); an entry is reused only while the
+# file's mtime and size are unchanged, so regenerated keys are picked up.
+MAX_ENTRIES = 256
+_cache = OrderedDict()
+
+def binary_path(path):
+    """The binary-format sibling of a legacy text key file, e.g. secret_share.bin."""
+    return os.path.splitext(path)[0] + ".bin"
+
+def key_file_exists(path):
+    return os.path.exists(binary_path(path)) or os.path.exists(path)
+
+def _load(path, kind, parse, mode="r"):
+    stat = os.stat(path)
+    key = (os.path.abspath(path), kind)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _cache.get(key)
+    if cached is not None and cached[0] == stamp:
+        _cache.move_to_end(key)
+        return cached[1]
+    with open(path, mode) as f:
+        value = parse(f.read())
+    _cache[key] = (stamp, value)
+    _cache.move_to_end(key)
+    while len(_cache) > MAX_ENTRIES:
+        _cache.popitem(last=False)
+    return value
+
+# Each loader takes the legacy text path and prefers its .bin sibling when one exists.
+# frostpy is imported on first load, so importing this module stays cheap.
+
+def load_key_package(path):
+    import frostpy
+    if os.path.exists(binary_path(path)):
+        return _load(binary_path(path), "key_package", frostpy.KeyPackage.from_bytes, "rb")
+    return _load(path, "key_package", frostpy.KeyPackage.from_json)
+
+def load_public_key_package(path):
+    import frostpy
+    if os.path.exists(binary_path(path)):
+        return _load(binary_path(path), "public_key_package", frostpy.PublicKeyPackage.from_bytes, "rb")
+    return _load(path, "public_key_package", frostpy.PublicKeyPackage.from_b64)
+
+def load_verifying_key(path):
+    import frostpy
+    if os.path.exists(binary_path(path)):
+        return _load(binary_path(path), "verifying_key", frostpy.VerifyingKey.from_bytes, "rb")
+    return _load(path, "verifying_key", frostpy.VerifyingKey.from_b64)
+
+def clear():
+    _cache.clear()
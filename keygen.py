@@ -1,41 +1,97 @@
 import os
 import json
-from frostpy import generate_keys_py
+import time
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+import key_cache
+import file_lock
+import frost_keyring
 
-KEYS_DIR = "keys"
+KEYS_DIR = frost_keyring.KEYS_DIR  # the default group's directory; see frost_keyring.group_dir()
+COMMIT_MARKER = "COMMITTED"
+DEFAULT_WRITE_WORKERS = 8
+PROGRESS_INTERVAL = 1.0  # seconds between progress lines
 
 def ensure_dir(path):
     os.makedirs(path, exist_ok=True)
 
+def staging_dir():
+    # Streamed key files are written here and only moved into the group's directory once all are on disk.
+    return frost_keyring.group_dir() + frost_keyring.STAGING_SUFFIX
+
+def staging_lock():
+    # Held by a generation from start to finish; a staging directory whose lock is free has no live writer.
+    return staging_dir() + ".lock"
+
+def remove_stale_shares(keep):
+    """Delete participant directories (keys/<id>/) left over from an earlier, larger group."""
+    group = frost_keyring.group_dir()
+    for name in os.listdir(group):
+        if name.isdigit() and name not in keep and os.path.isdir(os.path.join(group, name)):
+            shutil.rmtree(os.path.join(group, name))
+            print(f" Removed share directory of former participant {name}")
+
+def write_key_file(name, data):
+    """Write `name`.bin for bytes or `name`.txt for text, and remove the file in the other
+    format so a reader never picks up keys from an older generation."""
+    binary = isinstance(data, bytes)
+    file_path = name + (".bin" if binary else ".txt")
+    with open(file_path, "wb" if binary else "w") as f:
+        f.write(data)
+    stale = name + (".txt" if binary else ".bin")
+    if os.path.exists(stale):
+        os.remove(stale)
+    return file_path
+
 def save_share(participant_id, encoded_share):
-    dir_path = os.path.join(KEYS_DIR, f"{participant_id}")
+    dir_path = frost_keyring.key_path(f"{participant_id}")
     ensure_dir(dir_path)
-    file_path = os.path.join(dir_path, "secret_share.txt")
-    with open(file_path, "w") as f:
-        f.write(encoded_share)
+    file_path = write_key_file(os.path.join(dir_path, "secret_share"), encoded_share)
     print(f" Saved share for participant {participant_id} → {file_path}")
 
 def save_public_key_package(public_key_package):
-    file_path = os.path.join(KEYS_DIR, "public_key_package.txt")
     try:
-        with open(file_path, "w") as f:
-            f.write(public_key_package)
+        file_path = write_key_file(frost_keyring.key_path("public_key_package"), public_key_package)
         print(f" Group public key package saved → {file_path}")
     except Exception as e:
         print(f" Error saving public key package: {e}")
 
 def save_group_public_key(group_verifying_key):
-    file_path = os.path.join(KEYS_DIR, "public_key.txt")
     try:
-        with open(file_path, "w") as f:
-            f.write(group_verifying_key)
+        file_path = write_key_file(frost_keyring.key_path("public_key"), group_verifying_key)
         print(f" Group verifying key saved → {file_path}")
     except Exception as e:
         print(f" Error saving group verifying key: {e}")
 
-def generate_and_store_shares(n: int, t: int):
-    print(f" Generating {n} FROST shares with threshold {t}...")
+def register_group():
     try:
+        fp = frost_keyring.register()
+        print(f" Group '{frost_keyring.active()}' indexed with key fingerprint {fp}")
+    except Exception as e:
+        print(f" Error indexing group '{frost_keyring.active()}': {e}")
+
+def generate_and_store_shares(n: int, t: int, binary: bool = True, stream: bool = False,
+                              workers: int = DEFAULT_WRITE_WORKERS):
+    print(f" Generating {n} FROST shares with threshold {t} for group '{frost_keyring.active()}'...")
+    ensure_dir(frost_keyring.group_dir())
+    with file_lock.locked(staging_lock(), blocking=False) as acquired:
+        if not acquired:
+            print(f" Another key generation for group '{frost_keyring.active()}' is running; try again once it has finished.")
+            return
+        # Complete or roll back a streamed generation that was interrupted, before writing new keys.
+        _recover_staged()
+        if stream:
+            generate_and_store_streaming(n, t, workers)
+        elif binary:
+            generate_and_store_binary(n, t)
+        else:
+            generate_and_store_text(n, t)
+        if key_cache.key_file_exists(frost_keyring.key_path("public_key.txt")):
+            register_group()
+
+def generate_and_store_text(n: int, t: int):
+    try:
+        from frostpy import generate_keys_py
         raw_json = generate_keys_py(n, t)
     except Exception as e:
         print(f" Error during key generation: {e}")
@@ -56,10 +112,138 @@ def generate_and_store_shares(n: int, t: int):
     for share in shares:
         pid = share["participant_id"]
         encoded = json.dumps(share["share"])
-        print(f" Debug: Saving share for participant ID {pid}")
         save_share(pid, encoded)
+    remove_stale_shares({str(share["participant_id"]) for share in shares})
+
+    print(" All shares and public key package generated and saved successfully.")
+
+def generate_and_store_binary(n: int, t: int):
+    """Like the text path, but frostpy returns the files' bytes directly."""
+    try:
+        from frostpy import generate_keys_bin_py
+        shares, public_key_package, group_verifying_key = generate_keys_bin_py(n, t)
+    except Exception as e:
+        print(f" Error during key generation: {e}")
+        return
+
+    save_public_key_package(public_key_package)
+    save_group_public_key(group_verifying_key)
+    for pid, share in shares:
+        save_share(pid, share)
+    remove_stale_shares({str(pid) for pid, _ in shares})
 
     print(" All shares and public key package generated and saved successfully.")
 
+def _write_durable(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(data)
+
+def _fsync_dir(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def recover_staged_keys():
+    """Finish or discard a streamed generation that was interrupted.
+
+    A staging directory with a commit marker holds a complete key set and is moved into
+    the group's directory (again, if a previous move stopped halfway); without the marker it
+    is partial and is deleted, leaving the previous keys untouched. Nothing is touched while
+    a live generation holds the staging lock. cli.py runs this at startup, so every
+    command sees a whole key set. Returns True if keys were installed.
+    """
+    if not os.path.isdir(staging_dir()):
+        return False
+    with file_lock.locked(staging_lock(), blocking=False) as acquired:
+        return acquired and _recover_staged()
+
+def _recover_staged():
+    # The caller holds the staging lock.
+    staging = staging_dir()
+    if not os.path.isdir(staging):
+        return False
+    if not os.path.exists(os.path.join(staging, COMMIT_MARKER)):
+        shutil.rmtree(staging)
+        print(" Discarded an incomplete key generation.")
+        return False
+    for root, _, names in os.walk(staging):
+        for name in names:
+            if name == COMMIT_MARKER or not name.endswith(".bin"):
+                continue
+            staged = os.path.join(root, name)
+            target = os.path.join(frost_keyring.group_dir(), os.path.relpath(staged, staging))
+            ensure_dir(os.path.dirname(target))
+            os.replace(staged, target)
+            stale = target[:-len(".bin")] + ".txt"
+            if os.path.exists(stale):
+                os.remove(stale)
+    # Participant directories stay in staging until the end, so a repeated move still knows the new group.
+    remove_stale_shares({name for name in os.listdir(staging) if name.isdigit()})
+    shutil.rmtree(staging)
+    return True
+
+def generate_and_store_streaming(n: int, t: int, workers: int = DEFAULT_WRITE_WORKERS):
+    """Binary keygen for large panels. Shares are written as frostpy yields them, by a pool
+    of writer threads, into the staging directory; the set is committed and moved into the
+    group's directory only once every file is on disk, so an interrupted run never leaves a
+    mix of key sets. The caller holds the staging lock (see generate_and_store_shares)."""
+    staging = staging_dir()
+    started = time.perf_counter()
+    try:
+        from frostpy import generate_keys_stream_py
+        stream = generate_keys_stream_py(n, t)
+    except Exception as e:
+        print(f" Error during key generation: {e}")
+        return
+    generated = time.perf_counter()
+
+    def staged(*parts):
+        return os.path.join(staging, *parts)
+
+    written = 0
+    last_report = generated
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            packages = [pool.submit(_write_durable, staged("public_key_package.bin"), stream.public_key_package),
+                        pool.submit(_write_durable, staged("public_key.bin"), stream.verifying_key)]
+            shares = []
+            for pid, share in stream:
+                shares.append(pool.submit(_write_durable, staged(str(pid), "secret_share.bin"), share))
+                now = time.perf_counter()
+                if now - last_report >= PROGRESS_INTERVAL:
+                    last_report = now
+                    print(f" ... {sum(future.done() for future in shares)}/{stream.total} shares written")
+            written = sum(future.result() for future in packages + shares)
+        for root, _, _ in os.walk(staging):
+            _fsync_dir(root)
+        with open(staged(COMMIT_MARKER), "w") as f:
+            f.flush()
+            os.fsync(f.fileno())
+        _fsync_dir(staging)
+    except Exception as e:
+        print(f" Error writing key files: {e}")
+        shutil.rmtree(staging, ignore_errors=True)
+        return
+    written_at = time.perf_counter()
+    _recover_staged()
+    finished = time.perf_counter()
+
+    total = finished - started
+    print(f" Generated and saved {n} shares ({written} bytes) in {total:.3f}s: "
+          f"keygen {generated - started:.3f}s, "
+          f"write {written_at - generated:.3f}s, "
+          f"commit {finished - written_at:.3f}s "
+          f"({n / total:.0f} shares/s) → {frost_keyring.group_dir()}/")
+
 if __name__ == "__main__":
+    import sys
+    frost_keyring.select(sys.argv[1] if len(sys.argv) > 1 else None)  # optional group name
     generate_and_store_shares(n=3, t=2)
@@ -0,0 +1,356 @@
+import os
+import json
+import time
+import sqlite3
+from contextlib import contextmanager
+import frost_keyring
+
+MESSAGES_DB = frost_keyring.DEFAULT_MESSAGES_DB  # the default group's; see frost_keyring.messages_db()
+LEGACY_MESSAGES_FILE = "messages.txt"
+SIGNING_PACKAGE_TIMEOUT = 15 * 60  # seconds before a stalled signing package may be re-planned by another signer
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    message TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    signature_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS messages_by_status ON messages(status, id);
+CREATE TABLE IF NOT EXISTS signatures (
+    message_id INTEGER NOT NULL REFERENCES messages(id),
+    share TEXT NOT NULL,
+    identifier TEXT,
+    signature_share TEXT,
+    PRIMARY KEY (message_id, share)
+);
+CREATE TABLE IF NOT EXISTS commitments (
+    message_id INTEGER NOT NULL REFERENCES messages(id),
+    share TEXT NOT NULL,
+    identifier TEXT NOT NULL,
+    commitments TEXT NOT NULL,
+    PRIMARY KEY (message_id, share)
+);
+CREATE TABLE IF NOT EXISTS signing_packages (
+    message_id INTEGER PRIMARY KEY REFERENCES messages(id),
+    commitments TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS commitment_pool (
+    id INTEGER PRIMARY KEY,
+    share TEXT NOT NULL,
+    identifier TEXT NOT NULL,
+    commitments TEXT NOT NULL,
+    min_signers INTEGER NOT NULL,
+    message_id INTEGER REFERENCES messages(id),
+    fingerprint TEXT
+);
+CREATE INDEX IF NOT EXISTS commitment_pool_unclaimed ON commitment_pool(message_id, share, id);
+"""
+
+# Columns added after the first release; ALTERed into existing databases by connect().
+ADDED_COLUMNS = [
+    ("signatures", "identifier", "TEXT"),
+    ("signatures", "signature_share", "TEXT"),
+    ("signing_packages", "frozen_at", "REAL"),
+    ("commitment_pool", "fingerprint", "TEXT"),
+]
+
+_connection = None
+_batch = None  # while batch() runs: {"open": True once its current transaction has begun}
+
+def connect(path=None):
+    # One connection per process, to the active group's database; WAL lets `list` read while another CLI call writes.
+    global _connection
+    if _connection is not None:
+        return _connection
+    path = path or frost_keyring.messages_db()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, isolation_level=None, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    for table, column, decl in ADDED_COLUMNS:
+        if column not in {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+    _connection = conn
+    if path == MESSAGES_DB and os.path.exists(LEGACY_MESSAGES_FILE):
+        migrate_legacy(LEGACY_MESSAGES_FILE)
+    return conn
+
+def close():
+    global _connection
+    if _connection is not None:
+        _connection.close()
+        _connection = None
+
+@contextmanager
+def transaction():
+    conn = connect()
+    if _batch is not None:
+        # Inside batch(): a savepoint in the batch's open transaction, so a failed
+        # operation is undone on its own and the rest commit together at checkpoint().
+        if not _batch["open"]:
+            conn.execute("BEGIN IMMEDIATE")
+            _batch["open"] = True
+        conn.execute("SAVEPOINT op")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK TO op")
+            conn.execute("RELEASE op")
+            raise
+        conn.execute("RELEASE op")
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+@contextmanager
+def batch():
+    """Group the writes of many operations into few commits: transactions inside the
+    block share one, which checkpoint() commits. Whatever completed is committed when
+    the block ends, even on an exception."""
+    global _batch
+    connect()
+    _batch = {"open": False}
+    try:
+        yield
+    finally:
+        checkpoint()
+        _batch = None
+
+def checkpoint():
+    """Inside batch(): commit the writes so far. The next write begins a new transaction,
+    so the write lock is not held in between. A no-op outside batch()."""
+    if _batch is not None and _batch["open"]:
+        connect().execute("COMMIT")
+        _batch["open"] = False
+
+def migrate_legacy(path=LEGACY_MESSAGES_FILE):
+    """Import a JSONL messages file into the store and rename it to <path>.migrated."""
+    imported = 0
+    with transaction() as conn, open(path, "r") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            m = json.loads(line)
+            shares = [sig["share"] for sig in m.get("signatures", [])]
+            conn.execute(
+                "INSERT OR IGNORE INTO messages (id, message, status, signature_count) VALUES (?, ?, ?, ?)",
+                (m["id"], m["message"], m.get("status", "pending"), len(shares)),
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO signatures (message_id, share) VALUES (?, ?)",
+                [(m["id"], share) for share in shares],
+            )
+            imported += 1
+    os.replace(path, path + ".migrated")
+    print(f" Migrated {imported} messages from {path} → {MESSAGES_DB}")
+    return imported
+
+def add_message(message: str) -> int:
+    with transaction() as conn:
+        cur = conn.execute("INSERT INTO messages (message) VALUES (?)", (message,))
+        return cur.lastrowid
+
+def get_message(message_id: int):
+    conn = connect()
+    row = conn.execute(
+        "SELECT id, message, status FROM messages WHERE id = ?", (message_id,)
+    ).fetchone()
+    if row is None:
+        return None
+    shares = conn.execute(
+        "SELECT share, identifier, signature_share FROM signatures WHERE message_id = ? ORDER BY rowid", (message_id,)
+    ).fetchall()
+    return {
+        "id": row["id"],
+        "message": row["message"],
+        "status": row["status"],
+        "signatures": [dict(s) for s in shares],
+    }
+
+def add_signature(message_id: int, share: str, identifier: str | None = None, signature_share: str | None = None):
+    """Record a share's approval, with its FROST signature share when there is one.
+    Returns the new signature count, or None if already signed."""
+    with transaction() as conn:
+        cur = conn.execute(
+            "INSERT OR IGNORE INTO signatures (message_id, share, identifier, signature_share) VALUES (?, ?, ?, ?)",
+            (message_id, share, identifier, signature_share),
+        )
+        if cur.rowcount == 0:
+            return None
+        conn.execute(
+            "UPDATE messages SET signature_count = signature_count + 1 WHERE id = ?",
+            (message_id,),
+        )
+        return conn.execute(
+            "SELECT signature_count FROM messages WHERE id = ?", (message_id,)
+        ).fetchone()[0]
+
+def add_commitment(message_id: int, share: str, identifier: str, commitments: str):
+    """Record a share's round-1 commitments. Returns the number of commitments for the
+    message, or None if this share already committed."""
+    with transaction() as conn:
+        cur = conn.execute(
+            "INSERT OR IGNORE INTO commitments (message_id, share, identifier, commitments) VALUES (?, ?, ?, ?)",
+            (message_id, share, identifier, commitments),
+        )
+        if cur.rowcount == 0:
+            return None
+        return conn.execute(
+            "SELECT COUNT(*) FROM commitments WHERE message_id = ?", (message_id,)
+        ).fetchone()[0]
+
+def has_commitment(message_id: int, share: str) -> bool:
+    row = connect().execute(
+        "SELECT 1 FROM commitments WHERE message_id = ? AND share = ?", (message_id, share)
+    ).fetchone()
+    return row is not None
+
+def get_commitments(message_id: int):
+    rows = connect().execute(
+        "SELECT share, identifier, commitments FROM commitments WHERE message_id = ? ORDER BY rowid", (message_id,)
+    )
+    return [dict(row) for row in rows]
+
+def freeze_signing_package(message_id: int, signers: int):
+    """Fix the signing package to the first `signers` commitments, unless it already is.
+    Returns the package as {identifier: commitments}."""
+    with transaction() as conn:
+        row = conn.execute(
+            "SELECT commitments FROM signing_packages WHERE message_id = ?", (message_id,)
+        ).fetchone()
+        if row is not None:
+            return json.loads(row["commitments"])
+        rows = conn.execute(
+            "SELECT identifier, commitments FROM commitments WHERE message_id = ? ORDER BY rowid LIMIT ?",
+            (message_id, signers),
+        ).fetchall()
+        package = {r["identifier"]: r["commitments"] for r in rows}
+        conn.execute(
+            "INSERT INTO signing_packages (message_id, commitments, frozen_at) VALUES (?, ?, ?)",
+            (message_id, json.dumps(package), time.time()),
+        )
+        return package
+
+def release_signing_package(message_id: int, older_than: float | None = None):
+    """Unfreeze a message's signing package so it can be planned again, e.g. when one of its
+    signers never runs round 2. Signature shares over the old package only aggregate with it,
+    so they are discarded and those shares sign again; its commitments, live or claimed from
+    the pool, are dropped. With `older_than`, only a package frozen at least that many seconds
+    ago is released. Returns the shares that must sign again, or None if nothing was released."""
+    with transaction() as conn:
+        row = conn.execute(
+            "SELECT frozen_at FROM signing_packages WHERE message_id = ?", (message_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        if older_than is not None and (row["frozen_at"] is None or time.time() - row["frozen_at"] < older_than):
+            return None
+        resign = [r["share"] for r in conn.execute(
+            "SELECT share FROM signatures WHERE message_id = ? AND signature_share IS NOT NULL ORDER BY rowid", (message_id,)
+        )]
+        conn.execute("DELETE FROM signatures WHERE message_id = ? AND signature_share IS NOT NULL", (message_id,))
+        conn.execute(
+            "UPDATE messages SET signature_count = (SELECT COUNT(*) FROM signatures WHERE message_id = ?) WHERE id = ?",
+            (message_id, message_id),
+        )
+        conn.execute("DELETE FROM commitment_pool WHERE message_id = ?", (message_id,))
+        conn.execute("DELETE FROM commitments WHERE message_id = ?", (message_id,))
+        conn.execute("DELETE FROM signing_packages WHERE message_id = ?", (message_id,))
+        return resign
+
+def get_signing_package(message_id: int):
+    """The frozen signing package as {identifier: commitments}, or None if not frozen yet."""
+    row = connect().execute(
+        "SELECT commitments FROM signing_packages WHERE message_id = ?", (message_id,)
+    ).fetchone()
+    return json.loads(row["commitments"]) if row is not None else None
+
+def add_pool_commitments(share: str, identifier: str, min_signers: int, commitments, fingerprint: str | None = None):
+    """Publish preprocessed commitments for a share, made for the group key with this
+    fingerprint. Returns how many it has unclaimed for that key."""
+    with transaction() as conn:
+        conn.executemany(
+            "INSERT INTO commitment_pool (share, identifier, commitments, min_signers, fingerprint) VALUES (?, ?, ?, ?, ?)",
+            [(share, identifier, c, min_signers, fingerprint) for c in commitments],
+        )
+        return conn.execute(
+            "SELECT COUNT(*) FROM commitment_pool WHERE message_id IS NULL AND share = ? AND fingerprint IS ?",
+            (share, fingerprint),
+        ).fetchone()[0]
+
+def pool_status(fingerprint: str | None = None):
+    """Unclaimed preprocessed commitments per share, as {share: count}; only those for
+    the group key with `fingerprint`, if given."""
+    rows = connect().execute(
+        "SELECT share, COUNT(*) AS available FROM commitment_pool "
+        "WHERE message_id IS NULL AND (? IS NULL OR fingerprint = ?) GROUP BY share ORDER BY share",
+        (fingerprint, fingerprint),
+    )
+    return {row["share"]: row["available"] for row in rows}
+
+def claim_signing_package(message_id: int, signers=None, fingerprint: str | None = None):
+    """Freeze a message's signing package from the commitment pool: one unclaimed
+    commitment from each of min_signers shares (only from `signers` if given, else
+    the shares with the most left). With a fingerprint, unclaimed commitments made for
+    any other group key (before the group was regenerated) are dropped first. Returns
+    {identifier: commitments}, or None if the pool cannot cover the message. A claimed
+    package is released like any other, see release_signing_package."""
+    with transaction() as conn:
+        if fingerprint is not None:
+            conn.execute(
+                "DELETE FROM commitment_pool WHERE message_id IS NULL AND fingerprint IS NOT ?", (fingerprint,)
+            )
+        latest = conn.execute(
+            "SELECT min_signers FROM commitment_pool WHERE message_id IS NULL ORDER BY id DESC LIMIT 1"
+        ).fetchone()
+        if latest is None:
+            return None
+        min_signers = latest["min_signers"]
+        rows = conn.execute(
+            "SELECT share, MIN(id) AS id, COUNT(*) AS available FROM commitment_pool "
+            "WHERE message_id IS NULL GROUP BY share ORDER BY available DESC, share"
+        ).fetchall()
+        if signers is not None:
+            rows = [r for r in rows if r["share"] in set(signers)]
+        if len(rows) < min_signers:
+            return None
+        claimed = [r["id"] for r in rows[:min_signers]]
+        conn.executemany("UPDATE commitment_pool SET message_id = ? WHERE id = ?", [(message_id, i) for i in claimed])
+        picked = conn.execute(
+            f"SELECT share, identifier, commitments FROM commitment_pool WHERE id IN ({','.join('?' * len(claimed))})",
+            claimed,
+        ).fetchall()
+        conn.executemany(
+            "INSERT INTO commitments (message_id, share, identifier, commitments) VALUES (?, ?, ?, ?)",
+            [(message_id, r["share"], r["identifier"], r["commitments"]) for r in picked],
+        )
+        package = {r["identifier"]: r["commitments"] for r in picked}
+        conn.execute(
+            "INSERT INTO signing_packages (message_id, commitments, frozen_at) VALUES (?, ?, ?)",
+            (message_id, json.dumps(package), time.time()),
+        )
+        return package
+
+def set_status(message_id: int, status: str):
+    with transaction() as conn:
+        conn.execute("UPDATE messages SET status = ? WHERE id = ?", (status, message_id))
+
+def list_messages(status: str | None = None):
+    conn = connect()
+    if status is None:
+        rows = conn.execute("SELECT id, message, status, signature_count FROM messages ORDER BY id")
+    else:
+        rows = conn.execute(
+            "SELECT id, message, status, signature_count FROM messages WHERE status = ? ORDER BY id",
+            (status,),
+        )
+    for row in rows:
+        yield dict(row)
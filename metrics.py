@@ -0,0 +1,188 @@
+"""Per-stage latency instrumentation for the broadcast pipeline.
+
+Code wraps each stage in `timer("stage")` (or reports a measured duration
+with `observe`). Durations go into in-process histograms and are summed per
+stage for the current run; `flush(command)` appends the run as one JSON line
+to METRICS_FILE, which `cli.py stats` summarizes and own_relay.py's
+/metrics route exposes in the Prometheus text format (through a RunFollower,
+which reads only the runs appended since the previous scrape). Stages measured inside
+frostpy come back through `frostpy.last_timings_py()` and are recorded with
+`observe_all`.
+
+Set FROST_METRICS=0 to turn recording off.
+"""
+import os
+import json
+import time
+import bisect
+from contextlib import contextmanager
+
+METRICS_FILE = "metrics.jsonl"
+ENABLED = os.environ.get("FROST_METRICS", "1") != "0"
+# Histogram bucket upper bounds, in seconds.
+BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+TAIL_BYTES = 4 * 1024 * 1024  # how much of METRICS_FILE load_runs reads
+MAX_FILE_BYTES = 16 * 1024 * 1024  # METRICS_FILE is cut back to its tail beyond this
+
+class Histogram:
+    __slots__ = ("counts", "count", "sum")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+class Registry:
+    def __init__(self):
+        self.histograms = {}  # stage -> Histogram
+
+    def observe(self, stage, seconds):
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = Histogram()
+        histogram.observe(seconds)
+
+    def render(self, name, help_text):
+        """The histograms as one Prometheus metric family labelled by stage."""
+        lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for stage, histogram in sorted(self.histograms.items()):
+            cumulative = 0
+            for bound, count in zip(BUCKETS + ("+Inf",), histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {histogram.sum!r}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+_run = {}  # stage -> seconds spent in the current run
+
+def observe(stage, seconds):
+    if not ENABLED:
+        return
+    REGISTRY.observe(stage, seconds)
+    _run[stage] = _run.get(stage, 0.0) + seconds
+
+def observe_all(prefix, timings):
+    """Record (stage, seconds) pairs, e.g. from frostpy.last_timings_py(), under `prefix`."""
+    for stage, seconds in timings:
+        observe(f"{prefix}.{stage}", seconds)
+
+@contextmanager
+def timer(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - start)
+
+def flush(command, path=METRICS_FILE):
+    """Append the current run's stage totals to the metrics file and start a new run."""
+    if not ENABLED or not _run:
+        return
+    record = {"ts": time.time(), "pid": os.getpid(), "command": command, "stages": dict(_run)}
+    _run.clear()
+    try:
+        with open(path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        if os.path.getsize(path) > MAX_FILE_BYTES:
+            _truncate(path)
+    except OSError:
+        pass  # metrics never fail the command
+
+def _truncate(path):
+    runs = load_runs(path=path)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.writelines(json.dumps(run) + "\n" for run in runs)
+    os.replace(tmp_path, path)
+
+def load_runs(limit=None, command=None, path=METRICS_FILE):
+    """Recent runs from the tail of the metrics file, oldest first."""
+    try:
+        with open(path, "rb") as f:
+            size = f.seek(0, os.SEEK_END)
+            f.seek(max(0, size - TAIL_BYTES))
+            lines = f.read().splitlines()[1 if size > TAIL_BYTES else 0:]  # first line may be cut
+    except OSError:
+        return []
+    runs = []
+    for line in lines:
+        try:
+            run = json.loads(line)
+        except ValueError:
+            continue
+        if command is None or run.get("command") == command:
+            runs.append(run)
+    return runs[-limit:] if limit else runs
+
+class RunFollower:
+    """Histograms of the runs in a metrics file, kept current by reading only the lines
+    appended since the last refresh. The first refresh starts from the last `limit` runs."""
+
+    def __init__(self, limit=None, path=METRICS_FILE):
+        self.path = path
+        self.limit = limit
+        self.registry = Registry()
+        self._file_id = None  # (st_dev, st_ino) of the file being followed
+        self._offset = 0  # end of the last complete line read
+        self._last_ts = None  # newest run counted, to skip runs kept when flush cuts the file back
+
+    def refresh(self):
+        try:
+            with open(self.path, "rb") as f:
+                stat = os.fstat(f.fileno())
+                file_id = (stat.st_dev, stat.st_ino)
+                rewound = file_id != self._file_id or stat.st_size < self._offset
+                if rewound:
+                    self._file_id = file_id
+                    self._offset = max(0, stat.st_size - TAIL_BYTES)
+                f.seek(self._offset)
+                data = f.read()
+        except OSError:
+            return self.registry
+        complete = data.rfind(b"\n") + 1  # a line still being written is read next time
+        lines = data[:complete].splitlines()
+        if rewound and self._offset > 0:
+            lines = lines[1:]  # first line may be cut
+        self._offset += complete
+        runs = []
+        for line in lines:
+            try:
+                runs.append(json.loads(line))
+            except ValueError:
+                continue
+        if rewound and self._last_ts is not None:
+            runs = [run for run in runs if run["ts"] > self._last_ts]
+        elif rewound and self.limit:
+            runs = runs[-self.limit:]
+        for run in runs:
+            for stage, seconds in run["stages"].items():
+                self.registry.observe(stage, seconds)
+            if self._last_ts is None or run["ts"] > self._last_ts:
+                self._last_ts = run["ts"]
+        return self.registry
+
+def percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))] if ordered else None
+
+def summarize(runs):
+    """{stage: {"runs", "mean_ms", "p50_ms", "p95_ms", "max_ms"}} in first-seen stage order."""
+    samples = {}
+    for run in runs:
+        for stage, seconds in run["stages"].items():
+            samples.setdefault(stage, []).append(seconds)
+    summary = {}
+    for stage, values in samples.items():
+        ordered = sorted(values)
+        summary[stage] = {"runs": len(values),
+                          "mean_ms": sum(values) / len(values) * 1000,
+                          "p50_ms": percentile(ordered, 0.50) * 1000,
+                          "p95_ms": percentile(ordered, 0.95) * 1000,
+                          "max_ms": ordered[-1] * 1000}
+    return summary
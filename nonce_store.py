@@ -0,0 +1,113 @@
+"""Per-participant store of secret FROST round-1 nonces.
+
+Each participant keeps its unused nonces in keys/<id>/nonces.db, keyed by the
+public commitments they belong to. A nonce is handed out by consume() exactly
+once: the same transaction that reads it wipes it and marks it consumed, so it
+can never sign a second signing package. Nonces carry the fingerprint of the
+group key they were made for. consume() only hands out nonces for the key it
+is asked about and never touches others; when nonces for a new key are added,
+those left over from the replaced key are wiped. The database and its -wal/-shm files are readable
+by the owner only.
+"""
+import os
+import time
+import sqlite3
+
+NONCES_DB_NAME = "nonces.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS nonces (
+    commitments TEXT PRIMARY KEY,
+    nonces TEXT,
+    created_at REAL NOT NULL,
+    consumed_at REAL,
+    fingerprint TEXT
+);
+"""
+
+# Columns added after the first release; ALTERed into existing databases by connect().
+ADDED_COLUMNS = [
+    ("nonces", "fingerprint", "TEXT"),
+]
+
+_connections = {}
+
+def nonces_db_path(share_path):
+    # Lives next to the participant's secret_share.txt.
+    return os.path.join(os.path.dirname(share_path), NONCES_DB_NAME)
+
+def connect(share_path):
+    path = os.path.abspath(nonces_db_path(share_path))
+    conn = _connections.get(path)
+    if conn is not None:
+        return conn
+    # Secret material: owner only, including the -wal and -shm files SQLite creates next to it.
+    old_umask = os.umask(0o077)
+    try:
+        if not os.path.exists(path):
+            os.close(os.open(path, os.O_WRONLY | os.O_CREAT, 0o600))
+        conn = sqlite3.connect(path, isolation_level=None, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA secure_delete=ON")  # overwrite wiped nonces on disk
+        conn.executescript(SCHEMA)
+        for table, column, decl in ADDED_COLUMNS:
+            if column not in {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+    finally:
+        os.umask(old_umask)
+    for suffix in ("", "-wal", "-shm"):  # files from before this was enforced
+        if os.path.exists(path + suffix):
+            os.chmod(path + suffix, 0o600)
+    _connections[path] = conn
+    return conn
+
+def add_nonces(share_path, pairs, fingerprint=None):
+    """Store (nonces_json, commitments_json) pairs from commit_py or preprocess_py, made for the
+    group key with this fingerprint. Unused nonces for any other key are wiped."""
+    conn = connect(share_path)
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if fingerprint is not None:
+            conn.execute(
+                "UPDATE nonces SET nonces = NULL, consumed_at = ? WHERE consumed_at IS NULL AND fingerprint IS NOT ?",
+                (now, fingerprint),
+            )
+        conn.executemany(
+            "INSERT INTO nonces (commitments, nonces, created_at, fingerprint) VALUES (?, ?, ?, ?)",
+            [(commitments, nonces, now, fingerprint) for nonces, commitments in pairs],
+        )
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+def consume(share_path, commitments, fingerprint=None):
+    """Return the nonces for `commitments` and wipe them, or None if unknown or already used.
+    With a fingerprint, only nonces made for that group key match; any others are left alone."""
+    conn = connect(share_path)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute(
+            "SELECT nonces FROM nonces WHERE commitments = ? AND consumed_at IS NULL AND (? IS NULL OR fingerprint = ?)",
+            (commitments, fingerprint, fingerprint),
+        ).fetchone()
+        if row is not None:
+            conn.execute(
+                "UPDATE nonces SET nonces = NULL, consumed_at = ? WHERE commitments = ? AND (? IS NULL OR fingerprint = ?)",
+                (time.time(), commitments, fingerprint, fingerprint),
+            )
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+    return row[0] if row is not None else None
+
+def count_unused(share_path, fingerprint=None) -> int:
+    if fingerprint is None:
+        return connect(share_path).execute(
+            "SELECT COUNT(*) FROM nonces WHERE consumed_at IS NULL"
+        ).fetchone()[0]
+    return connect(share_path).execute(
+        "SELECT COUNT(*) FROM nonces WHERE consumed_at IS NULL AND fingerprint = ?", (fingerprint,)
+    ).fetchone()[0]
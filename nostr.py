@@ -1,51 +1,92 @@
 import asyncio
+import argparse
+import time
+import metrics
 from nostr_sdk import Keys, Client, EventBuilder, NostrSigner
 import os
 import json
 import frostpy
+import key_cache
+import frost_keyring
 
-KEYS_DIR = "keys"
-LATEST_SIGNATURE_FILE = os.path.join(KEYS_DIR, "latest_signature.txt")
+LATEST_SIGNATURE_NAME = "latest_signature.txt"  # in the active group's key directory
+KEY_MARKER = "\nFROST Key: "  # names the signing group's key fingerprint in the event content
+RELAYS_FILE = "relays.json"  # Optional JSON list of relay URLs
+DEFAULT_RELAYS = ["wss://nos.lol/", "wss://relay.damus.io/"]
+RELAY_READY_TIMEOUT = 5.0
 
-async def publish_frost_event():
-    try:
-        #___________ATTENTION___________
-        private_key_hex = "nsec25ruff1ehn7zd3dc3yjaq8n2vlmcz6ama3qhdx34vsp66pctpfy9hqgfcws" #This is a dummy key and won't work. 
-        #Kindly replace it with your own key from no-struddle.  
-        
-        
-        signature_file = LATEST_SIGNATURE_FILE
-        public_key_file = os.path.join(KEYS_DIR, "public_key.txt")
-
-        if not os.path.exists(signature_file):
-            raise FileNotFoundError(f"Signature file not found at {signature_file}. Run 'python cli.py broadcast' first.")
-        with open(signature_file, "r") as f:
-            data = json.load(f)
-            frost_signature_b64 = data["signature"]
-            frost_message = data["message"]
-
-        if not os.path.exists(public_key_file):
+#___________ATTENTION___________
+NOSTR_PRIVATE_KEY = "nsec25ruff1ehn7zd3dc3yjaq8n2vlmcz6ama3qhdx34vsp66pctpfy9hqgfcws" #This is a dummy key and won't work.
+#Kindly replace it with your own key from no-struddle.
+
+def load_relays():
+    if os.path.exists(RELAYS_FILE):
+        with open(RELAYS_FILE, "r") as f:
+            return json.load(f)
+    return list(DEFAULT_RELAYS)
+
+def load_latest_signature():
+    # Each group keeps its own, so --group X never publishes another group's alert.
+    latest_file = frost_keyring.key_path(LATEST_SIGNATURE_NAME)
+    if not os.path.exists(latest_file):
+        raise FileNotFoundError(f"Signature file not found at {latest_file}. Run 'python cli.py broadcast' first.")
+    with open(latest_file, "r") as f:
+        data = json.load(f)
+    return data["message"], data["signature"], data.get("fingerprint")
+
+def check_frost_signature(frost_message, frost_signature_b64, fingerprint=None):
+    # A fingerprint selects the signing group's key from the keyring; without one the active group's is used.
+    if fingerprint is not None:
+        _, verifying_key = frost_keyring.verifying_key_for(fingerprint)
+        if verifying_key is None:
+            raise ValueError(f"No group in {frost_keyring.INDEX_FILE} has key fingerprint {fingerprint}.")
+    else:
+        public_key_file = frost_keyring.key_path("public_key.txt")
+        if not key_cache.key_file_exists(public_key_file):
             raise FileNotFoundError(f"Public key file not found at {public_key_file}. Run 'python cli.py generate' first.")
-        with open(public_key_file, "r") as f:
-            public_key_b64 = f.read().strip()
+        verifying_key = key_cache.load_verifying_key(public_key_file)
+    if not frostpy.verify_with_key_py(frost_message, frost_signature_b64, verifying_key):
+        raise ValueError("FROST signature verification failed.")
 
-        if not frostpy.verify_signature_py(frost_message, frost_signature_b64, public_key_b64):
-            raise ValueError("FROST signature verification failed.")
+def frost_event_content(frost_message, frost_signature_b64, fingerprint=None):
+    key_line = f"{KEY_MARKER}{fingerprint}" if fingerprint else ""
+    return f"{frost_message}{key_line}\nFROST Signature: {frost_signature_b64}"
+
+async def wait_for_relays(client, timeout=RELAY_READY_TIMEOUT):
+    """Return the URLs of connected relays as soon as at least one is up, or [] after timeout."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        relays = await client.relays()
+        ready = [url for url, relay in relays.items() if relay.is_connected()]
+        if ready or loop.time() >= deadline:
+            return ready
+        await asyncio.sleep(0.05)
+
+async def publish_frost_event():
+    try:
+        with metrics.timer("nostr.load_signature"):
+            frost_message, frost_signature_b64, fingerprint = load_latest_signature()
+        with metrics.timer("nostr.verify"):
+            check_frost_signature(frost_message, frost_signature_b64, fingerprint)
         print("✅ FROST signature verified successfully")
 
-        keys = Keys.parse(private_key_hex)
+        keys = Keys.parse(NOSTR_PRIVATE_KEY)
         signer = NostrSigner.keys(keys)
         client = Client(signer)
 
-        await client.add_relay("wss://nos.lol/")
-        await client.add_relay("wss://relay.damus.io/")
-        await client.connect()
-        await asyncio.sleep(1)
+        with metrics.timer("nostr.connect"):
+            for url in load_relays():
+                await client.add_relay(url)
+            await client.connect()
+            if not await wait_for_relays(client):
+                raise ConnectionError("No relay became ready in time.")
 
-        message = f"{frost_message}\nFROST Signature: {frost_signature_b64}"
+        message = frost_event_content(frost_message, frost_signature_b64, fingerprint)
         event_builder = EventBuilder.text_note(message)
 
-        res = await client.send_event_builder(event_builder)
+        with metrics.timer("nostr.publish"):
+            res = await client.send_event_builder(event_builder)
         event_id = res.id.to_bech32() if res.id else "Failed to get ID"
         print(f"FROST Message: {frost_message}")
         print(f"FROST Signature: {frost_signature_b64}")
@@ -57,4 +98,13 @@ async def publish_frost_event():
         print(f"Error: {e}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publish the latest FROST signature to Nostr")
+    parser.add_argument("--group", type=str, default=frost_keyring.DEFAULT_GROUP, help="Key group for signatures that name no key fingerprint")
+    frost_keyring.select(parser.parse_args().group)
+    # Set by cli.py: when it started this process, so interpreter and import time is counted.
+    if "FROST_METRICS_T0" in os.environ:
+        metrics.observe("nostr.startup", time.time() - float(os.environ["FROST_METRICS_T0"]))
+    started = time.perf_counter()
     asyncio.run(publish_frost_event())
+    metrics.observe("nostr.total", time.perf_counter() - started)
+    metrics.flush("nostr")
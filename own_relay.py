@@ -4,77 +4,221 @@ import asyncio
 import websockets
 import json
 import logging
-from datetime import datetime
-from fastapi import FastAPI, WebSocket as FastAPIWebSocket
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, Query, Request
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
 import uvicorn
+import argparse
+import os
+import time
+import signal
+import socket
+import relay_json
+import relay_feed
+import metrics
+import relay_verify
+from relay_store import EventStore
+from relay_log import EventLog, is_indexable, DEFAULT_SEGMENT_BYTES, DEFAULT_FSYNC_INTERVAL
+from relay_dispatch import Dispatcher, SLOW_CONSUMER_POLICIES
 
 logging.basicConfig(level=logging.INFO)
-subscriptions = {}  # Store client subscriptions
-events = []  # Store all events
+RELAY_HOST = "localhost"
+RELAY_PORT = 8765
+WEB_PORT = 8000
+HUB_LINE_LIMIT = 16 * 1024 * 1024  # Longest event line accepted on the worker hub
+dispatcher = Dispatcher()  # Per-connection queues and subscription index
+store = EventStore()  # Indexed, size-capped event store
+event_log = None  # On-disk segment log, set up in main() unless --data-dir is empty
+hub_writer = None  # With --workers, the stream to the hub that shares events between workers
+new_events = asyncio.Event()  # Set (and replaced) whenever events are stored; wakes /events/stream
+METRICS_RUNS = 1000  # Recent pipeline runs from metrics.jsonl that /metrics starts from; later runs are added as recorded
+pipeline_runs = metrics.RunFollower(METRICS_RUNS)  # Pipeline stage histograms, read incrementally from metrics.jsonl
+verifier = None  # With --verify-frost, the relay_verify.FrostVerifier that checks alerts on ingest
+quarantine = EventStore(max_events=10_000)  # Alerts whose FROST signature failed, with --invalid-frost quarantine
+INGEST_IN_FLIGHT = 256  # Alerts per connection waiting for FROST verification at once
+background_tasks = set()  # Running tasks started by spawn(); the loop itself only holds weak references
 app = FastAPI()
 
+def build_parser():
+    parser = argparse.ArgumentParser(description="Local Nostr relay with a web dashboard")
+    parser.add_argument("--max-events", type=int, default=store.max_events, help="Retention cap; the oldest events are evicted beyond it")
+    parser.add_argument("--queue-size", type=int, default=dispatcher.queue_size, help="Outbound frames buffered per connection")
+    parser.add_argument("--slow-consumer", choices=SLOW_CONSUMER_POLICIES, default=dispatcher.policy, help="What to do when a subscriber's queue is full")
+    parser.add_argument("--data-dir", default="relay_data", help="Directory for the event log; pass '' to keep events in memory only")
+    parser.add_argument("--segment-mb", type=int, default=DEFAULT_SEGMENT_BYTES // (1024 * 1024), help="Log segment size before rotating to a new file")
+    parser.add_argument("--fsync-interval", type=float, default=DEFAULT_FSYNC_INTERVAL, help="Seconds between batched fsyncs of the log")
+    parser.add_argument("--max-age", type=float, default=None, help="Expire events whose created_at is older than this many seconds")
+    parser.add_argument("--port", type=int, default=RELAY_PORT, help="WebSocket port of the relay")
+    parser.add_argument("--web-port", type=int, default=WEB_PORT, help="Port of the dashboard and HTTP API")
+    parser.add_argument("--workers", type=int, default=1, help="Relay processes sharing the ports; events reach subscribers on every worker")
+    parser.add_argument("--verify-frost", action="store_true", help="Verify the FROST signature of alerts on ingest; subscribe with {\"frost_verified\": true} for verified alerts only")
+    parser.add_argument("--frost-key", action="append", help="Base64 group verifying key to accept (repeatable; default: the keys of --group)")
+    parser.add_argument("--group", action="append", help="Keyring group whose alerts to accept (repeatable; default: every group in keys/keyring.json)")
+    parser.add_argument("--invalid-frost", choices=["drop", "quarantine"], default="quarantine", help="What to do with alerts whose FROST signature fails")
+    parser.add_argument("--verify-batch", type=int, default=relay_verify.DEFAULT_BATCH_SIZE, help="Alerts verified per batch at most")
+    parser.add_argument("--verify-delay-ms", type=float, default=relay_verify.DEFAULT_MAX_DELAY * 1000, help="Longest an alert waits for its batch to fill")
+    parser.add_argument("--verify-workers", type=int, default=relay_verify.DEFAULT_WORKERS, help="Threads running verification batches")
+    return parser
+
+# Relay options. Handlers read them from here; main() runs with whatever configure() set last.
+args = build_parser().parse_args([])
+
+def configure(options):
+    """Make `options` (a build_parser() namespace) the relay's settings."""
+    global args
+    args = options
+    store.max_events = args.max_events
+    dispatcher.queue_size = args.queue_size
+    dispatcher.policy = args.slow_consumer
+
+def notify_viewers():
+    global new_events
+    new_events.set()
+    new_events = asyncio.Event()
+
+def store_event(event, received_at, verified=False, raw=None, seq=None):
+    """Store a new event (under `seq` when the hub numbered it) and fan it out to this
+    process's subscribers and viewers. Returns the StoredEvent, or None if already stored."""
+    entry = store.add(event, raw, seq)
+    if entry is None:
+        return None
+    entry.received_at = received_at
+    raw = entry.raw  # the only time this event is serialized
+    if event_log is not None:
+        event_log.append(entry, raw.encode())
+    if verified:
+        store.mark_verified([entry])
+        if event_log is not None:
+            event_log.mark_verified(entry)
+    dispatcher.dispatch(event, lambda sub_id: relay_json.event_frame(sub_id, raw), verified)
+    notify_viewers()
+    return entry
+
+def hub_line(received_at, verified, raw, seq=None):
+    """One event on the hub: workers send "<received_at> <v|-> <json>", and the hub passes
+    it on to every worker, the sender included, prefixed with the seq it assigned."""
+    line = f"{received_at!r} {'v' if verified else '-'} {raw}\n"
+    return (line if seq is None else f"{seq} {line}").encode()
+
+def parse_hub_line(line):
+    """(received_at, verified, raw) from a worker's hub_line."""
+    received_at, verified, raw = line.decode().rstrip("\n").split(" ", 2)
+    return float(received_at), verified == "v", raw
+
+def parse_numbered_hub_line(line):
+    """(seq, received_at, verified, raw) from a hub_line the hub numbered."""
+    seq, rest = line.split(b" ", 1)
+    return (int(seq), *parse_hub_line(rest))
+
+async def accept_event(conn, event, received_at, verified=False):
+    if hub_writer is not None:
+        # The hub numbers the event and hands it back; it is stored and fanned out from there
+        # (follow_hub), so every worker gives it the same seq.
+        if event["id"] in store.by_id:
+            await conn.put(json.dumps(["OK", event["id"], True, "duplicate: already have this event"]))
+            return
+        hub_writer.write(hub_line(received_at, verified, relay_json.dumps(event)))
+        await hub_writer.drain()
+        logging.info(f"Received event: {event['id']}")
+        await conn.put(json.dumps(["OK", event["id"], True, ""]))
+        return
+    with metrics.timer("relay.store_event"):
+        entry = store_event(event, received_at, verified)
+    if entry is None:
+        await conn.put(json.dumps(["OK", event["id"], True, "duplicate: already have this event"]))
+        return
+    logging.info(f"Received event: {event['id']}")
+    await conn.put(json.dumps(["OK", event["id"], True, ""]))
+
+def spawn(coro):
+    """Run `coro` as a task that is kept alive until it finishes."""
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+async def ingest_frost_event(conn, event, received_at, slots):
+    """Accept an event after checking the FROST signature in its content, if it has one."""
+    try:
+        parsed = relay_verify.parse_frost_content(event.get("content"))
+        if parsed is None:
+            await accept_event(conn, event, received_at)  # not an alert; stored as before
+            return
+        if event["id"] in store.by_id:
+            await conn.put(json.dumps(["OK", event["id"], True, "duplicate: already have this event"]))
+            return
+        with metrics.timer("relay.frost_verify"):
+            valid = await verifier.verify(*parsed)
+        if valid:
+            await accept_event(conn, event, received_at, verified=True)
+            return
+        if args.invalid_frost == "quarantine":
+            entry = quarantine.add(event)
+            if entry is not None:
+                entry.received_at = received_at
+        logging.info(f"Rejected event {event['id']}: FROST signature does not verify")
+        await conn.put(json.dumps(["OK", event["id"], False, "invalid: FROST signature does not verify against the relay's group keys"]))
+    except ConnectionError:
+        pass
+    except Exception as e:
+        logging.error(f"Error ingesting event: {e}")
+    finally:
+        slots.release()
+
 # Existing WebSocket relay handler (unchanged)
 async def handle_connection(websocket):
     client_id = f"client_{id(websocket)}"
     logging.info(f"New connection: {client_id}")
+    conn = dispatcher.register(websocket)
+    # Alerts are verified concurrently (in batches across connections); this bounds how many
+    # of this connection's alerts wait at once.
+    ingest_slots = asyncio.Semaphore(INGEST_IN_FLIGHT)
     
     try:
         async for message in websocket:
             try:
-                data = json.loads(message)
+                data = relay_json.loads(message)
                 msg_type = data[0].upper()
 
                 if msg_type == "EVENT":
                     event = data[1]
-                    event["received_at"] = datetime.now().isoformat()
-                    events.append(event)
-                    logging.info(f"Received event: {event['id']}")
-                    
-                    for sub_id, (client, filters) in subscriptions.items():
-                        if matches_filter(event, filters):
-                            await client.send(json.dumps(["EVENT", sub_id, event]))
+                    if not is_indexable(event):
+                        await conn.put(json.dumps(["OK", event.get("id") if isinstance(event, dict) else None, False,
+                                                   "invalid: id, pubkey, kind or created_at malformed"]))
+                        continue
+                    if verifier is not None:
+                        await ingest_slots.acquire()
+                        spawn(ingest_frost_event(conn, event, time.time(), ingest_slots))
+                        continue
+                    await accept_event(conn, event, time.time())
 
                 elif msg_type == "REQ":
                     sub_id = data[1]
-                    filters = data[2] if len(data) > 2 else {}
-                    subscriptions[sub_id] = (websocket, filters)
-                    logging.info(f"New subscription: {sub_id}")
+                    filters = dispatcher.subscribe(conn, sub_id, data[2:])  # NIP-01: filters are OR-ed
+                    logging.info(f"New subscription: {client_id}/{sub_id}")
                     
-                    for event in events:
-                        if matches_filter(event, filters):
-                            await websocket.send(json.dumps(["EVENT", sub_id, event]))
-                    await websocket.send(json.dumps(["EOSE", sub_id]))
+                    prefix = relay_json.frame_prefix(sub_id)
+                    with metrics.timer("relay.req_replay"):
+                        for entry in store.query(filters):
+                            await conn.put(prefix + entry.raw + "]")
+                    await conn.put(json.dumps(["EOSE", sub_id]))
 
                 elif msg_type == "CLOSE":
                     sub_id = data[1]
-                    if sub_id in subscriptions:
-                        del subscriptions[sub_id]
-                        logging.info(f"Closed subscription: {sub_id}")
+                    if sub_id in conn.subscriptions:
+                        dispatcher.unsubscribe(conn, sub_id)
+                        logging.info(f"Closed subscription: {client_id}/{sub_id}")
 
             except json.JSONDecodeError:
                 logging.error("Invalid JSON message received")
+            except ConnectionError:
+                break
             except Exception as e:
                 logging.error(f"Error processing message: {e}")
 
     except websockets.ConnectionClosed:
         logging.info(f"Connection closed: {client_id}")
     finally:
-        subscriptions_to_remove = [sub_id for sub_id, (client, _) in subscriptions.items() 
-                                 if client == websocket]
-        for sub_id in subscriptions_to_remove:
-            del subscriptions[sub_id]
-
-def matches_filter(event, filters):
-    if not filters:
-        return True
-    if "kinds" in filters and event.get("kind") not in filters["kinds"]:
-        return False
-    if "authors" in filters and event.get("pubkey") not in filters["authors"]:
-        return False
-    if "ids" in filters and event.get("id") not in filters["ids"]:
-        return False
-    return True
+        dispatcher.unregister(conn)
 
 # Web app endpoints
 @app.get("/", response_class=HTMLResponse)
@@ -109,8 +253,7 @@ async def get_web_app():
             </section>
         </main>
         <script>
-            async function fetchData() {
-                // Fetch relays
+            async function fetchRelays() {
                 const relayResponse = await fetch('/relays');
                 const relays = await relayResponse.json();
                 document.getElementById('relay-list').innerHTML = relays.map(r => `
@@ -121,11 +264,10 @@ async def get_web_app():
                         </span>
                     </div>
                 `).join('');
+            }
 
-                // Fetch events
-                const eventResponse = await fetch('/events');
-                const events = await eventResponse.json();
-                document.getElementById('events').innerHTML = events.map(e => `
+            function renderEvent({event: e, received_at: receivedAt}) {
+                return `
                     <div class="event-card bg-white p-6 rounded-lg shadow">
                         <div class="flex items-center mb-2">
                             <div class="w-10 h-10 bg-indigo-200 rounded-full flex items-center justify-center text-indigo-800 font-bold">
@@ -133,15 +275,25 @@ async def get_web_app():
                             </div>
                             <div class="ml-3">
                                 <p class="font-medium text-gray-800">${e.pubkey.slice(0, 8)}...</p>
-                                <p class="text-sm text-gray-500">${new Date(e.received_at).toLocaleString()}</p>
+                                <p class="text-sm text-gray-500">${new Date(receivedAt * 1000).toLocaleString()}</p>
                             </div>
                         </div>
                         <p class="text-gray-700">${e.content}</p>
                     </div>
-                `).join('');
+                `;
             }
-            fetchData();
-            setInterval(fetchData, 5000); // Refresh every 5 seconds
+
+            fetchRelays();
+            // Streams the stored history once, then only new events. EventSource reconnects
+            // by itself and resumes after the last event id it saw.
+            const shown = new Set();
+            const stream = new EventSource('/events/stream');
+            stream.onmessage = (msg) => {
+                const item = JSON.parse(msg.data);
+                if (shown.has(item.event.id)) return;
+                shown.add(item.event.id);
+                document.getElementById('events').insertAdjacentHTML('beforeend', renderEvent(item));
+            };
         </script>
     </body>
     </html>
@@ -150,24 +302,183 @@ async def get_web_app():
 
 @app.get("/relays")
 async def get_relays():
-    return [{"url": "ws://localhost:8765", "status": "active"}]
+    return [{"url": f"ws://{RELAY_HOST}:{args.port}", "status": "active"}]
 
 @app.get("/events")
-async def get_events():
-    return events
+async def get_events(after: int = 0, limit: int = Query(100, ge=1, le=1000)):
+    """Events that arrived after the `after` cursor, oldest first. Pass `next` back as `after` for the next page."""
+    return Response(content=relay_feed.events_page(store, after, limit), media_type="application/json")
+
+@app.get("/events/stream")
+async def stream_events(request: Request, after: int = 0):
+    """Server-sent events: every stored event after the cursor, then new events as they arrive."""
+    cursor = relay_feed.resume_cursor(store, request.headers.get("last-event-id"), after)
+    return StreamingResponse(relay_feed.stream_frames(store, cursor, lambda: new_events),
+                             media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.get("/quarantine")
+async def get_quarantine(after: int = 0, limit: int = Query(100, ge=1, le=1000)):
+    """Alerts rejected for an invalid FROST signature (--invalid-frost quarantine), paged like /events."""
+    return Response(content=relay_feed.events_page(quarantine, after, limit), media_type="application/json")
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus text format: this relay process's gauges, counters and stage histograms, plus
+    the broadcast pipeline's stages from the runs recorded in metrics.jsonl."""
+    gauges = [("relay_events_stored", "Events held in the store.", len(store)),
+              ("relay_last_seq", "Arrival sequence number of the newest event.", store.last_seq),
+              ("relay_connections", "Open WebSocket connections.", len(dispatcher.connections)),
+              ("relay_dropped_frames", "Live frames dropped for slow subscribers on open connections.",
+               sum(conn.dropped for conn in dispatcher.connections)),
+              ("relay_frost_verified_events", "Stored events with a verified FROST signature.", len(store.by_verified)),
+              ("relay_quarantined_events", "Alerts held in quarantine.", len(quarantine))]
+    counters = []
+    if verifier is not None:
+        counters += [("relay_frost_verified_total", "Alerts whose FROST signature verified since start.", verifier.verified),
+                     ("relay_frost_invalid_total", "Alerts whose FROST signature failed since start.", verifier.invalid),
+                     ("relay_frost_batches_total", "Verification batches run since start.", verifier.batches)]
+    body = "".join(f"# HELP {name} {help_text}\n# TYPE {name} {kind}\n{name} {value}\n"
+                   for kind, samples in (("gauge", gauges), ("counter", counters)) for name, help_text, value in samples)
+    body += metrics.REGISTRY.render("relay_stage_seconds", "Time spent per relay stage.")
+    body += pipeline_runs.refresh().render("frost_pipeline_stage_seconds", "Time per broadcast pipeline stage, per recorded run.")
+    return Response(content=body, media_type="text/plain; version=0.0.4")
+
+def open_event_log():
+    global event_log
+    event_log = EventLog(args.data_dir, segment_bytes=args.segment_mb * 1024 * 1024,
+                         fsync_interval=args.fsync_interval, max_age=args.max_age)
+    event_log.open(store)
+
+async def follow_hub(reader):
+    """Worker side of the hub: store and fan out every event any worker accepted, this one
+    included, under the seq the hub gave it."""
+    while line := await reader.readline():
+        seq, received_at, verified, raw = parse_numbered_hub_line(line)
+        store_event(relay_json.loads(raw), received_at, verified, raw, seq)
+    logging.error("Lost the connection to the worker hub")
 
 # Run both WebSocket server and FastAPI
-async def main():
+def start_verifier():
+    global verifier
+    keys = list(args.frost_key or [])
+    if not keys:
+        # Only the named groups' keys are loaded; by default every group in the keyring index.
+        import frost_keyring
+        for group in args.group or sorted(frost_keyring.groups()):
+            keys.append(frost_keyring.verifying_key(group).to_b64())
+    if not keys:
+        raise SystemExit("--verify-frost needs a group key: run 'python cli.py generate' or pass --frost-key")
+    verifier = relay_verify.FrostVerifier(keys, batch_size=args.verify_batch, max_delay=args.verify_delay_ms / 1000,
+                                          workers=args.verify_workers)
+    logging.info(f"Verifying FROST alerts against {len(keys)} group key(s)")
+
+async def main(hub=None, web_socket=None):
+    global hub_writer
+    if args.verify_frost:
+        start_verifier()
+    if hub is not None:
+        reader, hub_writer = await asyncio.open_connection(sock=hub, limit=HUB_LINE_LIMIT)
+        spawn(follow_hub(reader))
+    elif args.data_dir:
+        open_event_log()
+        spawn(event_log.run(store))
+
+    # Workers share the port; the kernel spreads new connections across them.
     websocket_server = await websockets.serve(
         handle_connection,
-        "localhost",
-        8765
+        RELAY_HOST,
+        args.port,
+        reuse_port=hub is not None
     )
-    logging.info("Nostr relay running on ws://localhost:8765")
+    logging.info(f"Nostr relay running on ws://{RELAY_HOST}:{args.port} (pid {os.getpid()})")
     
-    config = uvicorn.Config(app, host="0.0.0.0", port=8000, log_level="info")
+    config = uvicorn.Config(app, host="0.0.0.0", port=args.web_port, log_level="info")
     server = uvicorn.Server(config)
-    await server.serve()
+    try:
+        await server.serve(sockets=[web_socket] if web_socket is not None else None)
+    finally:
+        if verifier is not None:
+            verifier.close()
+        if event_log is not None:
+            event_log.close()
+
+async def run_hub(worker_sockets):
+    """Master side of the hub: number each event, persist it once and pass it on to every worker."""
+    streams = [await asyncio.open_connection(sock=sock, limit=HUB_LINE_LIMIT) for sock in worker_sockets]
+    writers = [writer for _, writer in streams]
+
+    async def forward(reader):
+        while line := await reader.readline():
+            received_at, verified, raw = parse_hub_line(line)
+            entry = store.add(relay_json.loads(raw), raw)
+            if entry is None:
+                continue  # two workers accepted the same event; the first one wins
+            entry.received_at = received_at
+            if event_log is not None:
+                event_log.append(entry, raw.encode())
+            if verified:
+                store.mark_verified([entry])
+                if event_log is not None:
+                    event_log.mark_verified(entry)
+            numbered = hub_line(received_at, verified, raw, entry.seq)
+            for writer in writers:
+                writer.write(numbered)
+
+    if event_log is not None:
+        spawn(event_log.run(store))
+    try:
+        await asyncio.gather(*(forward(reader) for reader, _ in streams))
+    finally:
+        if event_log is not None:
+            event_log.close()
+
+def run_workers(count):
+    """Fork `count` relay workers that share the relay and dashboard ports.
+
+    The master loads the event log, forks, and then runs the hub: each worker sends
+    the events it accepts to the master over a socketpair, and the master writes
+    them to the log and forwards them to the other workers.
+    """
+    global event_log
+    if args.data_dir:
+        open_event_log()
+        for entry in store:
+            entry.raw  # read into memory before forking; only the master keeps the log mapped
+    web_socket = socket.create_server(("0.0.0.0", args.web_port))
+    pairs = [socket.socketpair() for _ in range(count)]
+    children = []
+    for worker, (master_end, worker_end) in enumerate(pairs):
+        pid = os.fork()
+        if pid == 0:
+            for other_master_end, other_worker_end in pairs:
+                other_master_end.close()
+                if other_worker_end is not worker_end:
+                    other_worker_end.close()
+            event_log = None  # only the master writes the log
+            try:
+                asyncio.run(main(hub=worker_end, web_socket=web_socket))
+            finally:
+                os._exit(0)
+        worker_end.close()
+        children.append(pid)
+        logging.info(f"Started relay worker {worker} (pid {pid})")
+    web_socket.close()
+    try:
+        asyncio.run(run_hub([master_end for master_end, _ in pairs]))
+    finally:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+                os.waitpid(pid, 0)
+            except ProcessLookupError:
+                pass
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = build_parser()
+    configure(parser.parse_args())
+    if args.workers > 1:
+        if not hasattr(os, "fork"):
+            parser.error("--workers needs a platform with fork(); run a single process instead")
+        run_workers(args.workers)
+    else:
+        asyncio.run(main())
@@ -0,0 +1,37 @@
+"""Digest signing for large alert payloads (maps, PDFs, attachments).
+
+Instead of the payload itself the group signs a short statement naming its
+SHA-256 digest, "FROST-DIGEST-v1 sha256:<hex>". The digest is the plain
+SHA-256 of the file (what `sha256sum` prints), computed in fixed-size chunks
+so memory use does not grow with the payload. Plain text alerts may not
+start with the statement prefix, so a signature over an alert can never be
+read as a signature over a file, or the other way round.
+"""
+import os
+import hashlib
+
+STATEMENT_PREFIX = "FROST-DIGEST-v1 "
+CHUNK_SIZE = 1024 * 1024
+
+def file_digest(path, chunk_size=CHUNK_SIZE):
+    """(sha256 hex digest, size in bytes) of a file, read through one reused buffer."""
+    digest = hashlib.sha256()
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    size = 0
+    with open(path, "rb", buffering=0) as f:
+        while n := f.readinto(buffer):
+            digest.update(view[:n])
+            size += n
+    return digest.hexdigest(), size
+
+def statement(digest_hex):
+    """The message that is signed for a payload with this digest."""
+    return f"{STATEMENT_PREFIX}sha256:{digest_hex}"
+
+def is_statement(message):
+    return message.startswith(STATEMENT_PREFIX)
+
+def ledger_fields(path, digest_hex, size):
+    # Stored next to the signature instead of the payload.
+    return {"digest": f"sha256:{digest_hex}", "file": os.path.abspath(path), "size": size}
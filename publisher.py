@@ -0,0 +1,201 @@
+"""Long-running Nostr publisher.
+
+Keeps warm connections to the configured relays and publishes FROST-signed
+alerts from an in-process queue. `cli.py broadcast` hands alerts over a local
+TCP socket (one JSON object per line) instead of starting `nostr.py` each time.
+
+    python publisher.py --relay ws://localhost:8765    # against own_relay.py
+"""
+import asyncio
+import argparse
+import json
+import logging
+import socket
+import time
+import metrics
+import frost_keyring
+from collections import deque
+
+PUBLISHER_HOST = "127.0.0.1"
+PUBLISHER_PORT = 8790
+LATENCY_WINDOW = 1000  # samples kept per relay
+SEND_TIMEOUT = 10.0
+
+logging.basicConfig(level=logging.INFO)
+
+class RelayStats:
+    def __init__(self):
+        self.sent = 0
+        self.failed = 0
+        self.last_error = None
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def record(self, ok, latency, error=None):
+        if ok:
+            self.sent += 1
+            self.latencies.append(latency)
+        else:
+            self.failed += 1
+            self.last_error = error
+
+    def summary(self):
+        ordered = sorted(self.latencies)
+
+        def pct(p):
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 2) if ordered else None
+
+        return {"sent": self.sent, "failed": self.failed, "last_error": self.last_error,
+                "p50_ms": pct(0.50), "p95_ms": pct(0.95), "max_ms": pct(1.0)}
+
+class Publisher:
+    def __init__(self, relays):
+        self.relays = relays
+        self.queue = asyncio.Queue()
+        self.stats = {url: RelayStats() for url in relays}
+        self.client = None
+        self.keys = None
+
+    async def start(self):
+        # nostr_sdk is only needed by the long-running process, not by its clients.
+        from nostr_sdk import Keys, Client, NostrSigner
+        import nostr
+
+        self.keys = Keys.parse(nostr.NOSTR_PRIVATE_KEY)
+        self.client = Client(NostrSigner.keys(self.keys))
+        for url in self.relays:
+            await self.client.add_relay(url)
+        await self.client.connect()
+        ready = await nostr.wait_for_relays(self.client)
+        logging.info(f"Publisher connected to {len(ready)}/{len(self.relays)} relays: {ready}")
+
+    async def ensure_connected(self):
+        import nostr
+
+        ready = await nostr.wait_for_relays(self.client, timeout=0)
+        if len(ready) < len(self.relays):
+            await self.client.connect()  # reconnects dropped relays, no-op for live ones
+            ready = await nostr.wait_for_relays(self.client)
+        return ready
+
+    async def publish(self, frost_message, frost_signature_b64, fingerprint=None):
+        from nostr_sdk import EventBuilder
+        import nostr
+
+        with metrics.timer("publisher.verify"):
+            nostr.check_frost_signature(frost_message, frost_signature_b64, fingerprint)
+        with metrics.timer("publisher.connect"):
+            ready = await self.ensure_connected()
+        if not ready:
+            raise ConnectionError("No relay is connected.")
+        content = nostr.frost_event_content(frost_message, frost_signature_b64, fingerprint)
+        event = EventBuilder.text_note(content).sign_with_keys(self.keys)
+
+        async def send_to(url):
+            start = time.perf_counter()
+            try:
+                res = await asyncio.wait_for(self.client.send_event_to([url], event), SEND_TIMEOUT)
+                ok = url in res.success
+                error = None if ok else str(res.failed.get(url, "rejected"))
+            except Exception as e:
+                ok, error = False, str(e)
+            self.stats.setdefault(url, RelayStats()).record(ok, time.perf_counter() - start, error)
+            return url, ok, error
+
+        with metrics.timer("publisher.publish"):
+            results = await asyncio.gather(*(send_to(url) for url in ready))
+        event_id = event.id().to_bech32()
+        logging.info(f"Published {event_id}: " + ", ".join(f"{url}={'ok' if ok else error}" for url, ok, error in results))
+        return {"event_id": event_id,
+                "sent": [url for url, ok, _ in results if ok],
+                "failed": {url: error for url, ok, error in results if not ok}}
+
+    async def worker(self):
+        while True:
+            frost_message, frost_signature_b64, fingerprint, future = await self.queue.get()
+            started = time.perf_counter()
+            try:
+                result = await self.publish(frost_message, frost_signature_b64, fingerprint)
+                if not future.done():
+                    future.set_result(result)
+            except Exception as e:
+                logging.error(f"Publish failed: {e}")
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                self.queue.task_done()
+                metrics.observe("publisher.total", time.perf_counter() - started)
+                metrics.flush("publisher")  # one run per published alert
+
+    def submit(self, frost_message, frost_signature_b64, fingerprint=None):
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((frost_message, frost_signature_b64, fingerprint, future))
+        return future
+
+    async def handle_client(self, reader, writer):
+        try:
+            while line := await reader.readline():
+                request = json.loads(line)
+                if request.get("op") == "stats":
+                    response = {url: s.summary() for url, s in self.stats.items()}
+                else:
+                    future = self.submit(request["message"], request["signature"], request.get("fingerprint"))
+                    if request.get("wait", True):
+                        try:
+                            response = {"ok": True, **await future}
+                        except Exception as e:
+                            response = {"ok": False, "error": str(e)}
+                    else:
+                        response = {"ok": True, "queued": self.queue.qsize()}
+                writer.write((json.dumps(response) + "\n").encode())
+                await writer.drain()
+        except Exception as e:
+            logging.error(f"Publisher client error: {e}")
+        finally:
+            writer.close()
+
+async def serve(relays, host=PUBLISHER_HOST, port=PUBLISHER_PORT):
+    publisher = Publisher(relays)
+    await publisher.start()
+    worker = asyncio.create_task(publisher.worker())
+    server = await asyncio.start_server(publisher.handle_client, host, port)
+    logging.info(f"Publisher listening on {host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        worker.cancel()
+
+def hand_off(frost_message, frost_signature_b64, fingerprint=None, wait=True, host=PUBLISHER_HOST, port=PUBLISHER_PORT,
+             timeout=SEND_TIMEOUT + 5):
+    """Send an alert, with its signing group's key fingerprint, to a running publisher.
+    Returns its response, or None if none is listening."""
+    try:
+        sock = socket.create_connection((host, port), timeout=0.5)
+    except OSError:
+        return None
+    with sock:
+        try:
+            sock.settimeout(timeout)
+            request = {"message": frost_message, "signature": frost_signature_b64, "fingerprint": fingerprint, "wait": wait}
+            sock.sendall((json.dumps(request) + "\n").encode())
+            with sock.makefile("r") as f:
+                return json.loads(f.readline())
+        except (OSError, ValueError) as e:
+            # The alert was handed over; report the failure instead of publishing it twice.
+            return {"ok": False, "error": f"no answer from publisher: {e}"}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Persistent Nostr publisher for FROST alerts")
+    parser.add_argument("--relay", action="append", help="Relay URL (repeatable); defaults to relays.json or the built-in list")
+    parser.add_argument("--host", default=PUBLISHER_HOST)
+    parser.add_argument("--port", type=int, default=PUBLISHER_PORT)
+    parser.add_argument("--group", type=str, default=frost_keyring.DEFAULT_GROUP, help="Key group for alerts handed over without a key fingerprint")
+    args = parser.parse_args()
+    frost_keyring.select(args.group)
+
+    if args.relay:
+        relays = args.relay
+    else:
+        import nostr
+        relays = nostr.load_relays()
+    asyncio.run(serve(relays, args.host, args.port))
@@ -0,0 +1,147 @@
+"""Subscription fan-out for own_relay.py.
+
+Every connection gets a bounded outbound queue drained by its own writer
+task, so a slow subscriber never delays the publisher or other clients.
+When a live event finds a full queue, the connection's policy either drops
+its oldest queued frame ("drop-oldest") or disconnects it ("disconnect").
+Subscriptions are keyed per connection and indexed by the most selective
+field of each filter (ids, then authors, then kinds), so an incoming event
+is only matched against subscriptions that can want it.
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from relay_store import matches_any
+
+DEFAULT_QUEUE_SIZE = 1000
+SLOW_CONSUMER_POLICIES = ("drop-oldest", "disconnect")
+
+class Connection:
+    def __init__(self, websocket, queue_size=DEFAULT_QUEUE_SIZE, policy="drop-oldest"):
+        self.websocket = websocket
+        self.policy = policy
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.subscriptions = {}  # sub_id -> filters
+        self.dropped = 0
+        self.closing = False
+        self.writer = asyncio.create_task(self._write_loop())
+
+    async def _write_loop(self):
+        try:
+            while True:
+                frame = await self.queue.get()
+                await self.websocket.send(frame)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.closing = True
+            logging.info(f"Writer for client_{id(self.websocket)} stopped: {e}")
+
+    async def put(self, frame):
+        """Queue a frame with backpressure; used for replies to this connection's own requests."""
+        try:
+            self.queue.put_nowait(frame)
+            return
+        except asyncio.QueueFull:
+            pass
+        # Wait for room, but give up if the writer dies (closed socket) while we wait.
+        waiter = asyncio.ensure_future(self.queue.put(frame))
+        await asyncio.wait({waiter, self.writer}, return_when=asyncio.FIRST_COMPLETED)
+        if not waiter.done():
+            waiter.cancel()
+            raise ConnectionError("connection writer stopped")
+
+    def offer(self, frame):
+        """Queue a live frame without waiting; applies the slow-consumer policy when full."""
+        if self.closing:
+            return
+        try:
+            self.queue.put_nowait(frame)
+            return
+        except asyncio.QueueFull:
+            pass
+        if self.policy == "disconnect":
+            self.closing = True
+            logging.warning(f"Disconnecting slow consumer client_{id(self.websocket)}")
+            asyncio.create_task(self.websocket.close(code=1008, reason="subscriber too slow"))
+            return
+        self.queue.get_nowait()
+        self.queue.put_nowait(frame)
+        self.dropped += 1
+
+    def close(self):
+        self.writer.cancel()
+
+def _normalize(f):
+    # Sets make the per-event membership checks O(1).
+    return {k: set(v) if k in ("ids", "authors", "kinds") else v for k, v in f.items()}
+
+class Dispatcher:
+    def __init__(self, queue_size=DEFAULT_QUEUE_SIZE, policy="drop-oldest"):
+        self.queue_size = queue_size
+        self.policy = policy
+        self.connections = set()
+        self.by_id = defaultdict(set)  # field value -> {(connection, sub_id)}
+        self.by_author = defaultdict(set)
+        self.by_kind = defaultdict(set)
+        self.wildcard = set()  # subscriptions with a filter that names no ids/authors/kinds
+        self._postings = {}  # (connection, sub_id) -> [(index, value)] for removal
+
+    def register(self, websocket):
+        conn = Connection(websocket, self.queue_size, self.policy)
+        self.connections.add(conn)
+        return conn
+
+    def unregister(self, conn):
+        for sub_id in list(conn.subscriptions):
+            self.unsubscribe(conn, sub_id)
+        self.connections.discard(conn)
+        conn.close()
+
+    def subscribe(self, conn, sub_id, filters):
+        self.unsubscribe(conn, sub_id)
+        filters = [_normalize(f) for f in filters]
+        key = (conn, sub_id)
+        postings = []
+        for f in filters or [{}]:
+            for field, index in (("ids", self.by_id), ("authors", self.by_author), ("kinds", self.by_kind)):
+                if field in f:
+                    postings.extend((index, value) for value in f[field])
+                    break
+            else:
+                postings.append((None, None))
+        for index, value in postings:
+            if index is None:
+                self.wildcard.add(key)
+            else:
+                index[value].add(key)
+        conn.subscriptions[sub_id] = filters
+        self._postings[key] = postings
+        return filters
+
+    def unsubscribe(self, conn, sub_id):
+        key = (conn, sub_id)
+        for index, value in self._postings.pop(key, []):
+            if index is None:
+                self.wildcard.discard(key)
+                continue
+            subs = index.get(value)
+            if subs is not None:
+                subs.discard(key)
+                if not subs:
+                    del index[value]
+        conn.subscriptions.pop(sub_id, None)
+
+    def candidates(self, event):
+        keys = set(self.wildcard)
+        for index, value in ((self.by_id, event.get("id")), (self.by_author, event.get("pubkey")), (self.by_kind, event.get("kind"))):
+            subs = index.get(value)
+            if subs:
+                keys |= subs
+        return keys
+
+    def dispatch(self, event, encode, verified=False):
+        """Offer `encode(sub_id)` to every subscription whose filters match the event."""
+        for conn, sub_id in self.candidates(event):
+            if matches_any(event, conn.subscriptions[sub_id], verified):
+                conn.offer(encode(sub_id))
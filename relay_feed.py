@@ -0,0 +1,44 @@
+"""The dashboard feed of own_relay.py: /events pages and the /events/stream server-sent events.
+
+Both read the store by arrival cursor, the seq of the last event a client has
+seen. With --workers the hub numbers every event and each worker stores it
+under that number, so a cursor handed out by one worker resumes correctly on
+any other.
+"""
+import asyncio
+
+STREAM_BATCH = 500  # Events per read while a dashboard stream catches up
+STREAM_KEEPALIVE = 15.0  # Seconds between SSE comments on an idle stream
+
+def viewer_item(entry):
+    # The stored event text spliced in as-is; the relay's own metadata sits beside it.
+    return '{"received_at":' + repr(entry.received_at or 0.0) + ',"event":' + entry.raw + "}"
+
+def events_page(store, after, limit):
+    """JSON body of one page: the events after the `after` cursor, oldest first, and the cursor
+    to pass back for the next page."""
+    entries = store.after(after, limit)
+    next_cursor = entries[-1].seq if entries else max(after, 0)
+    return '{"events":[' + ",".join(viewer_item(entry) for entry in entries) + '],"next":' + str(next_cursor) + "}"
+
+def resume_cursor(store, last_event_id, after=0):
+    """Where a stream resumes: after its Last-Event-ID header if it sent one, else after `after`."""
+    cursor = int(last_event_id) if last_event_id and last_event_id.isdigit() else after
+    if cursor > store.last_seq:
+        return 0  # seqs are reassigned when the relay restarts; start over
+    return cursor
+
+async def stream_frames(store, cursor, next_change, keepalive=STREAM_KEEPALIVE):
+    """SSE frames of every stored event after `cursor`, then of new events as they arrive.
+    `next_change()` returns the asyncio.Event that is set when the next event is stored."""
+    while True:
+        waiter = next_change()  # taken before reading, so an event stored in between still wakes us
+        entries = store.after(cursor, STREAM_BATCH)
+        if entries:
+            cursor = entries[-1].seq
+            yield "".join(f"id: {entry.seq}\ndata: {viewer_item(entry)}\n\n" for entry in entries)
+            continue
+        try:
+            await asyncio.wait_for(waiter.wait(), keepalive)
+        except asyncio.TimeoutError:
+            yield ": keepalive\n\n"
@@ -0,0 +1,31 @@
+"""JSON codec for the relay's hot paths.
+
+Uses orjson when it is installed and the standard library otherwise. Both
+produce compact UTF-8 JSON as `str`, since Nostr frames are WebSocket text
+frames. Events are serialized once on arrival; outgoing frames are built by
+splicing that text, so a frame never re-serializes the event.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+def dumps(obj):
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+def loads(data):
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers catch the latter.
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def frame_prefix(sub_id):
+    """Everything before the event in an ["EVENT", sub_id, event] frame."""
+    return '["EVENT",' + dumps(sub_id) + ","
+
+def event_frame(sub_id, raw):
+    return frame_prefix(sub_id) + raw + "]"
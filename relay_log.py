@@ -0,0 +1,326 @@
+"""Durable segment log for own_relay.py.
+
+Events are appended to numbered segment files (`00000001.log`, ...) as
+[length, crc32][JSON] records. Each segment has a fixed-width index file
+(`00000001.idx`) holding every record's offset, length and the fields the
+in-memory indexes need. On startup the index files are read through mmap and
+the store is rebuilt from them without parsing any event JSON. Event bodies
+are read from the memory-mapped segments the first time they are needed.
+
+Writes are buffered and fsynced in batches, either every `fsync_batch`
+records or every `fsync_interval` seconds. The active segment rotates at
+`segment_bytes`. Segments whose events were all evicted or expired are
+deleted, and mostly-dead segments are rewritten with only their live
+records.
+
+Ids of events whose FROST signature was verified on ingest are appended to
+`verified.ids` (raw 32-byte ids) and re-applied to the store on startup.
+"""
+import os
+import mmap
+import zlib
+import time
+import struct
+import asyncio
+import logging
+import relay_json
+from relay_store import StoredEvent
+
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+DEFAULT_FSYNC_INTERVAL = 0.2  # seconds
+DEFAULT_FSYNC_BATCH = 256  # records
+COMPACT_LIVE_RATIO = 0.5
+VERIFIED_FILE = "verified.ids"
+ID_SIZE = 32
+
+RECORD_HEADER = struct.Struct("<II")  # payload length, crc32
+# offset, length, created_at, received_at, id, pubkey, kind
+INDEX_RECORD = struct.Struct("<QIqd32s32si")
+CREATED_AT_RANGE = (-2**63, 2**63 - 1)  # the index's int64 field
+KIND_RANGE = (0, 65535)  # NIP-01 kinds; fits the index's int32 field
+
+def _hex32(value):
+    try:
+        raw = bytes.fromhex(value)
+    except (TypeError, ValueError):
+        return None
+    return raw if len(raw) == 32 else None
+
+def _int_in(value, bounds):
+    return isinstance(value, int) and not isinstance(value, bool) and bounds[0] <= value <= bounds[1]
+
+def is_indexable(event):
+    """The log stores ids and pubkeys as raw 32-byte values and created_at and kind as fixed-width
+    integers, as NIP-01 requires them to be."""
+    return (isinstance(event, dict) and _hex32(event.get("id")) is not None and _hex32(event.get("pubkey")) is not None
+            and _int_in(event.get("created_at"), CREATED_AT_RANGE) and _int_in(event.get("kind"), KIND_RANGE))
+
+class Segment:
+    def __init__(self, directory, number):
+        self.number = number
+        self.log_path = os.path.join(directory, f"{number:08d}.log")
+        self.idx_path = os.path.join(directory, f"{number:08d}.idx")
+        self.size = os.path.getsize(self.log_path) if os.path.exists(self.log_path) else 0
+        self.total = 0  # records in the segment
+        self.live = 0  # records still held by the store
+        self._mm = None
+
+    def read(self, offset, length):
+        """Payload bytes of the record at `offset`, read through mmap."""
+        end = offset + RECORD_HEADER.size + length
+        if self._mm is None or len(self._mm) < end:
+            self.unmap()
+            with open(self.log_path, "rb") as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mm[offset + RECORD_HEADER.size:end]
+
+    def unmap(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+class EventLog:
+    def __init__(self, directory, segment_bytes=DEFAULT_SEGMENT_BYTES,
+                 fsync_interval=DEFAULT_FSYNC_INTERVAL, fsync_batch=DEFAULT_FSYNC_BATCH, max_age=None):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync_interval = fsync_interval
+        self.fsync_batch = fsync_batch
+        self.max_age = max_age  # seconds of created_at history to keep, None = no age limit
+        self.segments = {}
+        self.active = None
+        self._log_file = None
+        self._idx_file = None
+        self._verified_file = None
+        self._verified_written = 0  # ids in VERIFIED_FILE, live or not
+        self._pending = 0
+
+    # -- startup -----------------------------------------------------------
+
+    def open(self, store):
+        """Recover every segment, bulk-load its index into `store`, and start appending."""
+        os.makedirs(self.directory, exist_ok=True)
+        numbers = sorted(int(name[:-4]) for name in os.listdir(self.directory) if name.endswith(".log"))
+        entries = []
+        for number in numbers:
+            segment = Segment(self.directory, number)
+            self._recover(segment)
+            entries.extend(self._read_index(segment))
+            self.segments[number] = segment
+        for entry in store.load(entries):
+            entry.location[0].live += 1
+        store.on_remove.append(self._on_remove)
+        if self.max_age:
+            # Records that expired before the last compaction are still on disk.
+            store.expire(time.time() - self.max_age)
+        self._load_verified(store)
+        self._activate(numbers[-1] if numbers else 1)
+        logging.info(f"Relay log: loaded {len(store)} events from {len(numbers)} segments in {self.directory}")
+
+    def _recover(self, segment):
+        """Cut torn records off the log and index, and index records the index missed. A record
+        that cannot be indexed is skipped: it stays in the log as dead space, unreachable."""
+        idx_size = os.path.getsize(segment.idx_path) if os.path.exists(segment.idx_path) else 0
+        count = idx_size // INDEX_RECORD.size
+        indexed_end = 0
+        with open(segment.idx_path, "a+b") as idx:
+            # Drop index records pointing past the end of the log (log fsync lost, index kept).
+            while count:
+                idx.seek((count - 1) * INDEX_RECORD.size)
+                offset, length = INDEX_RECORD.unpack(idx.read(INDEX_RECORD.size))[:2]
+                indexed_end = offset + RECORD_HEADER.size + length
+                if indexed_end <= segment.size:
+                    break
+                count -= 1
+                indexed_end = 0
+            idx.truncate(count * INDEX_RECORD.size)
+            if indexed_end < segment.size:
+                with open(segment.log_path, "r+b") as log:
+                    log.seek(indexed_end)
+                    while indexed_end < segment.size:
+                        record = self._read_record(log)
+                        if record is None:
+                            logging.warning(f"Relay log: truncating torn tail of {segment.log_path} at {indexed_end}")
+                            log.truncate(indexed_end)
+                            segment.size = indexed_end
+                            break
+                        try:
+                            event = relay_json.loads(record)
+                            if not is_indexable(event):
+                                raise ValueError("id, pubkey, kind or created_at malformed")
+                            entry = StoredEvent.from_event(0, event)
+                            entry.received_at = time.time()
+                            idx.write(self._index_record(indexed_end, len(record), entry))
+                        except (ValueError, struct.error) as e:
+                            logging.warning(f"Relay log: skipping unindexable record at {indexed_end} of {segment.log_path}: {e}")
+                        indexed_end = log.tell()
+
+    @staticmethod
+    def _read_record(f):
+        header = f.read(RECORD_HEADER.size)
+        if len(header) < RECORD_HEADER.size:
+            return None
+        length, crc = RECORD_HEADER.unpack(header)
+        payload = f.read(length)
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            return None
+        return payload
+
+    @staticmethod
+    def _index_record(offset, length, entry):
+        return INDEX_RECORD.pack(offset, length, entry.created_at, entry.received_at or 0.0,
+                                 bytes.fromhex(entry.id), bytes.fromhex(entry.pubkey), entry.kind)
+
+    def _read_index(self, segment):
+        entries = []
+        if not os.path.getsize(segment.idx_path):
+            return entries
+        with open(segment.idx_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for offset, length, created_at, received_at, raw_id, raw_pubkey, kind in INDEX_RECORD.iter_unpack(mm):
+                entries.append(StoredEvent(0, raw_id.hex(), raw_pubkey.hex(), kind, created_at,
+                                           location=(segment, offset, length), received_at=received_at))
+        segment.total = len(entries)
+        return entries
+
+    def _load_verified(self, store):
+        path = os.path.join(self.directory, VERIFIED_FILE)
+        data = b""
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                data = f.read()
+        whole = len(data) - len(data) % ID_SIZE  # a torn last id is dropped, leaving that event unverified
+        self._verified_written = whole // ID_SIZE
+        ids = (data[i:i + ID_SIZE].hex() for i in range(0, whole, ID_SIZE))
+        store.mark_verified([store.by_id[i] for i in ids if i in store.by_id])
+        self._verified_file = open(path, "ab")
+        self._verified_file.truncate(whole)
+
+    # -- appending ---------------------------------------------------------
+
+    def _activate(self, number):
+        self._close_files()
+        segment = self.segments.get(number) or Segment(self.directory, number)
+        self.segments[number] = segment
+        self.active = segment
+        self._log_file = open(segment.log_path, "ab")
+        self._idx_file = open(segment.idx_path, "ab")
+
+    def append(self, entry, payload):
+        """Append an event's serialized JSON and record where it lives on the entry."""
+        if self.active.size >= self.segment_bytes:
+            self.sync()
+            self._activate(self.active.number + 1)
+        segment = self.active
+        offset = segment.size
+        # Packed first: an entry the index cannot hold raises before anything is written.
+        index_record = self._index_record(offset, len(payload), entry)
+        self._log_file.write(RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+        self._idx_file.write(index_record)
+        segment.size += RECORD_HEADER.size + len(payload)
+        segment.total += 1
+        segment.live += 1
+        entry.location = (segment, offset, len(payload))
+        self._pending += 1
+        if self._pending >= self.fsync_batch:
+            self.sync()
+
+    def mark_verified(self, entry):
+        """Persist that an appended event's FROST signature was verified."""
+        self._verified_file.write(bytes.fromhex(entry.id))
+        self._verified_written += 1
+        self._pending += 1
+
+    def sync(self):
+        if not self._pending:
+            return
+        # Log first, then index: recovery trusts the index only as far as the log reaches.
+        # The verified ids go last, so a crash can only lose a mark, never mark a lost event.
+        for f in (self._log_file, self._idx_file, self._verified_file):
+            f.flush()
+            os.fsync(f.fileno())
+        self._pending = 0
+
+    def _on_remove(self, entry):
+        if entry.location is not None:
+            entry.location[0].live -= 1
+
+    # -- maintenance -------------------------------------------------------
+
+    def compact(self, store):
+        """Delete dead segments and rewrite mostly-dead ones. Returns segments touched."""
+        touched = 0
+        for number, segment in sorted(self.segments.items()):
+            if segment is self.active:
+                continue
+            if segment.live <= 0:
+                segment.unmap()
+                os.remove(segment.log_path)
+                os.remove(segment.idx_path)
+                del self.segments[number]
+                touched += 1
+            elif segment.live < segment.total * COMPACT_LIVE_RATIO:
+                self._rewrite(segment, [e for e in store.by_seq.values() if e.location and e.location[0] is segment])
+                touched += 1
+        if self._verified_written > 2 * len(store.by_verified) + 1024:
+            self._rewrite_verified(store)
+        return touched
+
+    def _rewrite_verified(self, store):
+        path = os.path.join(self.directory, VERIFIED_FILE)
+        live = [bytes.fromhex(store.by_seq[seq].id) for _, seq in store.by_verified]
+        self.sync()
+        self._verified_file.close()
+        with open(path + ".compact", "wb") as f:
+            f.write(b"".join(live))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".compact", path)
+        self._verified_file = open(path, "ab")
+        self._verified_written = len(live)
+
+    def _rewrite(self, segment, entries):
+        tmp_log, tmp_idx = segment.log_path + ".compact", segment.idx_path + ".compact"
+        moved = []
+        with open(tmp_log, "wb") as log, open(tmp_idx, "wb") as idx:
+            for entry in entries:
+                _, old_offset, length = entry.location
+                payload = segment.read(old_offset, length)
+                offset = log.tell()
+                log.write(RECORD_HEADER.pack(length, zlib.crc32(payload)) + payload)
+                idx.write(self._index_record(offset, length, entry))
+                moved.append((entry, offset))
+            for f in (log, idx):
+                f.flush()
+                os.fsync(f.fileno())
+        segment.unmap()
+        os.replace(tmp_log, segment.log_path)
+        os.replace(tmp_idx, segment.idx_path)
+        segment.size = os.path.getsize(segment.log_path)
+        segment.total = segment.live = len(moved)
+        for entry, offset in moved:
+            entry.location = (segment, offset, entry.location[2])
+
+    async def run(self, store, compact_every=60.0):
+        """Background task: batched fsync, age expiry and compaction."""
+        last_compaction = time.monotonic()
+        while True:
+            await asyncio.sleep(self.fsync_interval)
+            self.sync()
+            if time.monotonic() - last_compaction >= compact_every:
+                last_compaction = time.monotonic()
+                if self.max_age:
+                    store.expire(time.time() - self.max_age)
+                self.compact(store)
+
+    def _close_files(self):
+        for f in (self._log_file, self._idx_file):
+            if f is not None:
+                f.close()
+
+    def close(self):
+        self.sync()
+        self._close_files()
+        if self._verified_file is not None:
+            self._verified_file.close()
+        for segment in self.segments.values():
+            segment.unmap()
@@ -0,0 +1,250 @@
+"""In-memory event store for own_relay.py.
+
+Events are indexed by id, author and kind, plus a global index ordered by
+created_at, so a REQ only touches events that can match it. NIP-01
+`since`, `until` and `limit` are answered from the ordered indexes. The
+store is a ring buffer: once `max_events` is reached the oldest arrival is
+evicted. Events whose FROST signature the relay verified are also indexed, so
+a filter with `"frost_verified": true` (a relay extension) selects only them.
+"""
+import heapq
+import itertools
+import relay_json
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+
+DEFAULT_MAX_EVENTS = 100_000
+_MAX_SEQ = float("inf")
+FROST_VERIFIED = "frost_verified"  # filter extension: only events with a verified FROST signature
+
+def matches_filter(event, filters, verified=False):
+    if not filters:
+        return True
+    if filters.get(FROST_VERIFIED) and not verified:
+        return False
+    if "ids" in filters and event.get("id") not in filters["ids"]:
+        return False
+    if "authors" in filters and event.get("pubkey") not in filters["authors"]:
+        return False
+    if "kinds" in filters and event.get("kind") not in filters["kinds"]:
+        return False
+    created_at = event.get("created_at", 0)
+    if "since" in filters and created_at < filters["since"]:
+        return False
+    if "until" in filters and created_at > filters["until"]:
+        return False
+    for key, values in filters.items():
+        if len(key) == 2 and key[0] == "#":  # tag filters, e.g. {"#e": [...]}
+            tagged = {tag[1] for tag in event.get("tags", []) if len(tag) > 1 and tag[0] == key[1]}
+            if tagged.isdisjoint(values):
+                return False
+    return True
+
+def _matches_entry(entry, f):
+    # Like matches_filter, but answers indexed fields from the StoredEvent so a lazily
+    # loaded event is only parsed when the filter has tag conditions.
+    if "ids" in f and entry.id not in f["ids"]:
+        return False
+    if "authors" in f and entry.pubkey not in f["authors"]:
+        return False
+    if "kinds" in f and entry.kind not in f["kinds"]:
+        return False
+    if f.get(FROST_VERIFIED) and not entry.verified:
+        return False
+    if any(len(key) == 2 and key[0] == "#" for key in f):
+        return matches_filter(entry.event, f, entry.verified)
+    return True
+
+def matches_any(event, filters_list, verified=False):
+    return not filters_list or any(matches_filter(event, f, verified) for f in filters_list)
+
+class StoredEvent:
+    """Index fields of a stored event plus its JSON text, serialized once on arrival. The text
+    is either kept in memory or read on first use from `location`, a (segment, offset, length)
+    in the relay log; the parsed event is built from it when a filter or API needs fields."""
+    __slots__ = ("seq", "id", "pubkey", "kind", "created_at", "received_at", "_event", "_raw", "location", "verified")
+
+    def __init__(self, seq, id, pubkey, kind, created_at, event=None, location=None, received_at=None, raw=None):
+        self.seq = seq
+        self.id = id
+        self.pubkey = pubkey
+        self.kind = kind
+        self.created_at = created_at
+        self.received_at = received_at
+        self._event = event
+        self._raw = raw
+        self.location = location
+        self.verified = False  # set by EventStore.mark_verified
+
+    @classmethod
+    def from_event(cls, seq, event, raw=None):
+        return cls(seq, event["id"], event.get("pubkey"), event.get("kind"), event.get("created_at", 0), event, raw=raw)
+
+    @property
+    def raw(self):
+        """The event as compact JSON text, exactly as stored and sent to subscribers."""
+        if self._raw is None:
+            if self.location is not None:
+                segment, offset, length = self.location
+                self._raw = segment.read(offset, length).decode()
+            else:
+                self._raw = relay_json.dumps(self._event)
+        return self._raw
+
+    @property
+    def event(self):
+        if self._event is None:
+            self._event = relay_json.loads(self.raw)
+        return self._event
+
+    @property
+    def time_key(self):
+        return (self.created_at, self.seq)
+
+class EventStore:
+    def __init__(self, max_events=DEFAULT_MAX_EVENTS):
+        self.max_events = max_events
+        self._seq = itertools.count(1)
+        self.by_seq = {}  # arrival order; the first key is the next one to evict
+        self.by_id = {}
+        self.by_author = defaultdict(list)  # pubkey -> sorted [(created_at, seq)]
+        self.by_kind = defaultdict(list)  # kind -> sorted [(created_at, seq)]
+        self.by_time = []  # sorted [(created_at, seq)]
+        self.by_verified = []  # sorted [(created_at, seq)] of events with a verified FROST signature
+        self.on_remove = []  # callbacks run with each removed StoredEvent
+        self.last_seq = 0  # seq of the newest arrival; cursors for after() are seqs
+
+    def __len__(self):
+        return len(self.by_seq)
+
+    def add(self, event, raw=None, seq=None):
+        """Store an event (and its JSON text, if already serialized). Returns its StoredEvent,
+        or None if the id is already stored. `seq` overrides the store's own numbering, for
+        events numbered elsewhere (the worker hub); it must be above last_seq."""
+        if event["id"] in self.by_id:
+            return None
+        entry = StoredEvent.from_event(next(self._seq) if seq is None else seq, event, raw)
+        self.last_seq = entry.seq
+        key = entry.time_key
+        self.by_seq[entry.seq] = entry
+        self.by_id[entry.id] = entry
+        insort(self.by_author[entry.pubkey], key)
+        insort(self.by_kind[entry.kind], key)
+        insort(self.by_time, key)
+        while len(self.by_seq) > self.max_events:
+            self.remove(next(iter(self.by_seq.values())))
+        return entry
+
+    def load(self, entries):
+        """Bulk-insert StoredEvents (in arrival order) with one sort per index; used on startup."""
+        loaded = []
+        for entry in list(entries)[-self.max_events:] if self.max_events else []:
+            if entry.id in self.by_id:
+                continue
+            loaded.append(entry)
+            entry.seq = self.last_seq = next(self._seq)
+            key = entry.time_key
+            self.by_seq[entry.seq] = entry
+            self.by_id[entry.id] = entry
+            self.by_author[entry.pubkey].append(key)
+            self.by_kind[entry.kind].append(key)
+            self.by_time.append(key)
+        for keys in itertools.chain(self.by_author.values(), self.by_kind.values(), (self.by_time,)):
+            keys.sort()
+        while len(self.by_seq) > self.max_events:
+            self.remove(next(iter(self.by_seq.values())))
+        return loaded
+
+    def mark_verified(self, entries):
+        """Flag stored events as carrying a verified FROST signature."""
+        keys = [entry.time_key for entry in entries if not entry.verified]
+        for entry in entries:
+            entry.verified = True
+        if len(keys) == 1:
+            insort(self.by_verified, keys[0])
+        elif keys:
+            self.by_verified.extend(keys)
+            self.by_verified.sort()
+
+    def remove(self, entry):
+        key = entry.time_key
+        del self.by_seq[entry.seq]
+        del self.by_id[entry.id]
+        if entry.verified:
+            del self.by_verified[bisect_left(self.by_verified, key)]
+        for index, bucket in ((self.by_author, entry.pubkey), (self.by_kind, entry.kind)):
+            keys = index[bucket]
+            del keys[bisect_left(keys, key)]
+            if not keys:
+                del index[bucket]
+        del self.by_time[bisect_left(self.by_time, key)]
+        for callback in self.on_remove:
+            callback(entry)
+
+    def expire(self, before):
+        """Remove events whose created_at is older than `before`. Returns how many were removed."""
+        expired = [self.by_seq[seq] for created_at, seq in self.by_time[:bisect_left(self.by_time, (before, 0))]]
+        for entry in expired:
+            self.remove(entry)
+        return len(expired)
+
+    def after(self, cursor, limit=None):
+        """Stored events that arrived after `cursor` (a seq), oldest first, at most `limit`."""
+        found = []
+        if not self.by_seq:
+            return found
+        # Seqs are issued in order, so start at the oldest one still stored.
+        seq = max(cursor + 1, next(iter(self.by_seq)))
+        while seq <= self.last_seq and (limit is None or len(found) < limit):
+            entry = self.by_seq.get(seq)
+            if entry is not None:
+                found.append(entry)
+            seq += 1
+        return found
+
+    def __iter__(self):
+        """Stored events in arrival order."""
+        return iter(list(self.by_seq.values()))
+
+    def _candidates(self, f):
+        """Sorted (created_at, seq) lists that together cover every event the filter can match."""
+        if "ids" in f:
+            entries = [self.by_id[i] for i in f["ids"] if i in self.by_id]
+            return [sorted(e.time_key for e in entries)]
+        sources = []
+        if "authors" in f:
+            sources.append([self.by_author[a] for a in f["authors"] if a in self.by_author])
+        if "kinds" in f:
+            sources.append([self.by_kind[k] for k in f["kinds"] if k in self.by_kind])
+        if f.get(FROST_VERIFIED):
+            sources.append([self.by_verified])
+        if not sources:
+            return [self.by_time]
+        return min(sources, key=lambda lists: sum(len(keys) for keys in lists))
+
+    def _query_filter(self, f):
+        lo = (f.get("since", float("-inf")), 0)
+        hi = (f.get("until", float("inf")), _MAX_SEQ)
+        limit = f.get("limit")
+        if limit is not None and limit <= 0:
+            return []
+        # Walk every candidate list newest-first, restricted to [since, until].
+        ranges = [reversed(keys[bisect_left(keys, lo):bisect_right(keys, hi)]) for keys in self._candidates(f)]
+        found = []
+        for _, seq in heapq.merge(*ranges, reverse=True):
+            entry = self.by_seq[seq]
+            if _matches_entry(entry, f):
+                found.append(entry)
+                if limit is not None and len(found) >= limit:
+                    break
+        return found
+
+    def query(self, filters_list):
+        """Events matching any of the filters, newest first. Each filter's `limit` applies to that filter."""
+        if not filters_list:
+            filters_list = [{}]
+        results = {}
+        for f in filters_list:
+            for entry in self._query_filter(f):
+                results[entry.seq] = entry
+        return sorted(results.values(), key=lambda e: e.time_key, reverse=True)
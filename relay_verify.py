@@ -0,0 +1,128 @@
+"""FROST signature verification for events ingested by own_relay.py.
+
+Alerts carry their group signature in the content, as written by
+nostr.frost_event_content: "<message>\\nFROST Key: <fingerprint>\\nFROST
+Signature: <base64>", the key line naming the signing group's verifying-key
+fingerprint (see frost_keyring). An alert with a fingerprint is checked
+against that one key, found with a dict lookup; an unknown fingerprint is
+invalid without any crypto. Older alerts without the line are tried against
+every group key. Each alert is queued; the queue is verified as one batch
+when it reaches `batch_size` or `max_delay` seconds after its first entry,
+whichever comes first. Batches run on a thread pool through
+frostpy.verify_signatures_batch_py, which releases the GIL, so the event
+loop keeps serving while the crypto runs. At most `workers` batches are in
+flight; while they are, new alerts accumulate into the next batch.
+"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+SIGNATURE_MARKER = "\nFROST Signature: "
+KEY_MARKER = "\nFROST Key: "
+FINGERPRINT_LENGTH = 32
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_MAX_DELAY = 0.005  # seconds an alert waits for its batch to fill
+DEFAULT_WORKERS = 2
+
+def parse_frost_content(content):
+    """(message, signature_b64, fingerprint or None) from an alert's content, or None if it carries no FROST signature."""
+    if not isinstance(content, str):
+        return None
+    message, marker, signature_b64 = content.rpartition(SIGNATURE_MARKER)
+    if not marker or not signature_b64 or "\n" in signature_b64:
+        return None
+    signed, marker, fingerprint = message.rpartition(KEY_MARKER)
+    if marker and len(fingerprint) == FINGERPRINT_LENGTH and "\n" not in fingerprint:
+        return signed, signature_b64, fingerprint
+    return message, signature_b64, None
+
+class FrostVerifier:
+    def __init__(self, group_keys, batch_size=DEFAULT_BATCH_SIZE, max_delay=DEFAULT_MAX_DELAY, workers=DEFAULT_WORKERS):
+        # Imported here so the relay only needs frostpy when verification is on.
+        from frostpy import verify_signatures_batch_py
+        from frost_keyring import fingerprint
+        self._verify_signatures = verify_signatures_batch_py
+        self.group_keys = list(group_keys)  # base64 verifying keys; an alert without a fingerprint may match any of them
+        self.keys_by_fingerprint = {fingerprint(key): key for key in self.group_keys}
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.workers = workers
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="frost-verify")
+        self.verified = 0
+        self.invalid = 0
+        self.batches = 0
+        self._pending = []  # (message, signature_b64, key_b64 or None, future)
+        self._timer = None
+        self._in_flight = 0
+        self._tasks = set()
+
+    async def verify(self, message, signature_b64, fingerprint=None):
+        """True if the signature is valid for `message` under the group key with this fingerprint,
+        or under any group key when there is no fingerprint."""
+        key = None
+        if fingerprint is not None:
+            key = self.keys_by_fingerprint.get(fingerprint)
+            if key is None:
+                self.invalid += 1
+                return False
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((message, signature_b64, key, future))
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        # With every worker busy the queue keeps growing; _run flushes again when a batch finishes.
+        while self._pending and self._in_flight < self.workers:
+            batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+            self._in_flight += 1
+            task = asyncio.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.pool, self._verify_batch, [entry[:3] for entry in batch])
+        except Exception as e:
+            logging.error(f"FROST batch verification failed: {e}")
+            results = [False] * len(batch)
+        finally:
+            self._in_flight -= 1
+        self.batches += 1
+        for (*_, future), valid in zip(batch, results):
+            if valid:
+                self.verified += 1
+            else:
+                self.invalid += 1
+            if not future.done():
+                future.set_result(valid)
+        if self._pending:
+            self._flush()
+
+    def _verify_batch(self, entries):
+        # Worker thread. Entries with a known key go in one call as (message, signature, key)
+        # triples; the rest are tried key by key, retrying those that fail under the next.
+        results = [False] * len(entries)
+        keyed = [i for i, entry in enumerate(entries) if entry[2] is not None]
+        if keyed:
+            for i, ok in zip(keyed, self._verify_signatures([entries[i] for i in keyed])):
+                results[i] = ok
+        remaining = [i for i, entry in enumerate(entries) if entry[2] is None]
+        for key in self.group_keys:
+            if not remaining:
+                break
+            valid = self._verify_signatures([entries[i][:2] for i in remaining], key)
+            for i, ok in zip(remaining, valid):
+                results[i] = ok
+            remaining = [i for i, ok in zip(remaining, valid) if not ok]
+        return results
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
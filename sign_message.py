@@ -1,92 +1,209 @@
 import os
 import json
 from typing import List
-from frostpy import sign_message_py
+from frostpy import sign_with_packages_py, sign_messages_batch_py, commit_py, preprocess_py, sign_share_py, aggregate_py, last_timings_py
+import key_cache
+import frost_keyring
+import metrics
+import nonce_store
+import signature_ledger
 
 KEYS_DIR = "keys"
-SIGNATURES_FILE = os.path.join(KEYS_DIR, "signatures.txt")
-LATEST_SIGNATURE_FILE = os.path.join(KEYS_DIR, "latest_signature.txt")
+PUBLIC_KEY_PACKAGE_NAME = "public_key_package.txt"  # in the active group's key directory
+LATEST_SIGNATURE_NAME = "latest_signature.txt"  # in the active group's key directory
 
 def ensure_dir(path):
     os.makedirs(path, exist_ok=True)
 
-def read_share(file_path):
+def latest_signature_file():
+    return frost_keyring.key_path(LATEST_SIGNATURE_NAME)
+
+def load_key_package(file_path):
     try:
-        with open(file_path, "r") as f:
-            share_data = json.loads(f.read())
-        return share_data
+        return key_cache.load_key_package(file_path)
     except Exception as e:
         print(f"Error reading share from {file_path}: {e}")
         return None
 
-def collect_shares(share_paths: List[str]):
-    shares = []
+def key_fingerprint(key_package):
+    """Fingerprint of the group key a share signs for; nonces and pooled commitments carry it."""
+    return frost_keyring.fingerprint(key_package.verifying_key.to_b64())
+
+def collect_key_packages(share_paths: List[str]):
+    key_packages = []
     for path in share_paths:
-        share = read_share(path)
-        if share:
-            shares.append(share)
+        key_package = load_key_package(path)
+        if key_package:
+            key_packages.append(key_package)
         else:
             print(f"Skipping invalid share at {path}")
-    return shares
+    return key_packages
 
-def read_public_key_package():
-    file_path = os.path.join(KEYS_DIR, "public_key_package.txt")
+def load_public_key_package():
     try:
-        with open(file_path, "r") as f:
-            public_key_package = f.read()
-        print(f"Public key package loaded → {file_path}")
-        return public_key_package
+        return key_cache.load_public_key_package(frost_keyring.key_path(PUBLIC_KEY_PACKAGE_NAME))
     except Exception as e:
         print(f"Error reading public key package: {e}")
         return None
 
-def save_signature(signature: str, message: str):
+def group_fields():
+    # Ledger entries name the signing group so verification can find its key by fingerprint.
+    fields = {"group": frost_keyring.active()}
+    fp = frost_keyring.fingerprint_of()
+    if fp is not None:
+        fields["fingerprint"] = fp
+    return fields
+
+def save_signature(signature: str, message: str, extra=None):
     ensure_dir(KEYS_DIR)
-    # Append to signatures.txt as a list
-    entry = {"message": message, "signature": signature}
-    if os.path.exists(SIGNATURES_FILE):
-        with open(SIGNATURES_FILE, "r") as f:
-            signatures = json.load(f)
-    else:
-        signatures = []
-    signatures.append(entry)
-    with open(SIGNATURES_FILE, "w") as f:
-        json.dump(signatures, f)
-    print(f"Signature appended to → {SIGNATURES_FILE}")
+    # Append one record to the signature ledger; `extra` adds fields such as a file digest and path
+    entry = {"message": message, "signature": signature, **group_fields(), **(extra or {})}
+    with metrics.timer("save_signature.ledger"):
+        signature_ledger.append_entries([entry])
+    print(f"Signature appended to → {signature_ledger.LEDGER_FILE}")
     
-    # Write only the latest to latest_signature.txt
-    with open(LATEST_SIGNATURE_FILE, "w") as f:
+    # Write only the latest to the group's latest_signature.txt
+    latest_file = latest_signature_file()
+    with metrics.timer("save_signature.latest"), open(latest_file, "w") as f:
         json.dump(entry, f)
-    print(f"Latest signature saved → {LATEST_SIGNATURE_FILE}")
+    print(f"Latest signature saved → {latest_file}")
+
+def save_signatures(entries):
+    """Write many {"message", "signature"} entries to the ledger in one append."""
+    if not entries:
+        return
+    ensure_dir(KEYS_DIR)
+    fields = group_fields()
+    entries = [{**entry, **fields} for entry in entries]
+    signature_ledger.append_entries(entries)
+    print(f"{len(entries)} signatures appended to → {signature_ledger.LEDGER_FILE}")
+
+    latest_file = latest_signature_file()
+    with open(latest_file, "w") as f:
+        json.dump(entries[-1], f)
+    print(f"Latest signature saved → {latest_file}")
 
-def sign_message(message: str, share_paths: List[str], threshold: int) -> str | None:
+def sign_message(message: str, share_paths: List[str], threshold: int, extra=None) -> str | None:
     print(f" Signing message: '{message}' with threshold {threshold}")
-    shares = collect_shares(share_paths)
-    if len(shares) < threshold:
-        print(f"Error: Insufficient shares provided! Needed {threshold}, got {len(shares)}.")
+    with metrics.timer("sign.load_shares"):
+        key_packages = collect_key_packages(share_paths)
+    if len(key_packages) < threshold:
+        print(f"Error: Insufficient shares provided! Needed {threshold}, got {len(key_packages)}.")
         return None
 
-    public_key_package = read_public_key_package()
+    with metrics.timer("sign.load_public_key_package"):
+        public_key_package = load_public_key_package()
     if not public_key_package:
         print("Cannot sign message without the public key package.")
         return None
 
-    shares_json = json.dumps(shares)
     try:
-        signature_b64, signed_message = sign_message_py(message, shares_json, threshold, public_key_package)
+        with metrics.timer("sign.frost"):
+            signature_b64 = sign_with_packages_py(message, key_packages, threshold, public_key_package)
+        metrics.observe_all("sign.frost", last_timings_py())
         print("Message signed successfully!")
-        save_signature(signature_b64, signed_message)
+        save_signature(signature_b64, message, extra)
         return signature_b64
     except Exception as e:
         print(f"Error during signing: {e}")
         return None
 
+def sign_messages(messages: List[str], share_paths: List[str], threshold: int) -> List[str] | None:
+    """Sign every message with the same shares in one parallel frostpy call."""
+    print(f" Signing {len(messages)} messages with threshold {threshold}")
+    key_packages = collect_key_packages(share_paths)
+    if len(key_packages) < threshold:
+        print(f"Error: Insufficient shares provided! Needed {threshold}, got {len(key_packages)}.")
+        return None
+
+    public_key_package = load_public_key_package()
+    if not public_key_package:
+        print("Cannot sign messages without the public key package.")
+        return None
+
+    try:
+        with metrics.timer("sign_batch.frost"):
+            signatures = sign_messages_batch_py(messages, key_packages, threshold, public_key_package)
+        print(f"{len(signatures)} messages signed successfully!")
+        save_signatures([{"message": m, "signature": sig} for m, sig in zip(messages, signatures)])
+        return signatures
+    except Exception as e:
+        print(f"Error during batch signing: {e}")
+        return None
+
+def commit_share(share_path):
+    """FROST round 1 for one participant: stores the nonces in the participant's
+    nonce store and returns (identifier, commitments_json) to publish."""
+    key_package = load_key_package(share_path)
+    if not key_package:
+        return None
+    try:
+        nonces, commitments = commit_py(key_package)
+    except Exception as e:
+        print(f"Error during commitment: {e}")
+        return None
+    nonce_store.add_nonces(share_path, [(nonces, commitments)], key_fingerprint(key_package))
+    return key_package.identifier, commitments
+
+def preprocess_share(share_path, count):
+    """Generate `count` nonce/commitment pairs ahead of time. The nonces are stored
+    before anything is returned, so a published commitment always has its nonce."""
+    key_package = load_key_package(share_path)
+    if not key_package:
+        return None
+    try:
+        pairs = preprocess_py(key_package, count)
+    except Exception as e:
+        print(f"Error during preprocessing: {e}")
+        return None
+    nonce_store.add_nonces(share_path, pairs, key_fingerprint(key_package))
+    return key_package, [commitments for _, commitments in pairs]
+
+def sign_share(message, share_path, package):
+    """FROST round 2 for one participant over a frozen signing package
+    ({identifier: commitments_json}). Consumes the matching nonces and
+    returns (identifier, signature_share_json)."""
+    with metrics.timer("sign_share.load_key_package"):
+        key_package = load_key_package(share_path)
+    if not key_package:
+        return None
+    with metrics.timer("sign_share.consume_nonces"):
+        nonces = nonce_store.consume(share_path, package[key_package.identifier], key_fingerprint(key_package))
+    if nonces is None:
+        print(f"Error during signing: no unused nonces in {nonce_store.nonces_db_path(share_path)} for this signing package")
+        return None
+    try:
+        with metrics.timer("sign_share.frost"):
+            signature_share = sign_share_py(message, package, nonces, key_package)
+        metrics.observe_all("sign_share.frost", last_timings_py())
+        return key_package.identifier, signature_share
+    except Exception as e:
+        print(f"Error during signing: {e}")
+        return None
+
+def aggregate_signature(message, package, signature_shares):
+    """Combine the signature shares ({identifier: share_json}) of a signing package."""
+    with metrics.timer("aggregate.load_public_key_package"):
+        public_key_package = load_public_key_package()
+    if not public_key_package:
+        print("Cannot aggregate without the public key package.")
+        return None
+    try:
+        with metrics.timer("aggregate.frost"):
+            signature_b64 = aggregate_py(message, package, signature_shares, public_key_package)
+        metrics.observe_all("aggregate.frost", last_timings_py())
+        print("Signature shares aggregated successfully!")
+        return signature_b64
+    except Exception as e:
+        print(f"Error during aggregation: {e}")
+        return None
+
 if __name__ == "__main__":
     message = "Emergency broadcast: System going offline."
     threshold = 2
     share_files = [
-        os.path.join(KEYS_DIR, "1", "secret_share.txt"),
-        os.path.join(KEYS_DIR, "2", "secret_share.txt"),
+        frost_keyring.key_path("1", "secret_share.txt"),
+        frost_keyring.key_path("2", "secret_share.txt"),
     ]
     signature = sign_message(message, share_files, threshold)
     if signature:
@@ -0,0 +1,236 @@
+import os
+import json
+import mmap
+import zlib
+import struct
+import hashlib
+import file_lock
+
+KEYS_DIR = "keys"
+LEDGER_FILE = os.path.join(KEYS_DIR, "signatures.log")
+INDEX_FILE = os.path.join(KEYS_DIR, "signatures.idx")
+LEGACY_SIGNATURES_FILE = os.path.join(KEYS_DIR, "signatures.txt")
+# Writers hold it exclusively while they sync the index and append; lookups hold it shared.
+LOCK_FILE = os.path.join(KEYS_DIR, "signatures.lock")
+
+# Ledger: a sequence of [payload length, crc32][JSON payload] records, only ever appended.
+RECORD_HEADER = struct.Struct("<II")
+# Index: an open-addressing hash table over the ledger, read through mmap.
+INDEX_MAGIC = b"FROSTIX1"
+INDEX_HEADER = struct.Struct("<8sQQQ")  # magic, slot count, used slots, ledger bytes indexed
+INDEX_SLOT = struct.Struct("<32sQ")  # key digest, ledger offset + 1 (0 marks an empty slot)
+INITIAL_SLOTS = 1024
+
+def ensure_dir(path):
+    os.makedirs(path, exist_ok=True)
+
+def message_key(message: str) -> bytes:
+    return hashlib.sha256(b"message\0" + message.encode("utf-8")).digest()
+
+def signature_key(signature: str) -> bytes:
+    return hashlib.sha256(b"signature\0" + signature.encode("utf-8")).digest()
+
+def entry_keys(entry):
+    keys = []
+    if "message" in entry:
+        keys.append(message_key(entry["message"]))
+    if "signature" in entry:
+        keys.append(signature_key(entry["signature"]))
+    return keys
+
+def _encode_record(entry) -> bytes:
+    payload = json.dumps(entry, separators=(",", ":")).encode("utf-8")
+    return RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+def _read_record(f):
+    """Read the record at the current position; None at EOF or on a torn/corrupt tail."""
+    header = f.read(RECORD_HEADER.size)
+    if len(header) < RECORD_HEADER.size:
+        return None
+    length, crc = RECORD_HEADER.unpack(header)
+    payload = f.read(length)
+    if len(payload) < length or zlib.crc32(payload) != crc:
+        return None
+    return json.loads(payload)
+
+def _create_index(path, slots):
+    with open(path, "wb") as f:
+        f.write(INDEX_HEADER.pack(INDEX_MAGIC, slots, 0, 0))
+        f.truncate(INDEX_HEADER.size + slots * INDEX_SLOT.size)
+
+def _map_index(path):
+    with open(path, "r+b") as f:
+        return mmap.mmap(f.fileno(), 0)
+
+def _open_index():
+    if not os.path.exists(INDEX_FILE) or os.path.getsize(INDEX_FILE) < INDEX_HEADER.size:
+        _create_index(INDEX_FILE, INITIAL_SLOTS)
+    mm = _map_index(INDEX_FILE)
+    if INDEX_HEADER.unpack_from(mm, 0)[0] != INDEX_MAGIC:
+        mm.close()
+        _create_index(INDEX_FILE, INITIAL_SLOTS)
+        mm = _map_index(INDEX_FILE)
+    return mm
+
+def _probe(mm, key):
+    """Return (slot position, stored offset + 1) for key, or the empty slot where it would go."""
+    _, slots, _, _ = INDEX_HEADER.unpack_from(mm, 0)
+    mask = slots - 1
+    slot = int.from_bytes(key[:8], "little") & mask
+    while True:
+        pos = INDEX_HEADER.size + slot * INDEX_SLOT.size
+        stored_key, stored = INDEX_SLOT.unpack_from(mm, pos)
+        if stored == 0 or stored_key == key:
+            return pos, stored
+        slot = (slot + 1) & mask
+
+def _index_insert(mm, key, offset):
+    magic, slots, used, indexed = INDEX_HEADER.unpack_from(mm, 0)
+    if (used + 1) * 2 > slots:
+        mm = _grow_index(mm, slots * 2)
+        magic, slots, used, indexed = INDEX_HEADER.unpack_from(mm, 0)
+    pos, stored = _probe(mm, key)
+    if stored:
+        return mm  # keep the first ledger entry for a key, like the old linear scan did
+    INDEX_SLOT.pack_into(mm, pos, key, offset + 1)
+    INDEX_HEADER.pack_into(mm, 0, magic, slots, used + 1, indexed)
+    return mm
+
+def _grow_index(mm, slots):
+    _, old_slots, _, indexed = INDEX_HEADER.unpack_from(mm, 0)
+    tmp_path = INDEX_FILE + ".tmp"
+    _create_index(tmp_path, slots)
+    new = _map_index(tmp_path)
+    used = 0
+    for i in range(old_slots):
+        key, stored = INDEX_SLOT.unpack_from(mm, INDEX_HEADER.size + i * INDEX_SLOT.size)
+        if stored:
+            pos, _ = _probe(new, key)
+            INDEX_SLOT.pack_into(new, pos, key, stored)
+            used += 1
+    INDEX_HEADER.pack_into(new, 0, INDEX_MAGIC, slots, used, indexed)
+    new.flush()
+    mm.close()
+    new.close()
+    os.replace(tmp_path, INDEX_FILE)
+    return _map_index(INDEX_FILE)
+
+def _sync_index(mm):
+    """Index ledger records appended since the last sync and cut off a torn tail. Writers only,
+    under the exclusive lock: a torn tail is then a crashed writer's, never one still writing."""
+    _, _, _, indexed = INDEX_HEADER.unpack_from(mm, 0)
+    size = os.path.getsize(LEDGER_FILE) if os.path.exists(LEDGER_FILE) else 0
+    if indexed > size:  # ledger was replaced underneath us; rebuild from scratch
+        mm.close()
+        _create_index(INDEX_FILE, INITIAL_SLOTS)
+        mm = _map_index(INDEX_FILE)
+        indexed = 0
+    if indexed == size:
+        return mm
+    with open(LEDGER_FILE, "r+b") as f:
+        f.seek(indexed)
+        while indexed < size:
+            entry = _read_record(f)
+            if entry is None:
+                print(f" Discarding torn ledger tail at byte {indexed} of {LEDGER_FILE}")
+                f.truncate(indexed)
+                break
+            for key in entry_keys(entry):
+                mm = _index_insert(mm, key, indexed)
+            indexed = f.tell()
+    magic, slots, used, _ = INDEX_HEADER.unpack_from(mm, 0)
+    INDEX_HEADER.pack_into(mm, 0, magic, slots, used, indexed)
+    return mm
+
+def migrate_legacy():
+    """Import the old JSON-array signatures.txt into the ledger once."""
+    if os.path.exists(LEDGER_FILE) or not os.path.exists(LEGACY_SIGNATURES_FILE):
+        return
+    with file_lock.locked(LOCK_FILE):
+        if os.path.exists(LEDGER_FILE) or not os.path.exists(LEGACY_SIGNATURES_FILE):
+            return  # another process migrated it while we waited
+        with open(LEGACY_SIGNATURES_FILE, "r") as f:
+            entries = json.load(f)
+        _append_locked(entries)
+        os.replace(LEGACY_SIGNATURES_FILE, LEGACY_SIGNATURES_FILE + ".migrated")
+    print(f" Migrated {len(entries)} signatures from {LEGACY_SIGNATURES_FILE} → {LEDGER_FILE}")
+
+def _append(entries):
+    ensure_dir(KEYS_DIR)
+    with file_lock.locked(LOCK_FILE):
+        _append_locked(entries)
+
+def _append_locked(entries):
+    mm = _sync_index(_open_index())
+    try:
+        records = [_encode_record(entry) for entry in entries]
+        with open(LEDGER_FILE, "ab") as f:
+            offset = f.tell()
+            f.write(b"".join(records))
+            f.flush()
+            os.fsync(f.fileno())
+        for entry, record in zip(entries, records):
+            for key in entry_keys(entry):
+                mm = _index_insert(mm, key, offset)
+            offset += len(record)
+        magic, slots, used, _ = INDEX_HEADER.unpack_from(mm, 0)
+        INDEX_HEADER.pack_into(mm, 0, magic, slots, used, offset)
+    finally:
+        mm.close()
+
+def append_entries(entries):
+    migrate_legacy()
+    _append(entries)
+
+def _find_offset(key, size):
+    """Ledger offset of the first entry under `key`. Read-only: the index answers for the part of
+    the ledger it covers, and records after that are scanned up to the first torn one."""
+    indexed = 0
+    if os.path.exists(INDEX_FILE) and os.path.getsize(INDEX_FILE) >= INDEX_HEADER.size:
+        with open(INDEX_FILE, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, _, _, indexed = INDEX_HEADER.unpack_from(mm, 0)
+            if magic != INDEX_MAGIC or indexed > size:
+                indexed = 0  # unusable until the next write rebuilds it
+            else:
+                _, stored = _probe(mm, key)
+                if stored:
+                    return stored - 1
+    with open(LEDGER_FILE, "rb") as f:
+        f.seek(indexed)
+        while indexed < size:
+            entry = _read_record(f)
+            if entry is None:
+                return None
+            if key in entry_keys(entry):
+                return indexed
+            indexed = f.tell()
+    return None
+
+def _lookup(key):
+    migrate_legacy()
+    if not os.path.exists(LEDGER_FILE):
+        return None
+    with file_lock.locked(LOCK_FILE, shared=True):
+        offset = _find_offset(key, os.path.getsize(LEDGER_FILE))
+        if offset is None:
+            return None
+        with open(LEDGER_FILE, "rb") as f:
+            f.seek(offset)
+            return _read_record(f)
+
+def find_by_message(message: str):
+    return _lookup(message_key(message))
+
+def find_by_signature(signature: str):
+    return _lookup(signature_key(signature))
+
+def iter_entries():
+    migrate_legacy()
+    if not os.path.exists(LEDGER_FILE):
+        return
+    with open(LEDGER_FILE, "rb") as f:
+        while True:
+            entry = _read_record(f)
+            if entry is None:
+                return
+            yield entry
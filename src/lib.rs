@@ -1,16 +1,55 @@
 use pyo3::prelude::*;
+use pyo3::buffer::PyBuffer;
+use pyo3::types::{PyBytes, PyString};
 use frost_core::{SigningPackage, Identifier};
 use frost_core::keys::{generate_with_dealer, KeyPackage, PublicKeyPackage, IdentifierList, SigningShare, VerifyingShare};
 use frost_core::round1;
 use frost_core::round2;
+use frost_core::batch;
 use frost_secp256k1::Secp256K1Sha256;
 use frost_core::{aggregate, VerifyingKey, Signature};
 use rand::thread_rng;
+use rayon::prelude::*;
 use serde_json;
 use base64::{engine::general_purpose, Engine};
-use std::collections::BTreeMap;
+use std::collections::{BTreeMap, HashMap};
 use hex;
 use std::num::NonZeroU16;
+use std::sync::{mpsc, Mutex};
+use std::thread;
+use std::cell::RefCell;
+use std::time::Instant;
+
+thread_local! {
+    // (stage, seconds) of the last signing call made on this thread; see last_timings_py.
+    static LAST_TIMINGS: RefCell<Vec<(&'static str, f64)>> = RefCell::new(Vec::new());
+}
+
+fn reset_timings() {
+    LAST_TIMINGS.with(|timings| timings.borrow_mut().clear());
+}
+
+/// Records the time since `started` as `stage` and returns the current instant, which
+/// starts the next stage.
+fn record_stage(stage: &'static str, started: Instant) -> Instant {
+    let now = Instant::now();
+    let seconds = now.duration_since(started).as_secs_f64();
+    LAST_TIMINGS.with(|timings| {
+        let mut timings = timings.borrow_mut();
+        match timings.iter_mut().find(|(name, _)| *name == stage) {
+            Some(entry) => entry.1 = seconds,
+            None => timings.push((stage, seconds)),
+        }
+    });
+    now
+}
+
+/// Per-stage timings, as (stage, seconds), of the last sign_message_py, sign_with_packages_py,
+/// sign_share_py or aggregate_py call on the calling thread.
+#[pyfunction]
+fn last_timings_py() -> Vec<(String, f64)> {
+    LAST_TIMINGS.with(|timings| timings.borrow().iter().map(|(stage, seconds)| (stage.to_string(), *seconds)).collect())
+}
 
 #[pyfunction]
 fn generate_keys_py(n: u16, t: u16) -> PyResult<String> {
@@ -68,118 +107,923 @@ fn generate_keys_py(n: u16, t: u16) -> PyResult<String> {
         .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("JSON formatting error: {e}")))
 }
 
-#[pyfunction]
-fn sign_message_py(message: String, shares_json: String, threshold: u16, pubkey_package_json: String) -> PyResult<(String, String)> {
-    let shares_data: Vec<serde_json::Value> = serde_json::from_str(&shares_json)
-        .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Share deserialization error: {e}")))?;
-    let pubkey_package: PublicKeyPackage<Secp256K1Sha256> = {
-        let bytes = general_purpose::STANDARD
-            .decode(&pubkey_package_json)
-            .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Pubkey package decode error: {e}")))?;
-        PublicKeyPackage::deserialize(&bytes)
-            .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Pubkey package deserialization error: {e}")))?
+// Versioned binary encoding for key material and signatures:
+//   magic "FRST" | version u8 | kind u8 | field count u16 LE | (length u32 LE | bytes) per field
+const BINARY_MAGIC: &[u8; 4] = b"FRST";
+const BINARY_VERSION: u8 = 1;
+const KIND_KEY_PACKAGE: u8 = 1;
+const KIND_PUBLIC_KEY_PACKAGE: u8 = 2;
+const KIND_VERIFYING_KEY: u8 = 3;
+const KIND_SIGNATURE: u8 = 4;
+
+fn encode_binary(kind: u8, fields: &[&[u8]]) -> Vec<u8> {
+    let size = 8 + fields.iter().map(|f| 4 + f.len()).sum::<usize>();
+    let mut out = Vec::with_capacity(size);
+    out.extend_from_slice(BINARY_MAGIC);
+    out.push(BINARY_VERSION);
+    out.push(kind);
+    out.extend_from_slice(&(fields.len() as u16).to_le_bytes());
+    for field in fields {
+        out.extend_from_slice(&(field.len() as u32).to_le_bytes());
+        out.extend_from_slice(field);
+    }
+    out
+}
+
+fn decode_binary(data: &[u8], kind: u8) -> PyResult<Vec<&[u8]>> {
+    let invalid = |what: &str| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Invalid binary key data: {what}"));
+    if data.len() < 8 || &data[..4] != BINARY_MAGIC {
+        return Err(invalid("bad magic"));
+    }
+    if data[4] != BINARY_VERSION {
+        return Err(invalid(&format!("unsupported version {}", data[4])));
+    }
+    if data[5] != kind {
+        return Err(invalid(&format!("expected kind {kind}, found {}", data[5])));
+    }
+    let count = u16::from_le_bytes([data[6], data[7]]) as usize;
+    let mut fields = Vec::with_capacity(count);
+    let mut pos = 8;
+    for _ in 0..count {
+        let header = data.get(pos..pos + 4).ok_or_else(|| invalid("truncated field header"))?;
+        let len = u32::from_le_bytes([header[0], header[1], header[2], header[3]]) as usize;
+        pos += 4;
+        fields.push(data.get(pos..pos + len).ok_or_else(|| invalid("truncated field"))?);
+        pos += len;
+    }
+    if pos != data.len() {
+        return Err(invalid("trailing bytes"));
+    }
+    Ok(fields)
+}
+
+fn encode_key_package_fields(
+    identifier: &Identifier<Secp256K1Sha256>,
+    signing_share: &SigningShare<Secp256K1Sha256>,
+    verifying_key_bytes: &[u8],
+    min_signers: u16,
+) -> Vec<u8> {
+    encode_binary(KIND_KEY_PACKAGE, &[
+        &identifier.serialize(),
+        &signing_share.serialize(),
+        verifying_key_bytes,
+        &min_signers.to_le_bytes(),
+    ])
+}
+
+fn decode_key_package(data: &[u8]) -> PyResult<KeyPackage<Secp256K1Sha256>> {
+    let fields = decode_binary(data, KIND_KEY_PACKAGE)?;
+    let [identifier, signing_share, verifying_key, min_signers] = fields[..] else {
+        return Err(PyErr::new::<pyo3::exceptions::PyValueError, _>("Invalid binary key package: expected 4 fields"));
     };
+    let identifier = Identifier::<Secp256K1Sha256>::deserialize(identifier)
+        .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Identifier deserialize error: {e}")))?;
+    let signing_share = SigningShare::<Secp256K1Sha256>::deserialize(signing_share)
+        .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Signing share deserialize error: {e}")))?;
+    let verifying_key = VerifyingKey::<Secp256K1Sha256>::deserialize(verifying_key)
+        .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Verifying key deserialize error: {e}")))?;
+    let min_signers = match min_signers {
+        [lo, hi] => u16::from_le_bytes([*lo, *hi]),
+        _ => return Err(PyErr::new::<pyo3::exceptions::PyValueError, _>("Invalid min_signers")),
+    };
+    let verifying_share = VerifyingShare::from(signing_share);
+    Ok(KeyPackage::new(identifier, signing_share, verifying_share, verifying_key, min_signers))
+}
 
-    let shares: Vec<KeyPackage<Secp256K1Sha256>> = shares_data
-        .iter()
-        .map(|share_data| {
-            let share = share_data.as_object()
-                .ok_or_else(|| PyErr::new::<pyo3::exceptions::PyValueError, _>("Invalid share format"))?;
-            let identifier = Identifier::<Secp256K1Sha256>::deserialize(
-                &hex::decode(share["identifier"].as_str().unwrap())
-                    .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Hex decode error: {e}")))?
-            ).map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Identifier deserialize error: {e}")))?;
-            let signing_share = SigningShare::<Secp256K1Sha256>::deserialize(
-                &hex::decode(share["signing_share"].as_str().unwrap())
-                    .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Hex decode error: {e}")))?
-            ).map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Signing share deserialize error: {e}")))?;
-            let verifying_key = VerifyingKey::<Secp256K1Sha256>::deserialize(
-                &hex::decode(share["verifying_key"].as_str().unwrap())
-                    .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Hex decode error: {e}")))?
-            ).map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Verifying key deserialize error: {e}")))?;
-            let min_signers = NonZeroU16::new(
-                share["min_signers"].as_u64().unwrap() as u16  // Use min_signers from JSON
-            ).ok_or_else(|| PyErr::new::<pyo3::exceptions::PyValueError, _>("Invalid min_signers"))?;
-
-            let verifying_share = VerifyingShare::from(signing_share);
-
-            Ok(KeyPackage::new(identifier, signing_share, verifying_share, verifying_key, min_signers.get()))
+/// Key generation straight to the binary format: returns ([(participant_id, share_bytes)],
+/// public_key_package_bytes, verifying_key_bytes). No JSON, hex or base64 on the way.
+#[pyfunction]
+fn generate_keys_bin_py(py: Python<'_>, n: u16, t: u16) -> PyResult<(Vec<(usize, Py<PyBytes>)>, Py<PyBytes>, Py<PyBytes>)> {
+    let (shares, pubkey_package, verifying_key) = py
+        .allow_threads(move || -> Result<_, String> {
+            let identifiers: Vec<Identifier<Secp256K1Sha256>> = (1..=n)
+                .map(|i| Identifier::<Secp256K1Sha256>::try_from(i).unwrap())
+                .collect();
+            let (shares_map, pubkey_package) =
+                generate_with_dealer(n, t, IdentifierList::Custom(&identifiers), &mut thread_rng())
+                    .map_err(|e| format!("Key generation failed: {e}"))?;
+            // Serialized once and shared by every share, unlike the JSON format.
+            let verifying_key = pubkey_package.verifying_key().serialize().map_err(|e| format!("Serialization error: {e}"))?;
+            let shares: Vec<(usize, Vec<u8>)> = shares_map
+                .iter()
+                .enumerate()
+                .map(|(index, (id, secret_share))| {
+                    (index + 1, encode_key_package_fields(id, secret_share.signing_share(), &verifying_key, t))
+                })
+                .collect();
+            let pubkey_package = pubkey_package.serialize().map_err(|e| format!("Serialization error: {e}"))?;
+            Ok((
+                shares,
+                encode_binary(KIND_PUBLIC_KEY_PACKAGE, &[&pubkey_package]),
+                encode_binary(KIND_VERIFYING_KEY, &[&verifying_key]),
+            ))
         })
-        .collect::<Result<Vec<_>, PyErr>>()?;
+        .map_err(PyErr::new::<pyo3::exceptions::PyValueError, _>)?;
+    Ok((
+        shares.into_iter().map(|(pid, bytes)| (pid, PyBytes::new(py, &bytes).into())).collect(),
+        PyBytes::new(py, &pubkey_package).into(),
+        PyBytes::new(py, &verifying_key).into(),
+    ))
+}
+
+// Encoded shares buffered ahead of the Python consumer by generate_keys_stream_py.
+const STREAM_BUFFER: usize = 64;
+
+type StreamedShare = Result<(usize, Vec<u8>), String>;
+
+/// Iterator over (participant_id, share_bytes) from generate_keys_stream_py. Shares are
+/// encoded on a background thread and waited for with the GIL released.
+#[pyclass(name = "KeyShareStream", frozen)]
+struct PyKeyShareStream {
+    receiver: Mutex<mpsc::Receiver<StreamedShare>>,
+    public_key_package: Vec<u8>,
+    verifying_key: Vec<u8>,
+    total: u16,
+}
+
+#[pymethods]
+impl PyKeyShareStream {
+    fn __iter__(slf: PyRef<'_, Self>) -> PyRef<'_, Self> {
+        slf
+    }
+
+    fn __next__(&self, py: Python<'_>) -> PyResult<Option<(usize, Py<PyBytes>)>> {
+        let receiver = &self.receiver;
+        match py.allow_threads(|| receiver.lock().unwrap().recv()) {
+            Ok(Ok((pid, bytes))) => Ok(Some((pid, PyBytes::new(py, &bytes).into()))),
+            Ok(Err(e)) => Err(PyErr::new::<pyo3::exceptions::PyValueError, _>(e)),
+            Err(_) => Ok(None),  // generator thread finished
+        }
+    }
+
+    #[getter]
+    fn public_key_package(&self, py: Python<'_>) -> Py<PyBytes> {
+        PyBytes::new(py, &self.public_key_package).into()
+    }
+
+    #[getter]
+    fn verifying_key(&self, py: Python<'_>) -> Py<PyBytes> {
+        PyBytes::new(py, &self.verifying_key).into()
+    }
+
+    #[getter]
+    fn total(&self) -> u16 {
+        self.total
+    }
+}
+
+/// Streaming variant of generate_keys_bin_py for large panels: returns once the dealer has
+/// run, with the package bytes available, and yields shares as they are encoded instead of
+/// materializing every share in one document.
+#[pyfunction]
+fn generate_keys_stream_py(py: Python<'_>, n: u16, t: u16) -> PyResult<PyKeyShareStream> {
+    let (header_tx, header_rx) = mpsc::channel::<Result<(Vec<u8>, Vec<u8>), String>>();
+    let (share_tx, share_rx) = mpsc::sync_channel::<StreamedShare>(STREAM_BUFFER);
+    thread::spawn(move || {
+        let generated = (|| -> Result<_, String> {
+            let identifiers: Vec<Identifier<Secp256K1Sha256>> = (1..=n)
+                .map(|i| Identifier::<Secp256K1Sha256>::try_from(i).unwrap())
+                .collect();
+            let (shares_map, pubkey_package) =
+                generate_with_dealer(n, t, IdentifierList::Custom(&identifiers), &mut thread_rng())
+                    .map_err(|e| format!("Key generation failed: {e}"))?;
+            let verifying_key = pubkey_package.verifying_key().serialize().map_err(|e| format!("Serialization error: {e}"))?;
+            let pubkey_package_bytes = pubkey_package.serialize().map_err(|e| format!("Serialization error: {e}"))?;
+            Ok((shares_map, pubkey_package_bytes, verifying_key))
+        })();
+        let (shares_map, pubkey_package_bytes, verifying_key) = match generated {
+            Ok(generated) => generated,
+            Err(e) => {
+                let _ = header_tx.send(Err(e));
+                return;
+            }
+        };
+        let header = (
+            encode_binary(KIND_PUBLIC_KEY_PACKAGE, &[&pubkey_package_bytes]),
+            encode_binary(KIND_VERIFYING_KEY, &[&verifying_key]),
+        );
+        if header_tx.send(Ok(header)).is_err() {
+            return;
+        }
+        // Each share (and its copy of the VSS commitment) is dropped as soon as it is encoded.
+        for (index, (id, secret_share)) in shares_map.into_iter().enumerate() {
+            let bytes = encode_key_package_fields(&id, secret_share.signing_share(), &verifying_key, t);
+            if share_tx.send(Ok((index + 1, bytes))).is_err() {
+                return;  // the stream was dropped
+            }
+        }
+    });
+
+    let (public_key_package, verifying_key) = py
+        .allow_threads(move || header_rx.recv())
+        .map_err(|_| PyErr::new::<pyo3::exceptions::PyValueError, _>("Key generation thread stopped"))?
+        .map_err(PyErr::new::<pyo3::exceptions::PyValueError, _>)?;
+    Ok(PyKeyShareStream { receiver: Mutex::new(share_rx), public_key_package, verifying_key, total: n })
+}
+
+/// A base64 signature as the binary format's signature record.
+#[pyfunction]
+fn signature_to_bytes_py(py: Python<'_>, signature_b64: &str) -> PyResult<Py<PyBytes>> {
+    let signature = decode_signature_b64(signature_b64)
+        .ok_or_else(|| PyErr::new::<pyo3::exceptions::PyValueError, _>("Invalid signature"))?;
+    let bytes = signature.serialize()
+        .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Serialization error: {e}")))?;
+    Ok(PyBytes::new(py, &encode_binary(KIND_SIGNATURE, &[&bytes])).into())
+}
+
+/// A binary signature record back to the base64 text used in the ledger and Nostr events.
+#[pyfunction]
+fn signature_from_bytes_py(data: &[u8]) -> PyResult<String> {
+    let fields = decode_binary(data, KIND_SIGNATURE)?;
+    let [bytes] = fields[..] else {
+        return Err(PyErr::new::<pyo3::exceptions::PyValueError, _>("Invalid binary signature: expected 1 field"));
+    };
+    let signature = Signature::<Secp256K1Sha256>::deserialize(bytes)
+        .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Signature parse error: {e}")))?;
+    encode_signature_b64(&signature)
+}
+
+fn parse_key_package(share_data: &serde_json::Value) -> PyResult<KeyPackage<Secp256K1Sha256>> {
+    let share = share_data.as_object()
+        .ok_or_else(|| PyErr::new::<pyo3::exceptions::PyValueError, _>("Invalid share format"))?;
+    let hex_field = |name: &str| -> PyResult<Vec<u8>> {
+        let value = share.get(name).and_then(|v| v.as_str())
+            .ok_or_else(|| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Share is missing {name}")))?;
+        hex::decode(value)
+            .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Hex decode error: {e}")))
+    };
+    let identifier = Identifier::<Secp256K1Sha256>::deserialize(&hex_field("identifier")?)
+        .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Identifier deserialize error: {e}")))?;
+    let signing_share = SigningShare::<Secp256K1Sha256>::deserialize(&hex_field("signing_share")?)
+        .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Signing share deserialize error: {e}")))?;
+    let verifying_key = VerifyingKey::<Secp256K1Sha256>::deserialize(&hex_field("verifying_key")?)
+        .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Verifying key deserialize error: {e}")))?;
+    let min_signers = share.get("min_signers").and_then(|v| v.as_u64())
+        .and_then(|v| NonZeroU16::new(v as u16))  // Use min_signers from JSON
+        .ok_or_else(|| PyErr::new::<pyo3::exceptions::PyValueError, _>("Invalid min_signers"))?;
+
+    let verifying_share = VerifyingShare::from(signing_share);
+
+    Ok(KeyPackage::new(identifier, signing_share, verifying_share, verifying_key, min_signers.get()))
+}
+
+fn parse_public_key_package_b64(pubkey_package_b64: &str) -> PyResult<PublicKeyPackage<Secp256K1Sha256>> {
+    let bytes = general_purpose::STANDARD
+        .decode(pubkey_package_b64)
+        .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Pubkey package decode error: {e}")))?;
+    PublicKeyPackage::deserialize(&bytes)
+        .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Pubkey package deserialization error: {e}")))
+}
 
+// Runs both FROST rounds for every share and aggregates. Errors are plain strings so
+// this can run without the GIL.
+fn sign_with_key_packages(
+    message: &[u8],
+    shares: &[KeyPackage<Secp256K1Sha256>],
+    threshold: u16,
+    pubkey_package: &PublicKeyPackage<Secp256K1Sha256>,
+) -> Result<Signature<Secp256K1Sha256>, String> {
     // Enforce original threshold from key packages
-    let original_min_signers = shares[0].min_signers();
+    let original_min_signers = shares.first().ok_or("No shares provided")?.min_signers();
     if threshold < *original_min_signers {
-        return Err(PyErr::new::<pyo3::exceptions::PyValueError, _>(
-            format!("Threshold too low: provided {}, required at least {} from key generation", threshold, original_min_signers)
-        ));
+        return Err(format!("Threshold too low: provided {}, required at least {} from key generation", threshold, original_min_signers));
     }
 
     if shares.len() < threshold as usize {
-        return Err(PyErr::new::<pyo3::exceptions::PyValueError, _>(
-            format!("Insufficient shares: got {}, need at least {}", shares.len(), threshold)
-        ));
+        return Err(format!("Insufficient shares: got {}, need at least {}", shares.len(), threshold));
     }
 
-    let mut rng = thread_rng();
-    let mut commitments_map = BTreeMap::new();
-    let mut nonces_map = BTreeMap::new();
+    // Participants are independent within each round, so both rounds fan out on the rayon pool.
+    let mut started = Instant::now();
+    let round1_outputs: Vec<_> = shares
+        .par_iter()
+        .map(|share| {
+            let (nonces, commitments) = round1::commit(share.signing_share(), &mut thread_rng());
+            (*share.identifier(), nonces, commitments)
+        })
+        .collect();
+    let commitments_map: BTreeMap<_, _> = round1_outputs
+        .iter()
+        .map(|(identifier, _, commitments)| (*identifier, commitments.clone()))
+        .collect();
+
+    let signing_package = SigningPackage::new(commitments_map, message);
+    started = record_stage("round1", started);
 
-    for share in &shares {
-        let (nonces, commitments) = round1::commit(share.signing_share(), &mut rng);
-        commitments_map.insert(*share.identifier(), commitments);
-        nonces_map.insert(*share.identifier(), nonces);
+    let partial_signatures = shares
+        .par_iter()
+        .zip(round1_outputs.par_iter())
+        .map(|(share, (identifier, nonces, _))| {
+            round2::sign(&signing_package, nonces, share)
+                .map(|signature| (*identifier, signature))
+                .map_err(|e| format!("Signing error: {e}"))
+        })
+        .collect::<Result<BTreeMap<_, _>, String>>()?;
+    started = record_stage("round2", started);
+
+    let signature = aggregate(&signing_package, &partial_signatures, pubkey_package)
+        .map_err(|e| format!("Aggregation error: {e}"))?;
+    started = record_stage("aggregate", started);
+
+    let verifying_key = pubkey_package.verifying_key();
+    let valid = verifying_key.verify(message, &signature).is_ok();
+    record_stage("verify", started);
+    if !valid {
+        return Err("Generated signature is invalid".to_string());
     }
+    Ok(signature)
+}
 
-    let signing_package = SigningPackage::new(commitments_map, message.as_bytes());
+fn serialize_signature(signature: &Signature<Secp256K1Sha256>) -> PyResult<Vec<u8>> {
+    signature.serialize()
+        .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Serialization error: {e}")))
+}
 
-    let mut partial_signatures = BTreeMap::new();
-    for share in &shares {
-        let nonce = nonces_map.get(share.identifier()).unwrap();
-        let signature = round2::sign(&signing_package, nonce, share)
-            .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Signing error: {e}")))?;
-        partial_signatures.insert(*share.identifier(), signature);
+fn encode_signature_b64(signature: &Signature<Secp256K1Sha256>) -> PyResult<String> {
+    Ok(general_purpose::STANDARD.encode(serialize_signature(signature)?))
+}
+
+fn signature_to_pybytes(py: Python<'_>, signature: &Signature<Secp256K1Sha256>) -> PyResult<Py<PyBytes>> {
+    Ok(PyBytes::new(py, &serialize_signature(signature)?).into())
+}
+
+fn parse_signature(signature_bytes: &[u8]) -> PyResult<Signature<Secp256K1Sha256>> {
+    Signature::<Secp256K1Sha256>::deserialize(signature_bytes)
+        .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Signature parse error: {e}")))
+}
+
+fn parse_verifying_key(public_key_bytes: &[u8]) -> PyResult<VerifyingKey<Secp256K1Sha256>> {
+    VerifyingKey::<Secp256K1Sha256>::deserialize(public_key_bytes)
+        .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Public key parse error: {e}")))
+}
+
+fn decode_b64(value: &str, what: &str) -> PyResult<Vec<u8>> {
+    general_purpose::STANDARD
+        .decode(value)
+        .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("{what} decode error: {e}")))
+}
+
+/// The bytes of a bytes-like argument (bytes, bytearray, memoryview, mmap), safe to read
+/// with the GIL released. An immutable `bytes` object is borrowed in place; any other buffer
+/// is copied while the GIL is still held, since another thread could change it during the call.
+enum ByteArg<'py> {
+    Borrowed(&'py [u8]),
+    Copied(Vec<u8>),
+}
+
+impl<'py> ByteArg<'py> {
+    fn new(obj: &'py PyAny, what: &str) -> PyResult<Self> {
+        if let Ok(bytes) = obj.downcast::<PyBytes>() {
+            return Ok(ByteArg::Borrowed(bytes.as_bytes()));
+        }
+        let buffer = PyBuffer::<u8>::get(obj)
+            .map_err(|_| PyErr::new::<pyo3::exceptions::PyTypeError, _>(format!("{what} must be a bytes-like object")))?;
+        Ok(ByteArg::Copied(buffer.to_vec(obj.py())?))
     }
 
-    let signature = aggregate(&signing_package, &partial_signatures, &pubkey_package)
-        .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Aggregation error: {e}")))?;
+    fn as_slice(&self) -> &[u8] {
+        match self {
+            ByteArg::Borrowed(bytes) => bytes,
+            ByteArg::Copied(bytes) => bytes,
+        }
+    }
+}
 
-    let verifying_key = pubkey_package.verifying_key();
-    if verifying_key.verify(message.as_bytes(), &signature).is_err() {
+/// A verifying key argument: a parsed `VerifyingKey`, or its raw serialized bytes in any buffer.
+enum KeyArg<'py> {
+    Parsed(VerifyingKey<Secp256K1Sha256>),
+    Raw(ByteArg<'py>),
+}
+
+impl<'py> KeyArg<'py> {
+    fn extract(obj: &'py PyAny) -> PyResult<Self> {
+        if let Ok(key) = obj.extract::<PyRef<'_, PyVerifyingKey>>() {
+            return Ok(KeyArg::Parsed(key.inner.clone()));
+        }
+        Ok(KeyArg::Raw(ByteArg::new(obj, "Verifying key")?))
+    }
+
+    fn parse(&self) -> PyResult<VerifyingKey<Secp256K1Sha256>> {
+        match self {
+            KeyArg::Parsed(key) => Ok(key.clone()),
+            KeyArg::Raw(bytes) => parse_verifying_key(bytes.as_slice()),
+        }
+    }
+}
+
+#[pyfunction]
+fn sign_message_py(message: &PyString, shares_json: &str, threshold: u16, pubkey_package_json: &str) -> PyResult<(String, Py<PyString>)> {
+    reset_timings();
+    let started = Instant::now();
+    let shares_data: Vec<serde_json::Value> = serde_json::from_str(shares_json)
+        .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Share deserialization error: {e}")))?;
+    let pubkey_package = parse_public_key_package_b64(pubkey_package_json)?;
+
+    let shares: Vec<KeyPackage<Secp256K1Sha256>> = shares_data
+        .iter()
+        .map(parse_key_package)
+        .collect::<Result<Vec<_>, PyErr>>()?;
+    record_stage("deserialize", started);
+
+    let signature = sign_with_key_packages(message.to_str()?.as_bytes(), &shares, threshold, &pubkey_package)
+        .map_err(PyErr::new::<pyo3::exceptions::PyValueError, _>)?;
+    // The caller's own str object comes back, not a copy of it.
+    Ok((encode_signature_b64(&signature)?, message.into()))
+}
+
+/// A participant's parsed `KeyPackage`, built once from a `secret_share.txt` document.
+#[pyclass(name = "KeyPackage", frozen)]
+struct PyKeyPackage {
+    inner: KeyPackage<Secp256K1Sha256>,
+}
+
+#[pymethods]
+impl PyKeyPackage {
+    #[staticmethod]
+    fn from_json(share_json: &str) -> PyResult<Self> {
+        let share_data: serde_json::Value = serde_json::from_str(share_json)
+            .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Share deserialization error: {e}")))?;
+        Ok(PyKeyPackage { inner: parse_key_package(&share_data)? })
+    }
+
+    #[staticmethod]
+    fn from_bytes(data: &[u8]) -> PyResult<Self> {
+        Ok(PyKeyPackage { inner: decode_key_package(data)? })
+    }
+
+    fn to_bytes(&self, py: Python<'_>) -> PyResult<Py<PyBytes>> {
+        let verifying_key = self.inner.verifying_key().serialize()
+            .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Serialization error: {e}")))?;
+        let bytes = encode_key_package_fields(self.inner.identifier(), self.inner.signing_share(), &verifying_key, *self.inner.min_signers());
+        Ok(PyBytes::new(py, &bytes).into())
+    }
+
+    #[getter]
+    fn min_signers(&self) -> u16 {
+        *self.inner.min_signers()
+    }
+
+    #[getter]
+    fn identifier(&self) -> String {
+        hex::encode(self.inner.identifier().serialize())
+    }
+
+    /// The verifying key of the group this share belongs to.
+    #[getter]
+    fn verifying_key(&self) -> PyVerifyingKey {
+        PyVerifyingKey { inner: self.inner.verifying_key().clone() }
+    }
+}
+
+/// The group's parsed `PublicKeyPackage`, built once from `public_key_package.txt`.
+#[pyclass(name = "PublicKeyPackage", frozen)]
+struct PyPublicKeyPackage {
+    inner: PublicKeyPackage<Secp256K1Sha256>,
+}
+
+#[pymethods]
+impl PyPublicKeyPackage {
+    #[staticmethod]
+    fn from_b64(pubkey_package_b64: &str) -> PyResult<Self> {
+        Ok(PyPublicKeyPackage { inner: parse_public_key_package_b64(pubkey_package_b64.trim())? })
+    }
+
+    #[staticmethod]
+    fn from_bytes(data: &[u8]) -> PyResult<Self> {
+        let fields = decode_binary(data, KIND_PUBLIC_KEY_PACKAGE)?;
+        let [bytes] = fields[..] else {
+            return Err(PyErr::new::<pyo3::exceptions::PyValueError, _>("Invalid binary public key package: expected 1 field"));
+        };
+        let inner = PublicKeyPackage::deserialize(bytes)
+            .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Pubkey package deserialization error: {e}")))?;
+        Ok(PyPublicKeyPackage { inner })
+    }
+
+    fn to_bytes(&self, py: Python<'_>) -> PyResult<Py<PyBytes>> {
+        let bytes = self.inner.serialize()
+            .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Serialization error: {e}")))?;
+        Ok(PyBytes::new(py, &encode_binary(KIND_PUBLIC_KEY_PACKAGE, &[&bytes])).into())
+    }
+
+    fn verifying_key(&self) -> PyVerifyingKey {
+        PyVerifyingKey { inner: self.inner.verifying_key().clone() }
+    }
+}
+
+/// The group's parsed `VerifyingKey`, built once from `public_key.txt`.
+#[pyclass(name = "VerifyingKey", frozen)]
+struct PyVerifyingKey {
+    inner: VerifyingKey<Secp256K1Sha256>,
+}
+
+#[pymethods]
+impl PyVerifyingKey {
+    #[staticmethod]
+    fn from_b64(public_key_b64: &str) -> PyResult<Self> {
+        let public_key_bytes = general_purpose::STANDARD
+            .decode(public_key_b64.trim())
+            .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Public key decode error: {e}")))?;
+        let inner = VerifyingKey::<Secp256K1Sha256>::deserialize(&public_key_bytes)
+            .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Public key parse error: {e}")))?;
+        Ok(PyVerifyingKey { inner })
+    }
+
+    #[staticmethod]
+    fn from_bytes(data: &[u8]) -> PyResult<Self> {
+        let fields = decode_binary(data, KIND_VERIFYING_KEY)?;
+        let [bytes] = fields[..] else {
+            return Err(PyErr::new::<pyo3::exceptions::PyValueError, _>("Invalid binary verifying key: expected 1 field"));
+        };
+        let inner = VerifyingKey::<Secp256K1Sha256>::deserialize(bytes)
+            .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Public key parse error: {e}")))?;
+        Ok(PyVerifyingKey { inner })
+    }
+
+    fn to_bytes(&self, py: Python<'_>) -> PyResult<Py<PyBytes>> {
+        let bytes = self.inner.serialize()
+            .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Serialization error: {e}")))?;
+        Ok(PyBytes::new(py, &encode_binary(KIND_VERIFYING_KEY, &[&bytes])).into())
+    }
+
+    /// The base64 text form, as stored in public_key.txt.
+    fn to_b64(&self) -> PyResult<String> {
+        let bytes = self.inner.serialize()
+            .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Serialization error: {e}")))?;
+        Ok(general_purpose::STANDARD.encode(bytes))
+    }
+}
+
+// Signing over borrowed message bytes, shared by the str and buffer entry points.
+fn sign_packages(
+    py: Python<'_>,
+    message: &[u8],
+    key_packages: &[PyRef<'_, PyKeyPackage>],
+    threshold: u16,
+    pubkey_package: &PyPublicKeyPackage,
+) -> PyResult<Signature<Secp256K1Sha256>> {
+    reset_timings();
+    let shares: Vec<KeyPackage<Secp256K1Sha256>> = key_packages.iter().map(|k| k.inner.clone()).collect();
+    let pubkey_package = &pubkey_package.inner;
+    // allow_threads runs the closure on this thread, so its stage timings land here.
+    py.allow_threads(move || sign_with_key_packages(message, &shares, threshold, pubkey_package))
+        .map_err(PyErr::new::<pyo3::exceptions::PyValueError, _>)
+}
+
+fn sign_packages_batch(
+    py: Python<'_>,
+    messages: &[&[u8]],
+    key_packages: &[PyRef<'_, PyKeyPackage>],
+    threshold: u16,
+    pubkey_package: &PyPublicKeyPackage,
+) -> PyResult<Vec<Signature<Secp256K1Sha256>>> {
+    let shares: Vec<KeyPackage<Secp256K1Sha256>> = key_packages.iter().map(|k| k.inner.clone()).collect();
+    let pubkey_package = &pubkey_package.inner;
+    py.allow_threads(move || {
+        messages
+            .par_iter()
+            .enumerate()
+            .map(|(index, message)| {
+                sign_with_key_packages(message, &shares, threshold, pubkey_package)
+                    .map_err(|e| format!("Message {index}: {e}"))
+            })
+            .collect::<Result<Vec<_>, String>>()
+    })
+    .map_err(PyErr::new::<pyo3::exceptions::PyValueError, _>)
+}
+
+#[pyfunction]
+fn sign_with_packages_py(
+    py: Python<'_>,
+    message: &str,
+    key_packages: Vec<PyRef<'_, PyKeyPackage>>,
+    threshold: u16,
+    pubkey_package: PyRef<'_, PyPublicKeyPackage>,
+) -> PyResult<String> {
+    encode_signature_b64(&sign_packages(py, message.as_bytes(), &key_packages, threshold, &pubkey_package)?)
+}
+
+/// Like `sign_with_packages_py`, but the message is any bytes-like object (read in place if
+/// it is `bytes`, else copied first), and the signature comes back as its raw serialized bytes (base64-decode of the str form).
+#[pyfunction]
+fn sign_with_packages_bytes_py(
+    py: Python<'_>,
+    message: &PyAny,
+    key_packages: Vec<PyRef<'_, PyKeyPackage>>,
+    threshold: u16,
+    pubkey_package: PyRef<'_, PyPublicKeyPackage>,
+) -> PyResult<Py<PyBytes>> {
+    let message = ByteArg::new(message, "Message")?;
+    signature_to_pybytes(py, &sign_packages(py, message.as_slice(), &key_packages, threshold, &pubkey_package)?)
+}
+
+#[pyfunction]
+fn sign_messages_batch_py(
+    py: Python<'_>,
+    messages: Vec<&str>,
+    key_packages: Vec<PyRef<'_, PyKeyPackage>>,
+    threshold: u16,
+    pubkey_package: PyRef<'_, PyPublicKeyPackage>,
+) -> PyResult<Vec<String>> {
+    let messages: Vec<&[u8]> = messages.iter().map(|message| message.as_bytes()).collect();
+    let signatures = sign_packages_batch(py, &messages, &key_packages, threshold, &pubkey_package)?;
+    signatures.iter().map(encode_signature_b64).collect()
+}
+
+#[pyfunction]
+fn sign_messages_batch_bytes_py(
+    py: Python<'_>,
+    messages: Vec<&PyAny>,
+    key_packages: Vec<PyRef<'_, PyKeyPackage>>,
+    threshold: u16,
+    pubkey_package: PyRef<'_, PyPublicKeyPackage>,
+) -> PyResult<Vec<Py<PyBytes>>> {
+    let held = messages
+        .into_iter()
+        .map(|message| ByteArg::new(message, "Message"))
+        .collect::<PyResult<Vec<_>>>()?;
+    let messages: Vec<&[u8]> = held.iter().map(ByteArg::as_slice).collect();
+    let signatures = sign_packages_batch(py, &messages, &key_packages, threshold, &pubkey_package)?;
+    signatures.iter().map(|signature| signature_to_pybytes(py, signature)).collect()
+}
+
+fn to_json<T: serde::Serialize>(value: &T, what: &str) -> PyResult<String> {
+    serde_json::to_string(value)
+        .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("{what} serialization error: {e}")))
+}
+
+fn parse_identifier_hex(identifier_hex: &str) -> PyResult<Identifier<Secp256K1Sha256>> {
+    let bytes = hex::decode(identifier_hex)
+        .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Hex decode error: {e}")))?;
+    Identifier::<Secp256K1Sha256>::deserialize(&bytes)
+        .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Identifier deserialize error: {e}")))
+}
+
+// Maps keyed by hex identifier (as `KeyPackage.identifier` returns it) to serde JSON values.
+fn parse_identifier_map<T: serde::de::DeserializeOwned>(
+    values: &HashMap<String, String>,
+    what: &str,
+) -> PyResult<BTreeMap<Identifier<Secp256K1Sha256>, T>> {
+    values
+        .iter()
+        .map(|(identifier_hex, value_json)| {
+            let value = serde_json::from_str(value_json)
+                .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("{what} deserialization error: {e}")))?;
+            Ok((parse_identifier_hex(identifier_hex)?, value))
+        })
+        .collect()
+}
+
+fn build_signing_package(message: &str, commitments: &HashMap<String, String>) -> PyResult<SigningPackage<Secp256K1Sha256>> {
+    let commitments_map: BTreeMap<_, round1::SigningCommitments<Secp256K1Sha256>> = parse_identifier_map(commitments, "Commitments")?;
+    Ok(SigningPackage::new(commitments_map, message.as_bytes()))
+}
+
+/// Round 1 for one participant: returns (nonces_json, commitments_json). The nonces are
+/// secret and must be used for exactly one `sign_share_py` call; the commitments are public.
+#[pyfunction]
+fn commit_py(key_package: PyRef<'_, PyKeyPackage>) -> PyResult<(String, String)> {
+    let (nonces, commitments) = round1::commit(key_package.inner.signing_share(), &mut thread_rng());
+    Ok((to_json(&nonces, "Nonces")?, to_json(&commitments, "Commitments")?))
+}
+
+/// Preprocessing: `count` round-1 (nonces_json, commitments_json) pairs for one participant,
+/// generated in parallel without the GIL. Each pair may be used for one signing package.
+#[pyfunction]
+fn preprocess_py(py: Python<'_>, key_package: PyRef<'_, PyKeyPackage>, count: usize) -> PyResult<Vec<(String, String)>> {
+    let signing_share = key_package.inner.signing_share().clone();
+    let pairs: Vec<_> = py.allow_threads(move || {
+        (0..count)
+            .into_par_iter()
+            .map(|_| round1::commit(&signing_share, &mut thread_rng()))
+            .collect()
+    });
+    pairs
+        .iter()
+        .map(|(nonces, commitments)| Ok((to_json(nonces, "Nonces")?, to_json(commitments, "Commitments")?)))
+        .collect()
+}
+
+/// Round 2 for one participant: signs `message` under the signing package formed by
+/// `commitments` (hex identifier -> commitments_json). Returns the signature share as JSON.
+#[pyfunction]
+fn sign_share_py(
+    message: &str,
+    commitments: HashMap<String, String>,
+    nonces_json: String,
+    key_package: PyRef<'_, PyKeyPackage>,
+) -> PyResult<String> {
+    reset_timings();
+    let started = Instant::now();
+    let signing_package = build_signing_package(message, &commitments)?;
+    let nonces: round1::SigningNonces<Secp256K1Sha256> = serde_json::from_str(&nonces_json)
+        .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Nonces deserialization error: {e}")))?;
+    let started = record_stage("deserialize", started);
+    let signature_share = round2::sign(&signing_package, &nonces, &key_package.inner)
+        .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Signing error: {e}")))?;
+    record_stage("round2", started);
+    to_json(&signature_share, "Signature share")
+}
+
+/// Combines the signature shares (hex identifier -> share_json) of every participant in
+/// the signing package into a group signature, verifies it and returns it as base64.
+#[pyfunction]
+fn aggregate_py(
+    message: &str,
+    commitments: HashMap<String, String>,
+    signature_shares: HashMap<String, String>,
+    pubkey_package: PyRef<'_, PyPublicKeyPackage>,
+) -> PyResult<String> {
+    reset_timings();
+    let started = Instant::now();
+    let signing_package = build_signing_package(message, &commitments)?;
+    let shares: BTreeMap<_, round2::SignatureShare<Secp256K1Sha256>> = parse_identifier_map(&signature_shares, "Signature share")?;
+    let started = record_stage("deserialize", started);
+    // aggregate() checks each share against its verifying share and names the culprit on failure.
+    let signature = aggregate(&signing_package, &shares, &pubkey_package.inner)
+        .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Aggregation error: {e}")))?;
+    let started = record_stage("aggregate", started);
+    let valid = pubkey_package.inner.verifying_key().verify(message.as_bytes(), &signature).is_ok();
+    record_stage("verify", started);
+    if !valid {
         return Err(PyErr::new::<pyo3::exceptions::PyValueError, _>("Generated signature is invalid"));
     }
+    encode_signature_b64(&signature)
+}
 
-    let signature_bytes = signature.serialize()
-        .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Serialization error: {e}")))?;
-    let signature_b64 = general_purpose::STANDARD.encode(signature_bytes);
-    Ok((signature_b64, message))
+// Verification over borrowed bytes, shared by the str and buffer entry points.
+fn verify_raw(message: &[u8], signature_bytes: &[u8], verifying_key: &VerifyingKey<Secp256K1Sha256>) -> PyResult<bool> {
+    let signature = parse_signature(signature_bytes)?;
+    Ok(verifying_key.verify(message, &signature).is_ok())
 }
 
 #[pyfunction]
-fn verify_signature_py(message: String, signature_b64: String, public_key_b64: String) -> PyResult<bool> {
-    let signature_bytes = general_purpose::STANDARD
-        .decode(signature_b64)
-        .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Signature decode error: {e}")))?;
+fn verify_with_key_py(message: &str, signature_b64: &str, verifying_key: PyRef<'_, PyVerifyingKey>) -> PyResult<bool> {
+    verify_raw(message.as_bytes(), &decode_b64(signature_b64, "Signature")?, &verifying_key.inner)
+}
 
-    let public_key_bytes = general_purpose::STANDARD
-        .decode(public_key_b64)
-        .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Public key decode error: {e}")))?;
+#[pyfunction]
+fn verify_signature_py(message: &str, signature_b64: &str, public_key_b64: &str) -> PyResult<bool> {
+    let signature_bytes = decode_b64(signature_b64, "Signature")?;
+    let public_key = parse_verifying_key(&decode_b64(public_key_b64, "Public key")?)?;
+    verify_raw(message.as_bytes(), &signature_bytes, &public_key)
+}
 
-    let signature = Signature::<Secp256K1Sha256>::deserialize(&signature_bytes)
-        .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Signature parse error: {e}")))?;
-    let public_key = VerifyingKey::<Secp256K1Sha256>::deserialize(&public_key_bytes)
-        .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Public key parse error: {e}")))?;
+/// Verifies a raw signature over a message, both given as any bytes-like object (`bytes` are
+/// read in place, other buffers copied). `verifying_key` is a `VerifyingKey` or the raw
+/// serialized key bytes.
+#[pyfunction]
+fn verify_bytes_py(message: &PyAny, signature: &PyAny, verifying_key: &PyAny) -> PyResult<bool> {
+    let message = ByteArg::new(message, "Message")?;
+    let signature = ByteArg::new(signature, "Signature")?;
+    verify_raw(message.as_slice(), signature.as_slice(), &KeyArg::extract(verifying_key)?.parse()?)
+}
+
+fn decode_signature_b64(signature_b64: &str) -> Option<Signature<Secp256K1Sha256>> {
+    let bytes = general_purpose::STANDARD.decode(signature_b64).ok()?;
+    Signature::<Secp256K1Sha256>::deserialize(&bytes).ok()
+}
+
+fn decode_verifying_key_b64(public_key_b64: &str) -> Option<VerifyingKey<Secp256K1Sha256>> {
+    let bytes = general_purpose::STANDARD.decode(public_key_b64).ok()?;
+    VerifyingKey::<Secp256K1Sha256>::deserialize(&bytes).ok()
+}
+
+// Entries that fail to decode stay `None` and are reported as invalid. Messages are
+// borrowed from the caller's str and bytes objects, or from the copies of other buffers.
+type DecodedEntry<'a> = Option<(&'a [u8], Signature<Secp256K1Sha256>, VerifyingKey<Secp256K1Sha256>)>;
+
+fn verify_decoded_batch(entries: &[DecodedEntry<'_>]) -> Vec<bool> {
+    let mut verifier = batch::Verifier::<Secp256K1Sha256>::new();
+    for (message, signature, key) in entries.iter().flatten() {
+        // `message` is a `&&[u8]`: the batch item takes a reference to a sized `AsRef<[u8]>`.
+        verifier.queue((key.clone(), signature.clone(), message));
+    }
+    if verifier.verify(thread_rng()).is_ok() {
+        return entries.iter().map(|entry| entry.is_some()).collect();
+    }
+    // The batch equation only says that something is wrong; find out which entries.
+    entries
+        .iter()
+        .map(|entry| match entry {
+            Some((message, signature, key)) => key.verify(message, signature).is_ok(),
+            None => false,
+        })
+        .collect()
+}
+
+#[pyfunction]
+#[pyo3(signature = (entries, public_key_b64=None))]
+fn verify_signatures_batch_py(py: Python<'_>, entries: Vec<&PyAny>, public_key_b64: Option<&str>) -> PyResult<Vec<bool>> {
+    // Entries are (message, signature_b64, public_key_b64) or (message, signature_b64) under `public_key_b64`.
+    // The strs are borrowed from the Python objects, not copied.
+    let mut triples: Vec<(&str, &str, Option<&str>)> = Vec::with_capacity(entries.len());
+    for entry in entries {
+        if let Ok((message, signature_b64, key_b64)) = entry.extract::<(&str, &str, &str)>() {
+            triples.push((message, signature_b64, Some(key_b64)));
+        } else {
+            let (message, signature_b64) = entry.extract::<(&str, &str)>()?;
+            if public_key_b64.is_none() {
+                return Err(PyErr::new::<pyo3::exceptions::PyValueError, _>(
+                    "Entries without a public key need the public_key_b64 argument"
+                ));
+            }
+            triples.push((message, signature_b64, None));
+        }
+    }
+    // A malformed group key is the caller's error, not a batch of invalid signatures.
+    let group_key = public_key_b64
+        .map(|key_b64| parse_verifying_key(&decode_b64(key_b64, "Public key")?))
+        .transpose()?;
+
+    Ok(py.allow_threads(move || {
+        let mut keys: HashMap<&str, Option<VerifyingKey<Secp256K1Sha256>>> = HashMap::new();
+        let decoded: Vec<DecodedEntry> = triples
+            .into_iter()
+            .map(|(message, signature_b64, key_b64)| {
+                let key = match key_b64 {
+                    Some(key_b64) => keys.entry(key_b64).or_insert_with_key(|k| decode_verifying_key_b64(k)).clone(),
+                    None => group_key.clone(),
+                }?;
+                let signature = decode_signature_b64(signature_b64)?;
+                Some((message.as_bytes(), signature, key))
+            })
+            .collect();
+        verify_decoded_batch(&decoded)
+    }))
+}
+
+/// `verify_signatures_batch_py` over buffers: entries are (message, signature) under
+/// `verifying_key`, or (message, signature, key), with raw signatures and keys as in
+/// `verify_bytes_py`. `bytes` arguments are read in place; other buffers are copied before
+/// the GIL is released, so changing them from another thread cannot race the check.
+#[pyfunction]
+#[pyo3(signature = (entries, verifying_key=None))]
+fn verify_signatures_batch_bytes_py(py: Python<'_>, entries: Vec<&PyAny>, verifying_key: Option<&PyAny>) -> PyResult<Vec<bool>> {
+    let group_key = verifying_key.map(|key| KeyArg::extract(key)?.parse()).transpose()?;
+    let mut held: Vec<(ByteArg, ByteArg, Option<KeyArg>)> = Vec::with_capacity(entries.len());
+    for entry in entries {
+        let (message, signature, key) = if let Ok((message, signature, key)) = entry.extract::<(&PyAny, &PyAny, &PyAny)>() {
+            (message, signature, Some(KeyArg::extract(key)?))
+        } else {
+            let (message, signature) = entry.extract::<(&PyAny, &PyAny)>()?;
+            if group_key.is_none() {
+                return Err(PyErr::new::<pyo3::exceptions::PyValueError, _>(
+                    "Entries without a key need the verifying_key argument"
+                ));
+            }
+            (message, signature, None)
+        };
+        held.push((ByteArg::new(message, "Message")?, ByteArg::new(signature, "Signature")?, key));
+    }
 
-    let is_valid = public_key.verify(message.as_bytes(), &signature).is_ok();
-    Ok(is_valid)
+    let held = &held;
+    Ok(py.allow_threads(move || {
+        let mut raw_keys: HashMap<&[u8], Option<VerifyingKey<Secp256K1Sha256>>> = HashMap::new();
+        let decoded: Vec<DecodedEntry> = held
+            .iter()
+            .map(|(message, signature, key)| {
+                let key = match key {
+                    Some(KeyArg::Parsed(key)) => Some(key.clone()),
+                    Some(KeyArg::Raw(bytes)) => raw_keys
+                        .entry(bytes.as_slice())
+                        .or_insert_with_key(|k| VerifyingKey::<Secp256K1Sha256>::deserialize(k).ok())
+                        .clone(),
+                    None => group_key.clone(),
+                }?;
+                let signature = Signature::<Secp256K1Sha256>::deserialize(signature.as_slice()).ok()?;
+                Some((message.as_slice(), signature, key))
+            })
+            .collect();
+        verify_decoded_batch(&decoded)
+    }))
 }
 
-// [Rest of the file unchanged]
 
 #[pymodule]
 fn frostpy(_py: Python, m: &PyModule) -> PyResult<()> {
     m.add_function(wrap_pyfunction!(generate_keys_py, m)?)?;
+    m.add_function(wrap_pyfunction!(generate_keys_bin_py, m)?)?;
+    m.add_function(wrap_pyfunction!(generate_keys_stream_py, m)?)?;
+    m.add_function(wrap_pyfunction!(signature_to_bytes_py, m)?)?;
+    m.add_function(wrap_pyfunction!(signature_from_bytes_py, m)?)?;
     m.add_function(wrap_pyfunction!(sign_message_py, m)?)?;
     m.add_function(wrap_pyfunction!(verify_signature_py, m)?)?;
+    m.add_function(wrap_pyfunction!(verify_signatures_batch_py, m)?)?;
+    m.add_function(wrap_pyfunction!(sign_with_packages_py, m)?)?;
+    m.add_function(wrap_pyfunction!(sign_messages_batch_py, m)?)?;
+    m.add_function(wrap_pyfunction!(verify_with_key_py, m)?)?;
+    m.add_function(wrap_pyfunction!(sign_with_packages_bytes_py, m)?)?;
+    m.add_function(wrap_pyfunction!(sign_messages_batch_bytes_py, m)?)?;
+    m.add_function(wrap_pyfunction!(verify_bytes_py, m)?)?;
+    m.add_function(wrap_pyfunction!(verify_signatures_batch_bytes_py, m)?)?;
+    m.add_function(wrap_pyfunction!(commit_py, m)?)?;
+    m.add_function(wrap_pyfunction!(preprocess_py, m)?)?;
+    m.add_function(wrap_pyfunction!(sign_share_py, m)?)?;
+    m.add_function(wrap_pyfunction!(aggregate_py, m)?)?;
+    m.add_function(wrap_pyfunction!(last_timings_py, m)?)?;
+    m.add_class::<PyKeyPackage>()?;
+    m.add_class::<PyPublicKeyPackage>()?;
+    m.add_class::<PyVerifyingKey>()?;
+    m.add_class::<PyKeyShareStream>()?;
     Ok(())
 }
\ No newline at end of file
@@ -0,0 +1,48 @@
+import os
+import sys
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run the test in an empty directory; the stores use paths relative to the working directory."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+class FakeVerifyingKey:
+    """Stands in for frostpy.VerifyingKey; the key is just its base64 text."""
+    def __init__(self, b64):
+        self.b64 = b64
+
+    @staticmethod
+    def from_b64(text):
+        return FakeVerifyingKey(text.strip())
+
+    def to_b64(self):
+        return self.b64
+
+def fake_signature(message, key_b64):
+    """A "signature" that verifies under exactly one message and key in frost_stub."""
+    return f"sig({key_b64}):{message}"
+
+@pytest.fixture
+def frost_stub(monkeypatch):
+    """A frostpy replacement for the verification entry points, for tests of the Python around them."""
+    def valid(message, signature, key_b64):
+        return signature == fake_signature(message, key_b64)
+    module = types.SimpleNamespace(
+        VerifyingKey=FakeVerifyingKey,
+        verify_signature_py=valid,
+        verify_with_key_py=lambda message, signature, key: valid(message, signature, key.to_b64()),
+        verify_signatures_batch_py=lambda entries, public_key_b64=None: [
+            valid(entry[0], entry[1], entry[2] if len(entry) == 3 else public_key_b64) for entry in entries])
+    for name in ("sign_with_packages_py", "sign_messages_batch_py", "commit_py", "preprocess_py",
+                 "sign_share_py", "aggregate_py", "last_timings_py"):
+        setattr(module, name, None)  # importable, not callable: signing is not stubbed
+    monkeypatch.setitem(sys.modules, "frostpy", module)
+    for name in ("verify_signature", "sign_message", "nostr"):
+        monkeypatch.delitem(sys.modules, name, raising=False)  # re-imported against the stub
+    return module
@@ -0,0 +1,49 @@
+import io
+import json
+
+import pytest
+
+import cli
+import frost_keyring
+import message_store
+
+@pytest.fixture
+def store(workdir):
+    frost_keyring.select(None)
+    message_store.close()
+    yield message_store
+    message_store.close()
+
+def run(lines, **kwargs):
+    out = io.StringIO()
+    cli.run_batch(io.StringIO("\n".join(lines) + "\n"), out, **kwargs)
+    return [json.loads(line) for line in out.getvalue().splitlines()]
+
+def test_operations_run_in_order_and_failures_stay_local(store):
+    records = run([
+        json.dumps({"op": "submit", "message": "first"}),
+        "not json",
+        "",
+        json.dumps({"op": "rotate"}),
+        json.dumps({"op": "submit", "message": "FROST-DIGEST-v1 sha256:00"}),
+        json.dumps({"op": "submit", "message": "second"}),
+    ], commit_every=2)
+    assert [r["line"] for r in records] == [1, 2, 4, 5, 6]
+    assert [r["ok"] for r in records] == [True, False, False, False, True]
+    assert records[0]["result"] == {"id": 1, "package_ready": False}
+    assert records[0]["output"] == ["Message submitted: ID 1 - 'first'"]
+    assert records[1]["error"].startswith("JSONDecodeError")
+    assert "unknown op 'rotate'" in records[2]["error"]
+    assert "use --file" in records[3]["output"][0]
+    message_store.close()
+    assert [m["message"] for m in message_store.list_messages("pending")] == ["first", "second"]
+
+def test_missing_fields_are_reported_per_operation(store):
+    records = run([json.dumps({"op": "sign-partial", "id": 1})])
+    assert records[0]["ok"] is False and records[0]["error"].startswith("KeyError")
+
+def test_submit_without_preprocessed_commitments_skips_the_group_key(store, monkeypatch):
+    def fingerprint_of(group=None):
+        raise AssertionError("submit loaded the group key with an empty commitment pool")
+    monkeypatch.setattr(frost_keyring, "fingerprint_of", fingerprint_of)
+    assert cli.submit_message("no pool") == {"id": 1, "package_ready": False}
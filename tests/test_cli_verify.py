@@ -0,0 +1,44 @@
+import os
+
+import pytest
+
+import cli
+import frost_keyring
+import signature_ledger
+from conftest import fake_signature
+
+GROUP_KEY = "Z3JvdXAga2V5"
+
+@pytest.fixture
+def keys(workdir, frost_stub, monkeypatch):
+    monkeypatch.setattr(frost_keyring, "_index", None)
+    frost_keyring.select(None)
+    os.makedirs("keys")
+    with open("keys/public_key.txt", "w") as f:
+        f.write(GROUP_KEY)
+    return frost_keyring.fingerprint(GROUP_KEY)
+
+def test_verify_all_reports_only_the_corrupted_entry(keys, capsys):
+    signature_ledger.append_entries([
+        {"message": "first", "signature": fake_signature("first", GROUP_KEY)},
+        {"message": "second", "signature": fake_signature("second", GROUP_KEY)[:-1] + "X", "fingerprint": keys},
+        {"message": "third", "signature": fake_signature("third", GROUP_KEY), "fingerprint": keys},
+        {"message": "orphan", "signature": "whatever", "fingerprint": "0" * 32},
+    ])
+    cli.verify_all()
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[:4] == [" valid   'first'", " INVALID 'second'", " valid   'third'",
+                         " UNKNOWN 'orphan' (no group has its key fingerprint)"]
+    assert "4 signatures" in lines[4] and "2 valid, 1 invalid, 1 with an unknown key." in lines[4]
+
+def test_verify_all_with_an_empty_ledger(keys, capsys):
+    cli.verify_all()
+    assert capsys.readouterr().out == " No signatures in the ledger.\n"
+
+def test_a_re_signed_message_is_verified_against_its_first_signature(keys):
+    import verify_signature
+    signature_ledger.append_entries([{"message": "alert", "signature": fake_signature("alert", GROUP_KEY)}])
+    signature_ledger.append_entries([{"message": "alert", "signature": "re-signed"}])
+    entry = verify_signature.read_signature_entry("alert")
+    assert entry["signature"] == fake_signature("alert", GROUP_KEY)
+    assert verify_signature.verify_signature("alert", entry["signature"], verify_signature.read_public_key())
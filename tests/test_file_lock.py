@@ -0,0 +1,21 @@
+import pytest
+
+import file_lock
+
+pytestmark = pytest.mark.skipif(file_lock.fcntl is None, reason="flock is not available")
+
+def test_exclusive_lock_is_seen_as_held(tmp_path):
+    path = str(tmp_path / "x.lock")
+    assert not file_lock.is_held(path)
+    with file_lock.locked(path) as acquired:
+        assert acquired
+        assert file_lock.is_held(path)
+    assert not file_lock.is_held(path)
+
+def test_non_blocking_attempt_reports_a_conflict(tmp_path):
+    path = str(tmp_path / "x.lock")
+    with file_lock.locked(path, shared=True):
+        with file_lock.locked(path, shared=True, blocking=False) as shared:
+            assert shared
+        with file_lock.locked(path, blocking=False) as exclusive:
+            assert not exclusive
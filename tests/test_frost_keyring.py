@@ -0,0 +1,73 @@
+import os
+import json
+import base64
+import types
+
+import pytest
+
+import frost_keyring
+import key_cache
+
+@pytest.fixture
+def keyring(workdir, monkeypatch):
+    # Verifying keys are Rust objects; the fake hands back the base64 text of the key file.
+    def load_verifying_key(path):
+        with open(path) as f:
+            text = f.read().strip()
+        return types.SimpleNamespace(to_b64=lambda: text)
+    monkeypatch.setattr(key_cache, "load_verifying_key", load_verifying_key)
+    monkeypatch.setattr(frost_keyring, "_index", None)
+    frost_keyring.select(None)
+    yield frost_keyring
+    frost_keyring.select(None)
+
+def write_key(group, key: bytes):
+    path = frost_keyring.key_path("public_key.txt", group=group)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(base64.b64encode(key).decode())
+    return frost_keyring.fingerprint(base64.b64encode(key).decode())
+
+def test_index_is_rebuilt_from_the_key_directories(keyring):
+    default_fp = write_key("default", b"default key")
+    panel_fp = write_key("panel", b"panel key")
+    assert keyring.groups() == {
+        "default": {"dir": "keys", "fingerprint": default_fp},
+        "panel": {"dir": os.path.join("keys", "groups", "panel"), "fingerprint": panel_fp},
+    }
+    assert keyring.group_for_fingerprint(panel_fp) == "panel"
+    assert keyring.group_for_fingerprint("0" * 32) is None
+
+def test_staging_directories_are_not_groups(keyring):
+    write_key("default", b"default key")
+    os.makedirs(os.path.join(keyring.GROUPS_DIR, "panel" + keyring.STAGING_SUFFIX))
+    with open(os.path.join(keyring.GROUPS_DIR, "panel" + keyring.STAGING_SUFFIX, "public_key.txt"), "w") as f:
+        f.write(base64.b64encode(b"half written").decode())
+    assert set(keyring.rebuild_index()["groups"]) == {"default"}
+
+def test_keys_copied_in_later_are_found_by_a_rescan(keyring):
+    write_key("default", b"default key")
+    keyring.load_index()
+    late_fp = write_key("late", b"late key")
+    assert keyring.verifying_key_for(late_fp)[0] == "late"
+
+def test_regenerated_keys_replace_the_old_fingerprint(keyring):
+    old_fp = write_key("panel", b"old key")
+    assert keyring.fingerprint_of("panel") == old_fp
+    new_fp = write_key("panel", b"new key")
+    assert keyring.register("panel") == new_fp
+    with open(keyring.INDEX_FILE) as f:
+        index = json.load(f)
+    assert index["fingerprints"] == {new_fp: "panel"}
+
+def test_no_fingerprint_without_keys(keyring):
+    assert keyring.fingerprint_of("empty") is None
+
+@pytest.mark.parametrize("name", ["", "../keys", "a/b", ".hidden"])
+def test_invalid_group_names_are_rejected(keyring, name):
+    with pytest.raises(ValueError):
+        keyring.validate(name)
+    if name:
+        with pytest.raises(ValueError):
+            keyring.select(name)
+    assert keyring.active() == keyring.DEFAULT_GROUP
@@ -0,0 +1,71 @@
+import base64
+
+import pytest
+
+frostpy = pytest.importorskip("frostpy")  # built with `maturin develop`
+
+@pytest.fixture(scope="module")
+def group():
+    shares, pubkey_package, verifying_key = frostpy.generate_keys_bin_py(3, 2)
+    key_packages = [frostpy.KeyPackage.from_bytes(share) for _, share in shares]
+    return (key_packages, frostpy.PublicKeyPackage.from_bytes(pubkey_package),
+            frostpy.VerifyingKey.from_bytes(verifying_key))
+
+def sign(group, message):
+    key_packages, pubkey_package, _ = group
+    return frostpy.sign_with_packages_bytes_py(message, key_packages[:2], 2, pubkey_package)
+
+def raw_key(verifying_key):
+    return base64.b64decode(verifying_key.to_b64())
+
+def test_bytes_and_str_entry_points_agree(group):
+    key_packages, _, verifying_key = group
+    signature = sign(group, b"Flood warning")
+    assert isinstance(signature, bytes)
+    assert frostpy.verify_with_key_py("Flood warning", base64.b64encode(signature).decode(), verifying_key)
+    assert frostpy.verify_bytes_py(b"Flood warning", signature, verifying_key)
+    assert frostpy.verify_bytes_py(b"Flood warning", signature, raw_key(verifying_key))
+    assert not frostpy.verify_bytes_py(b"Flood warnings", signature, verifying_key)
+    assert key_packages[0].verifying_key.to_b64() == verifying_key.to_b64()
+
+@pytest.mark.parametrize("wrap", [bytearray, memoryview, lambda b: memoryview(bytearray(b))])
+def test_any_bytes_like_message(group, wrap):
+    _, _, verifying_key = group
+    signature = sign(group, wrap(b"Power outage"))
+    assert frostpy.verify_bytes_py(wrap(b"Power outage"), wrap(signature), verifying_key)
+
+def test_batch_signing_over_buffers(group):
+    key_packages, pubkey_package, verifying_key = group
+    messages = [b"first", bytearray(b"second"), memoryview(b"third")]
+    signatures = frostpy.sign_messages_batch_bytes_py(messages, key_packages[1:], 2, pubkey_package)
+    assert [frostpy.verify_bytes_py(m, s, verifying_key) for m, s in zip(messages, signatures)] == [True] * 3
+
+def test_argument_errors(group):
+    _, _, verifying_key = group
+    with pytest.raises(TypeError):
+        frostpy.verify_bytes_py("not bytes", sign(group, b"x"), verifying_key)
+    with pytest.raises(ValueError):
+        frostpy.verify_bytes_py(b"x", sign(group, b"x"), b"not a key")
+
+def corrupt(signature: bytes) -> bytes:
+    # Flip a bit of the scalar half, so the signature still parses but no longer verifies.
+    return signature[:-1] + bytes([signature[-1] ^ 1])
+
+def test_batch_reports_which_entry_failed(group):
+    _, _, verifying_key = group
+    messages = [b"one", b"two", b"three"]
+    signatures = [sign(group, m) for m in messages]
+    signatures[1] = corrupt(signatures[1])
+    entries = list(zip(messages, signatures))
+    assert frostpy.verify_signatures_batch_bytes_py(entries, verifying_key) == [True, False, True]
+    assert frostpy.verify_signatures_batch_bytes_py([(m, s, raw_key(verifying_key)) for m, s in entries]) == [True, False, True]
+    str_entries = [(m.decode(), base64.b64encode(s).decode()) for m, s in entries]
+    assert frostpy.verify_signatures_batch_py(str_entries, verifying_key.to_b64()) == [True, False, True]
+    str_entries[2] = (str_entries[2][0], "not base64!")
+    assert frostpy.verify_signatures_batch_py(str_entries, verifying_key.to_b64()) == [True, False, False]
+
+def test_batch_rejects_a_malformed_group_key(group):
+    with pytest.raises(ValueError):
+        frostpy.verify_signatures_batch_py([("one", "c2ln")], "not a key")
+    with pytest.raises(ValueError):
+        frostpy.verify_signatures_batch_bytes_py([(b"one", b"sig")], b"not a key")
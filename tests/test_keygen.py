@@ -0,0 +1,92 @@
+import os
+import sys
+import types
+
+import pytest
+
+import file_lock
+import frost_keyring
+import keygen
+
+class FakeStream:
+    def __init__(self, n):
+        self.total = n
+        self.public_key_package = b"package"
+        self.verifying_key = b"key"
+        self._shares = [(pid, f"share {pid}".encode()) for pid in range(1, n + 1)]
+
+    def __iter__(self):
+        return iter(self._shares)
+
+@pytest.fixture
+def fake_frostpy(workdir, monkeypatch):
+    # Key generation itself is Rust; only the file handling is under test.
+    module = types.SimpleNamespace(
+        generate_keys_stream_py=lambda n, t: FakeStream(n),
+        generate_keys_bin_py=lambda n, t: ([(pid, f"share {pid}".encode()) for pid in range(1, n + 1)], b"package", b"key"))
+    monkeypatch.setitem(sys.modules, "frostpy", module)
+    monkeypatch.setattr(keygen, "register_group", lambda: None)
+    frost_keyring.select(None)
+    return module
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+def stage(files, committed):
+    for name, data in files.items():
+        path = os.path.join(keygen.staging_dir(), name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+    if committed:
+        open(os.path.join(keygen.staging_dir(), keygen.COMMIT_MARKER), "w").close()
+
+def test_streaming_generation_installs_every_share(fake_frostpy):
+    keygen.generate_and_store_shares(4, 2, stream=True)
+    assert read("keys/public_key_package.bin") == b"package"
+    assert read("keys/4/secret_share.bin") == b"share 4"
+    assert not os.path.exists(keygen.staging_dir())
+
+def test_smaller_group_removes_former_participants(fake_frostpy):
+    keygen.generate_and_store_shares(5, 3, stream=True)
+    keygen.generate_and_store_shares(3, 2, stream=True)
+    assert sorted(name for name in os.listdir("keys") if name.isdigit()) == ["1", "2", "3"]
+    keygen.generate_and_store_shares(2, 2)  # in-place binary generation too
+    assert sorted(name for name in os.listdir("keys") if name.isdigit()) == ["1", "2"]
+
+def test_recovery_installs_a_committed_set(fake_frostpy):
+    os.makedirs("keys/9")
+    stage({"public_key.bin": b"new", "1/secret_share.bin": b"s1"}, committed=True)
+    assert keygen.recover_staged_keys()
+    assert read("keys/public_key.bin") == b"new"
+    assert not os.path.exists("keys/9")
+    assert not os.path.exists(keygen.staging_dir())
+
+def test_recovery_discards_an_abandoned_partial_set(fake_frostpy):
+    os.makedirs("keys")
+    with open("keys/public_key.bin", "wb") as f:
+        f.write(b"old")
+    stage({"public_key.bin": b"half"}, committed=False)
+    assert not keygen.recover_staged_keys()
+    assert read("keys/public_key.bin") == b"old"
+    assert not os.path.exists(keygen.staging_dir())
+
+@pytest.mark.skipif(file_lock.fcntl is None, reason="flock is not available")
+def test_a_live_generation_is_left_alone(fake_frostpy):
+    os.makedirs("keys")
+    stage({"public_key.bin": b"in progress"}, committed=False)
+    with file_lock.locked(keygen.staging_lock()):  # what a running generation holds
+        assert not keygen.recover_staged_keys()
+        keygen.generate_and_store_shares(3, 2, stream=True)
+        assert read(os.path.join(keygen.staging_dir(), "public_key.bin")) == b"in progress"
+        assert not os.path.exists("keys/public_key.bin")
+
+def test_the_cli_finishes_a_committed_set_at_startup(fake_frostpy, capsys):
+    import cli
+    stage({"public_key.bin": b"new", "1/secret_share.bin": b"s1"}, committed=True)
+    cli.install_staged_keys()
+    assert read("keys/1/secret_share.bin") == b"s1"
+    assert "interrupted key generation" in capsys.readouterr().out
+    cli.install_staged_keys()  # nothing staged: silent
+    assert capsys.readouterr().out == ""
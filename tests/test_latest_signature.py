@@ -0,0 +1,40 @@
+import os
+import json
+
+import pytest
+
+import frost_keyring
+from conftest import fake_signature
+
+@pytest.fixture
+def groups(workdir, frost_stub, monkeypatch):
+    monkeypatch.setattr(frost_keyring, "_index", None)
+    for group, key in (("default", "ZGVmYXVsdA=="), ("panel", "cGFuZWw=")):
+        path = frost_keyring.key_path("public_key.txt", group=group)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(key)
+    yield
+    frost_keyring.select(None)
+
+def test_each_group_publishes_its_own_latest_signature(groups):
+    import sign_message
+    import nostr
+    frost_keyring.select("panel")
+    sign_message.save_signature(fake_signature("panel alert", "cGFuZWw="), "panel alert")
+    frost_keyring.select(None)
+    sign_message.save_signature(fake_signature("default alert", "ZGVmYXVsdA=="), "default alert")
+
+    with open(os.path.join("keys", "groups", "panel", "latest_signature.txt")) as f:
+        assert json.load(f)["message"] == "panel alert"
+    assert nostr.load_latest_signature()[0] == "default alert"
+    frost_keyring.select("panel")
+    message, signature, fingerprint = nostr.load_latest_signature()
+    assert message == "panel alert" and fingerprint == frost_keyring.fingerprint("cGFuZWw=")
+    nostr.check_frost_signature(message, signature, fingerprint)
+
+def test_a_group_without_signatures_has_nothing_to_publish(groups):
+    import nostr
+    frost_keyring.select("panel")
+    with pytest.raises(FileNotFoundError):
+        nostr.load_latest_signature()
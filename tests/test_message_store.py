@@ -0,0 +1,136 @@
+import os
+import json
+import sqlite3
+
+import pytest
+
+import frost_keyring
+import message_store
+
+@pytest.fixture
+def store(workdir):
+    frost_keyring.select(None)
+    message_store.close()
+    yield message_store
+    message_store.close()
+
+def commit(store, message_id, share):
+    return store.add_commitment(message_id, share, f"id{share}", f"commitments of {share}")
+
+def test_add_list_and_status(store):
+    first = store.add_message("first")
+    second = store.add_message("second")
+    store.set_status(first, "broadcasted")
+    assert [m["id"] for m in store.list_messages("pending")] == [second]
+    assert store.get_message(first)["status"] == "broadcasted"
+    assert store.get_message(999) is None
+
+def test_signatures_are_counted_once_per_share(store):
+    message_id = store.add_message("alert")
+    assert store.add_signature(message_id, "1") == 1
+    assert store.add_signature(message_id, "1") is None
+    assert store.add_signature(message_id, "2", "id2", "share2") == 2
+
+def test_legacy_messages_file_is_migrated(store):
+    with open(message_store.LEGACY_MESSAGES_FILE, "w") as f:
+        f.write(json.dumps({"id": 4, "message": "old", "status": "pending", "signatures": [{"share": "1"}]}) + "\n")
+    message = store.get_message(4)
+    assert message["message"] == "old"
+    assert [s["share"] for s in message["signatures"]] == ["1"]
+    assert os.path.exists(message_store.LEGACY_MESSAGES_FILE + ".migrated")
+
+def test_older_databases_gain_the_new_columns(store):
+    conn = sqlite3.connect(message_store.MESSAGES_DB)
+    conn.executescript("""
+        CREATE TABLE messages (id INTEGER PRIMARY KEY, message TEXT NOT NULL,
+                               status TEXT NOT NULL DEFAULT 'pending', signature_count INTEGER NOT NULL DEFAULT 0);
+        CREATE TABLE signatures (message_id INTEGER NOT NULL, share TEXT NOT NULL, PRIMARY KEY (message_id, share));
+        CREATE TABLE signing_packages (message_id INTEGER PRIMARY KEY, commitments TEXT NOT NULL);
+        INSERT INTO messages (message) VALUES ('from the first release');
+    """)
+    conn.close()
+    assert store.add_signature(1, "1", "id1", "share1") == 1
+    assert store.get_message(1)["signatures"] == [{"share": "1", "identifier": "id1", "signature_share": "share1"}]
+
+def test_package_is_frozen_to_the_first_committers(store):
+    message_id = store.add_message("alert")
+    for share in ("1", "2", "3"):
+        commit(store, message_id, share)
+    assert store.freeze_signing_package(message_id, 2) == {"id1": "commitments of 1", "id2": "commitments of 2"}
+    commit(store, message_id, "4")
+    assert set(store.freeze_signing_package(message_id, 3)) == {"id1", "id2"}  # frozen is frozen
+
+def test_release_discards_shares_over_the_old_package(store):
+    message_id = store.add_message("alert")
+    store.add_signature(message_id, "legacy")  # an approval from before signature shares existed
+    for share in ("1", "2"):
+        commit(store, message_id, share)
+    store.freeze_signing_package(message_id, 2)
+    store.add_signature(message_id, "1", "id1", "share1")
+    assert store.release_signing_package(message_id) == ["1"]
+    assert store.get_signing_package(message_id) is None
+    assert store.get_commitments(message_id) == []
+    assert [s["share"] for s in store.get_message(message_id)["signatures"]] == ["legacy"]
+    assert next(store.list_messages())["signature_count"] == 1
+    # Planned again from whoever commits next.
+    for share in ("1", "3"):
+        commit(store, message_id, share)
+    assert set(store.freeze_signing_package(message_id, 2)) == {"id1", "id3"}
+    assert store.release_signing_package(999) is None
+
+def test_only_stalled_packages_are_released_with_a_timeout(store, monkeypatch):
+    message_id = store.add_message("alert")
+    commit(store, message_id, "1")
+    store.freeze_signing_package(message_id, 1)
+    assert store.release_signing_package(message_id, older_than=60) is None
+    later = message_store.time.time() + 61
+    monkeypatch.setattr(message_store.time, "time", lambda: later)
+    assert store.release_signing_package(message_id, older_than=60) == []
+
+def test_batch_commits_at_checkpoints_and_isolates_failures(store):
+    with store.batch():
+        kept = store.add_message("kept")
+        with pytest.raises(RuntimeError):
+            with store.transaction() as conn:
+                conn.execute("INSERT INTO messages (message) VALUES ('undone')")
+                raise RuntimeError("operation failed")
+        other = sqlite3.connect(message_store.MESSAGES_DB)
+        assert other.execute("SELECT COUNT(*) FROM messages").fetchone()[0] == 0  # not committed yet
+        store.checkpoint()
+        assert other.execute("SELECT COUNT(*) FROM messages").fetchone()[0] == 1
+        store.add_message("after the checkpoint")
+    assert [m["message"] for m in store.list_messages()] == ["kept", "after the checkpoint"]
+    assert other.execute("SELECT COUNT(*) FROM messages").fetchone()[0] == 2
+    other.close()
+    assert kept == 1
+
+def test_groups_have_their_own_database(store):
+    store.add_message("default group")
+    store.close()
+    frost_keyring.select("regional")
+    try:
+        assert list(store.list_messages()) == []
+        store.add_message("regional alert")
+        assert store.connect().execute("PRAGMA database_list").fetchone()["file"].endswith("keys/groups/regional/messages.db")
+    finally:
+        store.close()
+        frost_keyring.select(None)
+
+def test_pool_claims_one_commitment_per_signer_and_can_be_released(store):
+    for share in ("1", "2", "3"):
+        store.add_pool_commitments(share, f"id{share}", 2, [f"c{share}a", f"c{share}b"], "fp")
+    message_id = store.add_message("alert")
+    package = store.claim_signing_package(message_id, ["2", "3"], "fp")
+    assert package == {"id2": "c2a", "id3": "c3a"}
+    assert store.pool_status("fp") == {"1": 2, "2": 1, "3": 1}
+    assert store.release_signing_package(message_id) == []
+    assert store.claim_signing_package(message_id, ["1", "3"], "fp") == {"id1": "c1a", "id3": "c3b"}
+
+def test_pool_drops_commitments_for_another_group_key(store):
+    store.add_pool_commitments("1", "id1", 2, ["old1"], "old")
+    store.add_pool_commitments("2", "id2", 2, ["old2"])  # from before fingerprints were stored
+    store.add_pool_commitments("3", "id3", 2, ["new3"], "new")
+    assert store.pool_status("new") == {"3": 1}
+    message_id = store.add_message("alert")
+    assert store.claim_signing_package(message_id, None, "new") is None
+    assert store.pool_status() == {"3": 1}
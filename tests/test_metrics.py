@@ -0,0 +1,80 @@
+import json
+import os
+
+import pytest
+
+import metrics
+
+@pytest.fixture
+def run_file(workdir, monkeypatch):
+    monkeypatch.setattr(metrics, "ENABLED", True)
+    monkeypatch.setattr(metrics, "_run", {})
+    return str(workdir / "metrics.jsonl")
+
+def record(path, command, ts, **stages):
+    with open(path, "a") as f:
+        f.write(json.dumps({"ts": ts, "pid": 1, "command": command, "stages": stages}) + "\n")
+
+def counts(registry):
+    return {stage: histogram.count for stage, histogram in registry.histograms.items()}
+
+def test_flush_appends_one_line_per_run(run_file):
+    metrics.observe("sign.round1", 0.002)
+    metrics.observe("sign.round1", 0.003)
+    metrics.flush("sign", path=run_file)
+    metrics.flush("sign", path=run_file)  # nothing observed since: no line
+    metrics.observe("verify", 0.001)
+    metrics.flush("verify", path=run_file)
+    runs = metrics.load_runs(path=run_file)
+    assert [run["command"] for run in runs] == ["sign", "verify"]
+    assert runs[0]["stages"] == {"sign.round1": pytest.approx(0.005)}
+    assert metrics.load_runs(command="verify", path=run_file) == runs[1:]
+
+def test_summary_percentiles(run_file):
+    for i in range(1, 101):
+        record(run_file, "broadcast", i, aggregate=i / 1000)
+    summary = metrics.summarize(metrics.load_runs(path=run_file))["aggregate"]
+    assert summary["runs"] == 100
+    assert summary["p50_ms"] == pytest.approx(51)
+    assert summary["p95_ms"] == pytest.approx(96)
+    assert summary["max_ms"] == pytest.approx(100)
+
+def test_histograms_render_cumulative_buckets():
+    registry = metrics.Registry()
+    registry.observe("store", 0.0002)
+    registry.observe("store", 20.0)
+    text = registry.render("relay_stage_seconds", "Time per stage.")
+    assert "# TYPE relay_stage_seconds histogram" in text
+    assert 'relay_stage_seconds_bucket{stage="store",le="0.0005"} 1' in text
+    assert 'relay_stage_seconds_bucket{stage="store",le="10.0"} 1' in text
+    assert 'relay_stage_seconds_bucket{stage="store",le="+Inf"} 2' in text
+    assert 'relay_stage_seconds_count{stage="store"} 2' in text
+
+def test_follower_starts_from_the_last_runs_and_reads_only_new_lines(run_file):
+    for ts in range(5):
+        record(run_file, "sign", ts, round1=0.001)
+    follower = metrics.RunFollower(limit=3, path=run_file)
+    assert counts(follower.refresh()) == {"round1": 3}
+    assert counts(follower.refresh()) == {"round1": 3}  # nothing new
+    record(run_file, "broadcast", 5, round1=0.001, publish=0.01)
+    with open(run_file, "a") as f:
+        f.write('{"ts": 6, "pid": 1, "command": "sign", ')  # still being written
+    assert counts(follower.refresh()) == {"round1": 4, "publish": 1}
+    with open(run_file, "a") as f:
+        f.write('"stages": {"round1": 0.001}}\n')
+    assert counts(follower.refresh()) == {"round1": 5, "publish": 1}
+
+def test_follower_counts_runs_once_across_a_truncation(run_file, monkeypatch):
+    for ts in range(4):
+        record(run_file, "sign", ts, round1=0.001)
+    follower = metrics.RunFollower(path=run_file)
+    assert counts(follower.refresh()) == {"round1": 4}
+    monkeypatch.setattr(metrics, "TAIL_BYTES", 200)
+    metrics._truncate(run_file)  # what flush does past MAX_FILE_BYTES: the file is replaced by its tail
+    record(run_file, "sign", 4, round1=0.001)
+    assert counts(follower.refresh()) == {"round1": 5}
+
+def test_follower_without_a_file_is_empty(run_file):
+    follower = metrics.RunFollower(path=run_file)
+    assert follower.refresh().histograms == {}
+    assert not os.path.exists(run_file)
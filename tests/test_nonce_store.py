@@ -0,0 +1,53 @@
+import os
+import stat
+
+import pytest
+
+import nonce_store
+
+@pytest.fixture
+def share(workdir, monkeypatch):
+    monkeypatch.setattr(nonce_store, "_connections", {})
+    os.makedirs("keys/1")
+    yield "keys/1/key_package.json"
+    for conn in nonce_store._connections.values():
+        conn.close()
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+def test_nonces_are_handed_out_once(share):
+    nonce_store.add_nonces(share, [("n1", "c1"), ("n2", "c2")], "fp")
+    assert nonce_store.count_unused(share) == 2
+    assert nonce_store.consume(share, "c1", "fp") == "n1"
+    assert nonce_store.consume(share, "c1", "fp") is None
+    assert nonce_store.consume(share, "unknown", "fp") is None
+    assert nonce_store.count_unused(share, "fp") == 1
+
+def test_a_lookup_for_another_group_key_leaves_the_nonce_alone(share):
+    nonce_store.add_nonces(share, [("n1", "c1")], "real")
+    assert nonce_store.consume(share, "c1", "other") is None
+    assert nonce_store.count_unused(share, "real") == 1
+    assert nonce_store.consume(share, "c1", "real") == "n1"
+    assert nonce_store.consume(share, "c1", "real") is None
+
+def test_nonces_for_a_replaced_group_key_are_wiped(share):
+    nonce_store.add_nonces(share, [("n1", "c1"), ("n2", "c2")], "old")
+    nonce_store.add_nonces(share, [("n3", "c3")], "new")
+    assert nonce_store.count_unused(share) == 1
+    assert nonce_store.consume(share, "c2", "old") is None
+
+def test_nonces_without_a_fingerprint_are_stale(share):
+    nonce_store.add_nonces(share, [("n1", "c1")])
+    assert nonce_store.consume(share, "c1", "fp") is None
+
+def test_database_files_are_owner_only(share):
+    old_umask = os.umask(0o022)
+    try:
+        nonce_store.add_nonces(share, [("n1", "c1")], "fp")
+    finally:
+        os.umask(old_umask)
+    path = nonce_store.nonces_db_path(share)
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            assert mode(path + suffix) == 0o600
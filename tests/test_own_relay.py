@@ -0,0 +1,171 @@
+import json
+import socket
+import asyncio
+
+import pytest
+
+pytest.importorskip("websockets")
+pytest.importorskip("fastapi")
+pytest.importorskip("uvicorn")
+import metrics
+import own_relay
+from relay_dispatch import Dispatcher
+from relay_store import EventStore
+
+class FakeSocket:
+    """Delivers `messages` to the handler, then lingers a moment so queued replies are written."""
+
+    def __init__(self, messages):
+        self.messages = list(messages)
+        self.sent = []
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await asyncio.sleep(0.01)
+        if not self.messages:
+            raise StopAsyncIteration
+        return self.messages.pop(0)
+
+    async def send(self, frame):
+        self.sent.append(json.loads(frame))
+
+    async def close(self, code=1000, reason=""):
+        pass
+
+def event(i, **fields):
+    return {"id": f"{i:064x}", "pubkey": "ab" * 32, "kind": 1, "created_at": 1_700_000_000 + i,
+            "tags": [], "content": f"event {i}", "sig": "0" * 128, **fields}
+
+@pytest.fixture
+def relay(monkeypatch):
+    # A fresh in-memory relay with default options, as a worker or embedding process gets on import.
+    monkeypatch.setattr(own_relay, "store", EventStore())
+    monkeypatch.setattr(own_relay, "quarantine", EventStore())
+    monkeypatch.setattr(own_relay, "dispatcher", Dispatcher())
+    monkeypatch.setattr(own_relay, "event_log", None)
+    monkeypatch.setattr(own_relay, "verifier", None)
+    monkeypatch.setattr(own_relay, "args", own_relay.args)
+    own_relay.configure(own_relay.build_parser().parse_args(["--data-dir", ""]))
+    return own_relay
+
+def run(relay, *frames):
+    socket = FakeSocket(json.dumps(frame) for frame in frames)
+    asyncio.run(relay.handle_connection(socket))
+    return socket.sent
+
+def test_import_gives_default_options():
+    assert own_relay.args.port == own_relay.RELAY_PORT
+    assert own_relay.args.invalid_frost == "quarantine"
+
+def test_configure_applies_options(relay):
+    relay.configure(relay.build_parser().parse_args(["--max-events", "5", "--slow-consumer", "disconnect"]))
+    assert relay.store.max_events == 5
+    assert relay.dispatcher.policy == "disconnect"
+
+def test_events_are_stored_and_replayed_in_memory_mode(relay):
+    sent = run(relay, ["EVENT", event(1)], ["REQ", "s", {}])
+    assert sent[0] == ["OK", event(1)["id"], True, ""]
+    assert sent[1] == ["EVENT", "s", event(1)]
+    assert sent[2] == ["EOSE", "s"]
+
+@pytest.mark.parametrize("bad", [event(1, created_at=1.5), event(1, kind=2**31), event(1, id="nothex")])
+def test_malformed_events_are_rejected_without_a_data_dir(relay, bad):
+    sent = run(relay, ["EVENT", bad])
+    assert sent[0][2] is False
+    assert len(relay.store) == 0
+
+class RejectingVerifier:
+    verified = batches = 0
+
+    def __init__(self):
+        self.invalid = 0
+
+    async def verify(self, message, signature_b64, fingerprint=None):
+        self.invalid += 1
+        return False
+
+    def close(self):
+        pass
+
+@pytest.mark.parametrize("policy, quarantined", [("quarantine", 1), ("drop", 0)])
+def test_invalid_frost_policy(relay, policy, quarantined):
+    relay.configure(relay.build_parser().parse_args(["--data-dir", "", "--invalid-frost", policy]))
+    relay.verifier = RejectingVerifier()
+    alert = event(1, content="Evacuate\nFROST Signature: c2lnbmF0dXJl")
+    sent = run(relay, ["EVENT", alert])
+    assert sent[0][2] is False
+    assert len(relay.store) == 0
+    assert len(relay.quarantine) == quarantined
+
+def test_metrics_expose_verification_totals_as_counters(relay, workdir, monkeypatch):
+    monkeypatch.setattr(relay, "pipeline_runs", metrics.RunFollower(path=str(workdir / "metrics.jsonl")))
+    relay.verifier = RejectingVerifier()
+    run(relay, ["EVENT", event(1)], ["EVENT", event(2, content="Evacuate\nFROST Signature: c2lnbmF0dXJl")])
+    body = asyncio.run(relay.get_metrics()).body.decode()
+    assert "# TYPE relay_events_stored gauge\nrelay_events_stored 1\n" in body
+    assert "# TYPE relay_frost_invalid_total counter\nrelay_frost_invalid_total 1\n" in body
+    assert "# TYPE relay_frost_verified_total counter\n" in body
+    assert "# TYPE relay_frost_batches_total counter\n" in body
+
+def test_spawned_tasks_are_held_until_they_finish(relay):
+    async def main():
+        done = asyncio.Event()
+        task = relay.spawn(done.wait())
+        held = task in relay.background_tasks
+        done.set()
+        await task
+        await asyncio.sleep(0)  # done callbacks run on the next loop iteration
+        return held, task in relay.background_tasks
+    assert asyncio.run(main()) == (True, False)
+
+def test_hub_numbers_events_for_every_worker(relay):
+    async def main():
+        pairs = [socket.socketpair() for _ in range(2)]
+        hub = asyncio.create_task(relay.run_hub([hub_end for hub_end, _ in pairs]))
+        workers = [await asyncio.open_connection(sock=worker_end) for _, worker_end in pairs]
+        (_, first), (_, second) = workers
+        first.write(relay.hub_line(1.0, False, json.dumps(event(1))))
+        await first.drain()
+        await asyncio.sleep(0.05)
+        second.write(relay.hub_line(2.0, True, json.dumps(event(2))))
+        second.write(relay.hub_line(3.0, False, json.dumps(event(1))))  # accepted by both workers
+        await second.drain()
+        lines = [[relay.parse_numbered_hub_line(await reader.readline()) for _ in range(2)] for reader, _ in workers]
+        for _, writer in workers:
+            writer.close()
+        await hub
+        return lines
+    first, second = asyncio.run(main())
+    assert first == second  # the sender gets its own event back, numbered like everyone else's
+    assert [(seq, verified, json.loads(raw)["id"]) for seq, _, verified, raw in first] == \
+        [(1, False, event(1)["id"]), (2, True, event(2)["id"])]
+
+def test_worker_stores_events_under_the_hub_seq(relay):
+    async def main():
+        reader = asyncio.StreamReader()
+        reader.feed_data(relay.hub_line(1.0, False, json.dumps(event(1)), 7))
+        reader.feed_data(relay.hub_line(2.0, True, json.dumps(event(2)), 9))
+        reader.feed_eof()
+        await relay.follow_hub(reader)
+    asyncio.run(main())
+    assert [(entry.seq, entry.verified) for entry in relay.store] == [(7, False), (9, True)]
+    page = json.loads(relay.relay_feed.events_page(relay.store, 7, 10))
+    assert [item["event"] for item in page["events"]] == [event(2)] and page["next"] == 9
+
+def test_worker_hands_accepted_events_to_the_hub(relay, monkeypatch):
+    async def main():
+        hub_end, worker_end = socket.socketpair()
+        _, writer = await asyncio.open_connection(sock=worker_end)
+        monkeypatch.setattr(relay, "hub_writer", writer)
+        reader, _ = await asyncio.open_connection(sock=hub_end)
+        socket_ = FakeSocket([json.dumps(["EVENT", event(1)])])
+        await relay.handle_connection(socket_)
+        line = await reader.readline()
+        writer.close()
+        return socket_.sent, line
+    sent, line = asyncio.run(main())
+    assert sent == [["OK", event(1)["id"], True, ""]]
+    assert json.loads(relay.parse_hub_line(line)[2]) == event(1)
+    assert len(relay.store) == 0  # stored when the hub hands it back numbered
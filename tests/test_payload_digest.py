@@ -0,0 +1,31 @@
+import hashlib
+
+import payload_digest
+
+def test_file_digest_matches_sha256_across_chunks(tmp_path):
+    path = tmp_path / "map.pdf"
+    data = bytes(range(256)) * 1000
+    path.write_bytes(data)
+    for chunk_size in (1, 1000, len(data), len(data) * 2):
+        assert payload_digest.file_digest(path, chunk_size) == (hashlib.sha256(data).hexdigest(), len(data))
+
+def test_empty_file(tmp_path):
+    path = tmp_path / "empty"
+    path.write_bytes(b"")
+    assert payload_digest.file_digest(path) == (hashlib.sha256(b"").hexdigest(), 0)
+
+def test_statement_is_recognised_and_recorded(tmp_path):
+    digest = "ab" * 32
+    message = payload_digest.statement(digest)
+    assert message == f"FROST-DIGEST-v1 sha256:{digest}"
+    assert payload_digest.is_statement(message)
+    assert not payload_digest.is_statement("Flood warning")
+    fields = payload_digest.ledger_fields(tmp_path / "map.pdf", digest, 5)
+    assert fields == {"digest": f"sha256:{digest}", "file": str(tmp_path / "map.pdf"), "size": 5}
+
+def test_cli_keeps_alerts_and_statements_apart(tmp_path, capsys):
+    import cli
+    assert cli.reject_statement(payload_digest.statement("ab" * 32))
+    assert not cli.reject_statement("Flood warning")
+    assert cli.file_statement(tmp_path / "missing") is None
+    assert "Error reading" in capsys.readouterr().out
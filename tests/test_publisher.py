@@ -0,0 +1,75 @@
+import os
+import asyncio
+
+import pytest
+
+pytest.importorskip("nostr_sdk")
+pytest.importorskip("websockets")
+pytest.importorskip("fastapi")
+pytest.importorskip("uvicorn")
+pytest.importorskip("httpx")  # for fastapi.testclient
+import websockets
+from fastapi.testclient import TestClient
+from nostr_sdk import Keys
+
+import frost_keyring
+import own_relay
+import publisher
+from conftest import fake_signature
+from relay_dispatch import Dispatcher
+from relay_store import EventStore
+
+GROUP_KEY = "Z3JvdXAga2V5"
+
+@pytest.fixture
+def relay(workdir, frost_stub, monkeypatch):
+    monkeypatch.setattr(own_relay, "store", EventStore())
+    monkeypatch.setattr(own_relay, "dispatcher", Dispatcher())
+    monkeypatch.setattr(own_relay, "event_log", None)
+    monkeypatch.setattr(own_relay, "verifier", None)
+    monkeypatch.setattr(own_relay, "args", own_relay.args)
+    own_relay.configure(own_relay.build_parser().parse_args(["--data-dir", ""]))
+    import nostr
+    monkeypatch.setattr(nostr, "NOSTR_PRIVATE_KEY", Keys.generate().secret_key().to_bech32())
+    monkeypatch.setattr(frost_keyring, "_index", None)
+    frost_keyring.select(None)
+    os.makedirs("keys")
+    with open("keys/public_key.txt", "w") as f:
+        f.write(GROUP_KEY)
+    return own_relay
+
+async def publish_through(relay, message, signature, fingerprint):
+    """Start own_relay and a publisher connected to it, hand the alert over as cli.py broadcast does,
+    and return the publisher's response and the relay's /events page."""
+    server = await websockets.serve(relay.handle_connection, "127.0.0.1", 0)
+    relay_url = f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+    instance = publisher.Publisher([relay_url])
+    await instance.start()
+    worker = asyncio.create_task(instance.worker())
+    listener = await asyncio.start_server(instance.handle_client, "127.0.0.1", 0)
+    port = listener.sockets[0].getsockname()[1]
+    try:
+        response = await asyncio.to_thread(publisher.hand_off, message, signature, fingerprint, port=port)
+        page = (await asyncio.to_thread(TestClient(relay.app).get, "/events")).json()
+    finally:
+        worker.cancel()
+        listener.close()
+        await instance.client.disconnect()
+        server.close()
+        await server.wait_closed()
+    return relay_url, response, page
+
+def test_published_alert_comes_back_from_the_relay(relay):
+    fingerprint = frost_keyring.fingerprint(GROUP_KEY)
+    relay_url, response, page = asyncio.run(
+        publish_through(relay, "Evacuate", fake_signature("Evacuate", GROUP_KEY), fingerprint))
+    assert response["ok"] and response["sent"] == [relay_url]
+    [item] = page["events"]
+    assert item["event"]["content"] == f"Evacuate\nFROST Key: {fingerprint}\nFROST Signature: {fake_signature('Evacuate', GROUP_KEY)}"
+    assert page["next"] == 1
+
+def test_alert_with_a_bad_signature_is_not_published(relay):
+    _, response, page = asyncio.run(
+        publish_through(relay, "Evacuate", "forged", frost_keyring.fingerprint(GROUP_KEY)))
+    assert response == {"ok": False, "error": "FROST signature verification failed."}
+    assert page["events"] == []
@@ -0,0 +1,105 @@
+import asyncio
+
+from relay_dispatch import Dispatcher
+
+class FakeWebSocket:
+    def __init__(self, block=False):
+        self.sent = []
+        self.closed = None
+        self.unblocked = asyncio.Event()
+        if not block:
+            self.unblocked.set()
+
+    async def send(self, frame):
+        await self.unblocked.wait()
+        self.sent.append(frame)
+
+    async def close(self, code=1000, reason=""):
+        self.closed = (code, reason)
+
+def event(id="e1", pubkey="alice", kind=1, created_at=100):
+    return {"id": id, "pubkey": pubkey, "kind": kind, "created_at": created_at}
+
+def run(coro):
+    return asyncio.run(coro)
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+def test_events_reach_only_matching_subscriptions():
+    async def main():
+        dispatcher = Dispatcher()
+        ws = FakeWebSocket()
+        conn = dispatcher.register(ws)
+        dispatcher.subscribe(conn, "alice", [{"authors": ["alice"]}])
+        dispatcher.subscribe(conn, "notes", [{"kinds": [1], "since": 200}])
+        dispatcher.subscribe(conn, "all", [])
+        dispatcher.dispatch(event(), lambda sub_id: sub_id)
+        await settle()
+        dispatcher.unregister(conn)
+        return ws.sent
+    assert sorted(run(main())) == ["alice", "all"]
+
+def test_unsubscribe_removes_every_posting():
+    async def main():
+        dispatcher = Dispatcher()
+        conn = dispatcher.register(FakeWebSocket())
+        dispatcher.subscribe(conn, "s", [{"ids": ["e1", "e2"]}, {"kinds": [1]}, {"since": 0}])
+        dispatcher.subscribe(conn, "s", [{"authors": ["bob"]}])  # replaces the old filters
+        assert dict(dispatcher.by_id) == {} and dict(dispatcher.by_kind) == {} and not dispatcher.wildcard
+        dispatcher.unregister(conn)
+        return dispatcher
+    dispatcher = run(main())
+    assert dict(dispatcher.by_author) == {} and not dispatcher._postings and not dispatcher.connections
+
+def test_full_queue_drops_the_oldest_frame():
+    async def main():
+        dispatcher = Dispatcher(queue_size=2)
+        ws = FakeWebSocket(block=True)
+        conn = dispatcher.register(ws)
+        dispatcher.subscribe(conn, "s", [])
+        conn.offer("frame 0")
+        await settle()  # the writer is now stuck sending frame 0
+        for n in range(1, 5):
+            conn.offer(f"frame {n}")
+        ws.unblocked.set()
+        await settle()
+        dispatcher.unregister(conn)
+        return ws.sent, conn.dropped
+    sent, dropped = run(main())
+    assert dropped == 2
+    assert sent == ["frame 0", "frame 3", "frame 4"]
+
+def test_slow_consumer_is_disconnected_under_that_policy():
+    async def main():
+        dispatcher = Dispatcher(queue_size=1, policy="disconnect")
+        ws = FakeWebSocket(block=True)
+        conn = dispatcher.register(ws)
+        await settle()
+        for n in range(3):
+            conn.offer(f"frame {n}")
+        await settle()
+        dispatcher.unregister(conn)
+        return ws.closed, conn.closing
+    closed, closing = run(main())
+    assert closing and closed[0] == 1008
+
+def test_put_fails_once_the_writer_has_stopped():
+    class BrokenWebSocket(FakeWebSocket):
+        async def send(self, frame):
+            raise OSError("connection reset")
+    async def main():
+        dispatcher = Dispatcher(queue_size=1)
+        conn = dispatcher.register(BrokenWebSocket())
+        await conn.put("first")
+        await settle()
+        conn.queue.put_nowait("fills the queue")
+        try:
+            await conn.put("second")
+        except ConnectionError:
+            return True
+        finally:
+            dispatcher.unregister(conn)
+        return False
+    assert run(main())
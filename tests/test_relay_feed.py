@@ -0,0 +1,62 @@
+import json
+import asyncio
+
+import relay_feed
+from relay_store import EventStore
+
+def event(i):
+    return {"id": f"{i:064x}", "pubkey": "ab" * 32, "kind": 1, "created_at": 1_700_000_000 + i,
+            "tags": [], "content": f"ünïcode \"{i}\"\n", "sig": "0" * 128}
+
+def filled(n):
+    store = EventStore()
+    for i in range(1, n + 1):
+        store.add(event(i)).received_at = 1.5
+    return store
+
+def test_pages_follow_the_cursor_to_the_end():
+    store = filled(5)
+    seen, cursor = [], 0
+    while True:
+        page = json.loads(relay_feed.events_page(store, cursor, 2))
+        if not page["events"]:
+            break
+        seen += [item["event"] for item in page["events"]]
+        cursor = page["next"]
+    assert seen == [event(i) for i in range(1, 6)]
+    assert cursor == 5
+    assert json.loads(relay_feed.events_page(store, 99, 2)) == {"events": [], "next": 99}
+    assert json.loads(relay_feed.events_page(store, -3, 1))["events"][0]["received_at"] == 1.5
+
+def test_evicted_events_are_skipped_not_replayed():
+    store = filled(5)
+    store.max_events = 3
+    store.add(event(6))
+    assert [item["event"]["id"] for item in json.loads(relay_feed.events_page(store, 1, 10))["events"]] == \
+        [event(i)["id"] for i in (4, 5, 6)]
+
+def test_stream_resumes_after_the_last_event_id():
+    store = filled(3)
+    assert relay_feed.resume_cursor(store, "2") == 2
+    assert relay_feed.resume_cursor(store, None, 1) == 1
+    assert relay_feed.resume_cursor(store, "garbage", 1) == 1
+    assert relay_feed.resume_cursor(store, "7") == 0  # from before a restart
+
+def test_stream_sends_the_backlog_then_new_events():
+    async def main():
+        store = filled(3)
+        changed = asyncio.Event()
+        frames = relay_feed.stream_frames(store, relay_feed.resume_cursor(store, "1"), lambda: changed,
+                                          keepalive=0.01)
+        backlog = await frames.__anext__()
+        keepalive = await frames.__anext__()
+        store.add(event(4))
+        changed.set()
+        live = await frames.__anext__()
+        await frames.aclose()
+        return backlog, keepalive, live
+    backlog, keepalive, live = asyncio.run(main())
+    assert [line for line in backlog.splitlines() if line.startswith("id:")] == ["id: 2", "id: 3"]
+    assert json.loads(backlog.split("data: ", 2)[1].split("\n")[0])["event"] == event(2)
+    assert keepalive == ": keepalive\n\n"
+    assert live.startswith("id: 4\n")
@@ -0,0 +1,38 @@
+import json
+
+import pytest
+
+import relay_json
+
+EVENTS = [
+    {"id": "ab" * 32, "pubkey": "cd" * 32, "kind": 1, "created_at": 1_700_000_000, "tags": [],
+     "content": "plain", "sig": "0" * 128},
+    {"id": "ef" * 32, "kind": 30023, "created_at": 0, "tags": [["e", "ab" * 32, "wss://relay.example/"], ["t", "évacuation"]],
+     "content": "Überflutung 🌊 洪水 \"quoted\" back\\slash\nnew line\ttab \x00\x1f \x7f   </script>"},
+    {"id": "01" * 32, "kind": 0, "created_at": 1, "content": "", "tags": [[]], "extra": {"n": None, "ok": True, "big": 2**53}},
+]
+
+@pytest.fixture(params=["stdlib", "orjson"])
+def codec(request, monkeypatch):
+    if request.param == "stdlib":
+        monkeypatch.setattr(relay_json, "orjson", None)
+    elif relay_json.orjson is None:
+        pytest.skip("orjson is not installed")
+    return relay_json
+
+@pytest.mark.parametrize("event", EVENTS)
+def test_dumps_matches_compact_json_dumps(codec, event):
+    text = codec.dumps(event)
+    assert isinstance(text, str)
+    assert text == json.dumps(event, separators=(",", ":"), ensure_ascii=False)
+    assert codec.loads(text) == event
+    assert codec.loads(text.encode()) == event
+
+def test_frames_splice_the_serialized_event(codec):
+    raw = codec.dumps(EVENTS[1])
+    frame = codec.event_frame('sub "1" ü', raw)
+    assert json.loads(frame) == ["EVENT", 'sub "1" ü', EVENTS[1]]
+
+def test_invalid_json_raises_the_stdlib_error(codec):
+    with pytest.raises(json.JSONDecodeError):
+        codec.loads('["EVENT", {')
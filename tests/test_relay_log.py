@@ -0,0 +1,127 @@
+import os
+import zlib
+import struct
+
+import pytest
+
+import relay_json
+from relay_log import EventLog, INDEX_RECORD, RECORD_HEADER, is_indexable
+from relay_store import EventStore
+
+def event(i, **fields):
+    return {"id": f"{i:064x}", "pubkey": "ab" * 32, "kind": 1, "created_at": 1_700_000_000 + i,
+            "tags": [], "content": f"event {i}", "sig": "0" * 128, **fields}
+
+def open_log(directory, **options):
+    store = EventStore()
+    log = EventLog(str(directory), **options)
+    log.open(store)
+    return store, log
+
+def append(store, log, ev):
+    entry = store.add(ev)
+    log.append(entry, entry.raw.encode())
+    return entry
+
+def write_raw_record(path, payload):
+    with open(path, "ab") as f:
+        f.write(RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+
+def test_reopen_replays_from_the_index(tmp_path):
+    store, log = open_log(tmp_path)
+    for i in range(5):
+        append(store, log, event(i))
+    log.close()
+    store, log = open_log(tmp_path)
+    assert sorted(e.id for e in store) == sorted(event(i)["id"] for i in range(5))
+    assert store.by_id[event(3)["id"]].event["content"] == "event 3"
+    log.close()
+
+def test_verified_marks_survive_restart(tmp_path):
+    store, log = open_log(tmp_path)
+    entry = append(store, log, event(1))
+    append(store, log, event(2))
+    store.mark_verified([entry])
+    log.mark_verified(entry)
+    log.close()
+    store, log = open_log(tmp_path)
+    assert [store.by_seq[seq].id for _, seq in store.by_verified] == [event(1)["id"]]
+    log.close()
+
+def test_torn_tail_is_truncated(tmp_path):
+    store, log = open_log(tmp_path)
+    append(store, log, event(1))
+    log.close()
+    segment = tmp_path / "00000001.log"
+    size = segment.stat().st_size
+    with open(segment, "ab") as f:
+        f.write(RECORD_HEADER.pack(100, 0) + b'{"partial')
+    store, log = open_log(tmp_path)
+    assert len(store) == 1
+    assert segment.stat().st_size == size
+    log.close()
+
+def test_records_missing_from_the_index_are_reindexed(tmp_path):
+    store, log = open_log(tmp_path)
+    append(store, log, event(1))
+    log.close()
+    write_raw_record(tmp_path / "00000001.log", relay_json.dumps(event(2)).encode())
+    store, log = open_log(tmp_path)
+    assert event(2)["id"] in store.by_id
+    assert os.path.getsize(tmp_path / "00000001.idx") == 2 * INDEX_RECORD.size
+    log.close()
+
+@pytest.mark.parametrize("bad", [event(9, created_at=1.5), event(9, kind=2**31), event(9, kind=-1)])
+def test_unindexable_record_is_skipped_on_recovery(tmp_path, bad):
+    store, log = open_log(tmp_path)
+    append(store, log, event(1))
+    log.close()
+    write_raw_record(tmp_path / "00000001.log", relay_json.dumps(bad).encode())
+    write_raw_record(tmp_path / "00000001.log", relay_json.dumps(event(2)).encode())
+    store, log = open_log(tmp_path)
+    assert sorted(store.by_id) == sorted([event(1)["id"], event(2)["id"]])
+    log.close()
+    store, log = open_log(tmp_path)  # and the relay keeps starting
+    assert len(store) == 2
+    log.close()
+
+def test_append_of_unindexable_entry_writes_nothing(tmp_path):
+    store, log = open_log(tmp_path)
+    entry = store.add(event(1, kind=2**40))
+    with pytest.raises(struct.error):
+        log.append(entry, entry.raw.encode())
+    log.close()
+    assert (tmp_path / "00000001.log").stat().st_size == 0
+    assert (tmp_path / "00000001.idx").stat().st_size == 0
+
+@pytest.mark.parametrize("fields, ok", [
+    ({}, True),
+    ({"created_at": 1.5}, False),
+    ({"created_at": 2**63}, False),
+    ({"created_at": True}, False),
+    ({"kind": 65535}, True),
+    ({"kind": 65536}, False),
+    ({"kind": -1}, False),
+    ({"kind": "1"}, False),
+    ({"id": "xyz"}, False),
+    ({"pubkey": "ab"}, False),
+])
+def test_is_indexable(fields, ok):
+    assert is_indexable(event(1, **fields)) is ok
+
+def test_missing_created_at_is_not_indexable():
+    ev = event(1)
+    del ev["created_at"]
+    assert not is_indexable(ev)
+    assert not is_indexable(["EVENT"])
+
+def test_segments_rotate_and_dead_ones_are_compacted_away(tmp_path):
+    store, log = open_log(tmp_path, segment_bytes=1)
+    for i in range(3):
+        append(store, log, event(i))
+    assert len(log.segments) == 3
+    for entry in list(store)[:2]:
+        store.remove(entry)
+    assert log.compact(store) == 2
+    assert sorted(os.listdir(tmp_path)) == ["00000003.idx", "00000003.log", "verified.ids"]
+    log.close()
@@ -0,0 +1,62 @@
+from relay_store import EventStore, matches_filter
+
+def event(i, kind=1, pubkey="a" * 64, created_at=None, tags=()):
+    return {"id": f"{i:064x}", "pubkey": pubkey, "kind": kind, "created_at": i if created_at is None else created_at,
+            "tags": list(tags), "content": f"event {i}", "sig": "0" * 128}
+
+def ids(entries):
+    return [int(entry.id, 16) for entry in entries]
+
+def test_query_is_newest_first_and_limited():
+    store = EventStore()
+    for i in range(1, 11):
+        store.add(event(i))
+    assert ids(store.query([{"limit": 3}])) == [10, 9, 8]
+    assert ids(store.query([{"since": 4, "until": 6}])) == [6, 5, 4]
+
+def test_limit_zero_returns_nothing():
+    store = EventStore()
+    store.add(event(1))
+    assert store.query([{"limit": 0}]) == []
+    assert store.query([{"kinds": [1], "limit": 0}]) == []
+
+def test_indexes_by_author_kind_and_id():
+    store = EventStore()
+    store.add(event(1, kind=1, pubkey="a" * 64))
+    store.add(event(2, kind=7, pubkey="b" * 64))
+    store.add(event(3, kind=7, pubkey="a" * 64))
+    assert ids(store.query([{"authors": ["a" * 64]}])) == [3, 1]
+    assert ids(store.query([{"kinds": [7], "authors": ["a" * 64]}])) == [3]
+    assert ids(store.query([{"ids": [f"{2:064x}"]}])) == [2]
+
+def test_duplicate_id_is_not_stored_twice():
+    store = EventStore()
+    assert store.add(event(1)) is not None
+    assert store.add(event(1)) is None
+    assert len(store) == 1
+
+def test_ring_buffer_evicts_oldest_arrival():
+    store = EventStore(max_events=3)
+    for i in range(1, 6):
+        store.add(event(i))
+    assert ids(store.query([{}])) == [5, 4, 3]
+    assert ids(store.query([{"kinds": [1]}])) == [5, 4, 3]
+
+def test_tag_filters():
+    tagged = event(1, tags=[["e", "x"]])
+    assert matches_filter(tagged, {"#e": ["x"]})
+    assert not matches_filter(tagged, {"#e": ["y"]})
+
+def test_frost_verified_filter():
+    store = EventStore()
+    first, _ = store.add(event(1)), store.add(event(2))
+    store.mark_verified([first])
+    assert ids(store.query([{"frost_verified": True}])) == [1]
+
+def test_after_cursor_pages_in_arrival_order():
+    store = EventStore()
+    for i in range(1, 6):
+        store.add(event(i))
+    page = store.after(0, limit=2)
+    assert ids(page) == [1, 2]
+    assert ids(store.after(page[-1].seq)) == [3, 4, 5]
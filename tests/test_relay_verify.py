@@ -0,0 +1,66 @@
+import asyncio
+import base64
+
+import pytest
+
+import frost_keyring
+import relay_verify
+from conftest import fake_signature
+
+KEY = base64.b64encode(b"group key").decode()
+OTHER_KEY = base64.b64encode(b"other group key").decode()
+
+@pytest.fixture
+def verifier(frost_stub):
+    made = []
+
+    def make(keys=(KEY,), **kwargs):
+        made.append(relay_verify.FrostVerifier(keys, **kwargs))
+        return made[-1]
+    yield make
+    for v in made:
+        v.close()
+
+def verify_all(v, alerts):
+    async def main():
+        return await asyncio.gather(*(v.verify(*alert) for alert in alerts))
+    return asyncio.run(main())
+
+def test_content_is_split_into_message_signature_and_fingerprint():
+    fp = "ab" * 16
+    assert relay_verify.parse_frost_content(f"Evacuate\nFROST Key: {fp}\nFROST Signature: c2ln") == ("Evacuate", "c2ln", fp)
+    assert relay_verify.parse_frost_content("Evacuate\nFROST Signature: c2ln") == ("Evacuate", "c2ln", None)
+    assert relay_verify.parse_frost_content("Evacuate") is None
+    assert relay_verify.parse_frost_content("Evacuate\nFROST Signature: ") is None
+    assert relay_verify.parse_frost_content(None) is None
+
+def test_a_micro_batch_reports_each_alert_on_its_own(verifier):
+    v = verifier(batch_size=4)
+    fp = frost_keyring.fingerprint(KEY)
+    alerts = [(f"alert {i}", fake_signature(f"alert {i}", KEY), fp) for i in range(4)]
+    alerts[2] = ("alert 2", fake_signature("forged", KEY), fp)
+    assert verify_all(v, alerts) == [True, True, False, True]
+    assert (v.verified, v.invalid, v.batches) == (3, 1, 1)
+
+def test_a_partial_batch_is_flushed_after_the_delay(verifier):
+    v = verifier(batch_size=256, max_delay=0.001)
+    assert verify_all(v, [("alert", fake_signature("alert", KEY), None)]) == [True]
+    assert v.batches == 1
+
+def test_alerts_without_a_fingerprint_are_tried_under_every_group_key(verifier):
+    v = verifier(keys=(KEY, OTHER_KEY))
+    alerts = [("first", fake_signature("first", KEY), None),
+              ("second", fake_signature("second", OTHER_KEY), None),
+              ("third", fake_signature("third", "unknown"), None)]
+    assert verify_all(v, alerts) == [True, True, False]
+
+def test_an_unknown_fingerprint_is_invalid_without_a_batch(verifier):
+    v = verifier()
+    assert verify_all(v, [("alert", fake_signature("alert", KEY), "00" * 16)]) == [False]
+    assert (v.invalid, v.batches) == (1, 0)
+
+def test_a_failing_batch_rejects_its_alerts(verifier):
+    v = verifier()
+    v._verify_signatures = lambda entries, key=None: 1 / 0
+    assert verify_all(v, [("alert", fake_signature("alert", KEY), None)]) == [False]
+    assert v.invalid == 1
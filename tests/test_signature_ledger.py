@@ -0,0 +1,87 @@
+import os
+import json
+import struct
+
+import pytest
+
+import signature_ledger
+from signature_ledger import LEDGER_FILE, INDEX_FILE, LEGACY_SIGNATURES_FILE, RECORD_HEADER
+
+def entry(i):
+    return {"message": f"alert {i}", "signature": f"sig{i}"}
+
+@pytest.fixture
+def ledger(workdir, monkeypatch):
+    monkeypatch.setattr(signature_ledger, "INITIAL_SLOTS", 4)  # exercise index growth
+    return signature_ledger
+
+def test_find_by_message_and_signature(ledger):
+    ledger.append_entries([entry(i) for i in range(20)])
+    assert ledger.find_by_message("alert 7") == entry(7)
+    assert ledger.find_by_signature("sig13") == entry(13)
+    assert ledger.find_by_message("alert 99") is None
+    assert list(ledger.iter_entries()) == [entry(i) for i in range(20)]
+
+def test_first_entry_for_a_message_wins(ledger):
+    ledger.append_entries([{"message": "m", "signature": "first"}])
+    ledger.append_entries([{"message": "m", "signature": "second"}])
+    assert ledger.find_by_message("m")["signature"] == "first"
+
+def test_legacy_signatures_are_migrated_once(ledger):
+    os.makedirs("keys")
+    with open(LEGACY_SIGNATURES_FILE, "w") as f:
+        json.dump([entry(1), entry(2)], f)
+    assert ledger.find_by_message("alert 2") == entry(2)
+    assert not os.path.exists(LEGACY_SIGNATURES_FILE)
+    assert os.path.exists(LEGACY_SIGNATURES_FILE + ".migrated")
+    ledger.append_entries([entry(3)])
+    assert [e["message"] for e in ledger.iter_entries()] == ["alert 1", "alert 2", "alert 3"]
+
+def test_lookup_never_cuts_a_record_being_written(ledger):
+    ledger.append_entries([entry(1)])
+    # What a concurrent writer has written so far: a header and half the payload.
+    payload = json.dumps(entry(2)).encode()
+    with open(LEDGER_FILE, "ab") as f:
+        f.write(RECORD_HEADER.pack(len(payload), 0) + payload[:5])
+    size = os.path.getsize(LEDGER_FILE)
+    assert ledger.find_by_message("alert 1") == entry(1)
+    assert ledger.find_by_message("alert 2") is None
+    assert os.path.getsize(LEDGER_FILE) == size
+
+def test_writer_discards_a_crashed_writers_tail(ledger):
+    ledger.append_entries([entry(1)])
+    good = os.path.getsize(LEDGER_FILE)
+    with open(LEDGER_FILE, "ab") as f:
+        f.write(RECORD_HEADER.pack(100, 0) + b"{")
+    ledger.append_entries([entry(2)])
+    assert ledger.find_by_message("alert 2") == entry(2)
+    assert list(ledger.iter_entries()) == [entry(1), entry(2)]
+    with open(LEDGER_FILE, "rb") as f:
+        f.seek(good)
+        assert struct.unpack("<II", f.read(RECORD_HEADER.size))[0] == len(json.dumps(entry(2), separators=(",", ":")))
+
+def test_records_appended_past_the_index_are_found(ledger):
+    ledger.append_entries([entry(1)])
+    with open(LEDGER_FILE, "ab") as f:
+        f.write(signature_ledger._encode_record(entry(2)))  # e.g. a writer that crashed before indexing
+    assert ledger.find_by_message("alert 2") == entry(2)
+
+@pytest.mark.parametrize("damage", ["delete", "garbage"])
+def test_lookups_survive_a_lost_index_and_writes_rebuild_it(ledger, damage):
+    ledger.append_entries([entry(i) for i in range(10)])
+    if damage == "delete":
+        os.remove(INDEX_FILE)
+    else:
+        with open(INDEX_FILE, "wb") as f:
+            f.write(b"x" * 64)
+    assert ledger.find_by_message("alert 4") == entry(4)
+    ledger.append_entries([entry(10)])
+    assert ledger.find_by_signature("sig4") == entry(4)
+    assert ledger.find_by_signature("sig10") == entry(10)
+
+def test_replaced_ledger_is_reindexed(ledger):
+    ledger.append_entries([entry(i) for i in range(10)])
+    os.remove(LEDGER_FILE)
+    ledger.append_entries([entry(42)])
+    assert ledger.find_by_message("alert 3") is None
+    assert ledger.find_by_message("alert 42") == entry(42)
@@ -1,43 +1,76 @@
 import os
-import json
-from frostpy import verify_signature_py
+from frostpy import verify_signature_py, verify_signatures_batch_py, verify_with_key_py
+import key_cache
+import frost_keyring
+import signature_ledger
 
 KEYS_DIR = "keys"
-SIGNATURES_FILE = os.path.join(KEYS_DIR, "signatures.txt")
+PUBLIC_KEY_NAME = "public_key.txt"  # in the active group's key directory
 
-def read_signature(message: str):
-    file_path = SIGNATURES_FILE
+def read_signature_entry(message: str):
+    """The first ledger entry for `message` (as with the old signatures.txt scan, re-signing does not
+    replace it): its signature and, when recorded, group and fingerprint."""
     try:
-        with open(file_path, "r") as f:
-            signatures = json.load(f)
-        for entry in signatures:
-            if entry["message"] == message:
-                return entry["signature"]
+        entry = signature_ledger.find_by_message(message)
+        if entry is not None:
+            return entry
         print(f" No signature found for message: '{message}'")
         return None
     except Exception as e:
         print(f" Error reading signatures: {e}")
         return None
 
+def read_signature(message: str):
+    entry = read_signature_entry(message)
+    return entry["signature"] if entry is not None else None
+
 def read_public_key():
-    file_path = os.path.join(KEYS_DIR, "public_key.txt")
+    file_path = frost_keyring.key_path(PUBLIC_KEY_NAME)
     try:
+        if os.path.exists(key_cache.binary_path(file_path)):
+            return key_cache.load_verifying_key(file_path).to_b64()
         with open(file_path, "r") as f:
             return f.read().strip()
     except Exception as e:
         print(f" Error reading public key: {e}")
         return None
 
-def verify_signature(message: str, signature: str, public_key: str) -> bool | None:
+def load_verifying_key(fingerprint=None):
+    # With a fingerprint the key is found through the keyring index, whatever group is active.
+    try:
+        if fingerprint is None:
+            return frost_keyring.verifying_key()
+        group, verifying_key = frost_keyring.verifying_key_for(fingerprint)
+        if verifying_key is None:
+            print(f" No group in {frost_keyring.INDEX_FILE} has key fingerprint {fingerprint}")
+        return verifying_key
+    except Exception as e:
+        print(f" Error reading public key: {e}")
+        return None
+
+def verify_signature(message: str, signature: str, public_key) -> bool | None:
+    # public_key is either the base64 text of public_key.txt or a cached frostpy.VerifyingKey
     print(f"Verifying signature for message: '{message}'")
     try:
-        is_valid = verify_signature_py(message, signature, public_key)
+        if isinstance(public_key, str):
+            is_valid = verify_signature_py(message, signature, public_key)
+        else:
+            is_valid = verify_with_key_py(message, signature, public_key)
         print(f"Signature is {'valid' if is_valid else 'invalid'}")
         return is_valid
     except Exception as e:
         print(f" Verification error: {e}")
         return None
 
+def verify_signatures(entries, public_key: str | None = None) -> list[bool] | None:
+    """Verify many (message, signature) pairs under one group key, or (message, signature, key)
+    triples under their own keys, in a single frostpy call."""
+    try:
+        return verify_signatures_batch_py(entries, public_key)
+    except Exception as e:
+        print(f" Batch verification error: {e}")
+        return None
+
 if __name__ == "__main__":
     message = "Emergency broadcast: System going offline."
     signature = read_signature(message)